@@ -0,0 +1,500 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from excel_generator.excel_creator import VALUE_MODES, ExcelCreator
+from excel_generator.sharded_writer import EXCEL_MAX_ROWS, MERGE_ROWS, SPLIT_MODES
+from parsers.log_reader import file_signature, log_stem
+from parsers.structured import STRUCTURED_SUFFIXES, save_structured
+from utils.checkpoint import (WORKBOOK_SUFFIX, Checkpoint, checkpoint_from_pipeline,
+                              load_resume_point, resume_pipeline, save_checkpoint)
+from utils.network import NetworkArrays
+from utils.optimizers import OPTIMIZERS
+from utils.pipeline import create_processing_pipeline
+from utils.planner import PARSING_MODES, TABLE_MODES, ExecutionPlan, plan_execution
+from utils.precision import (DEFAULT_PRECISION, PRECISIONS, precision_dtype,
+                             training_precision_report)
+from utils.registry import RunRegistry
+from utils.selection import NeuronSelection
+from utils.weight_diff import DEFAULT_TOP_K, diff_networks
+
+# Расширение файлов контрольных точек
+CHECKPOINT_SUFFIX = '.kpsnet'
+
+
+def _output_path(input_file: Path, suffix: str, output: Optional[str]) -> Path:
+    """Путь к выходному файлу: заданный явно или рядом с входным"""
+    if output:
+        return Path(output)
+    return input_file.parent / f"{log_stem(input_file)}_{suffix}.xlsx"
+
+
+def load_patterns(path: Path, n_outputs: int):
+    """
+    Загружает обучающие образы из .npy или .csv.
+
+    Каждая строка - входной вектор, последние n_outputs столбцов - целевые
+    значения. В .csv допускаются десятичные запятые при разделителе ";".
+
+    Args:
+        path: Путь к файлу образов
+        n_outputs: Число выходов сети
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Входы (N, n_in) и цели (N, n_outputs)
+    """
+    if path.suffix.lower() == '.npy':
+        data = np.load(path)
+    else:
+        text = path.read_text(encoding='utf-8')
+        delimiter = ';' if ';' in text else ','
+        if delimiter == ';':
+            text = text.replace(',', '.')
+        data = np.loadtxt(text.splitlines(), delimiter=delimiter, ndmin=2)
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim != 2 or data.shape[1] <= n_outputs:
+        raise ValueError(f"Ожидается таблица образов с более чем {n_outputs} столбцами")
+    return data[:, :-n_outputs], data[:, -n_outputs:]
+
+
+def _plan(pipeline, input_file: Path, args) -> ExecutionPlan:
+    """План выполнения по входному файлу и параметрам командной строки: выводится и задает режим разбора"""
+    plan = plan_execution(input_file, args.parsing, getattr(args, 'processes', None),
+                          getattr(args, 'tables', None))
+    print('\n'.join(plan.describe()))
+    pipeline.set_param('parsing', plan.parsing)
+    return plan
+
+
+def load_network(path: Path) -> NetworkArrays:
+    """Веса сети из контрольной точки (.kpsnet), таблицы новых весов (.xlsx) или из лога"""
+    if path.suffix.lower() in (CHECKPOINT_SUFFIX, WORKBOOK_SUFFIX):
+        return load_resume_point(path).network
+    pipeline = create_processing_pipeline()
+    pipeline.set_param('input_file', file_signature(path))
+    return pipeline.get('network')
+
+
+def command_weights(args) -> int:
+    """Таблица весов (прямой проход) по логу"""
+    input_file = Path(args.input)
+    pipeline = create_processing_pipeline()
+    plan = _plan(pipeline, input_file, args)
+    pipeline.set_params(input_file=file_signature(input_file),
+                        selection=NeuronSelection.parse(args.neurons or ''),
+                        alpha=args.alpha, target=args.target)
+    output_file = _output_path(input_file, 'weights', args.output)
+    files = ExcelCreator(pipeline.get('weights'), pipeline.get('weighted_sums'),
+                         pipeline.get('input_signals'), args.alpha, args.value_mode,
+                         args.row_budget, args.split,
+                         pipeline.get('table_selection'), plan.merge_cells).create_table(str(output_file))
+    print(f"Таблица весов создана: {', '.join(files)}")
+    return 0
+
+
+def command_correct(args) -> int:
+    """Таблица новых весов по образу из лога"""
+    from excel_generator.weight_correction_table_creator import \
+        WeightCorrectionTableCreator
+
+    input_file = Path(args.input)
+    pipeline = create_processing_pipeline(print if args.verbose else None)
+    _plan(pipeline, input_file, args)
+    # Выбор задается до подстановки весов: от него зависит разбор лога
+    pipeline.set_params(input_file=file_signature(input_file),
+                        selection=NeuronSelection.parse(args.neurons or ''),
+                        precision=args.precision, prune=args.prune)
+    if args.checkpoint:
+        resume_pipeline(pipeline, load_resume_point(args.checkpoint))
+    pipeline.set_params(
+        alpha=args.alpha,
+        target=args.target,
+        learning_rate=args.rate if args.rate is not None else args.alpha,
+        optimizer=args.optimizer,
+    )
+    new_weights, new_biases = pipeline.get('corrected')
+    report = pipeline.get('precision_report')
+    if report is not None:
+        print('\n'.join(report.describe()))
+    if args.save_checkpoint:
+        save_checkpoint(args.save_checkpoint, checkpoint_from_pipeline(pipeline))
+        print(f'Контрольная точка сохранена: {args.save_checkpoint}')
+    output_file = _output_path(input_file, 'new_weights', args.output)
+    files = WeightCorrectionTableCreator(pipeline.get('weights'), new_weights, new_biases,
+                                         args.nonzero_only, args.row_budget, args.split,
+                                         pipeline.get('table_selection')).create_table(str(output_file))
+    print(f"Таблица новых весов создана: {', '.join(files)}")
+    if not args.no_registry:
+        with RunRegistry(args.registry) as registry:
+            run_id = registry.record_pipeline(pipeline)
+        print(f'Запуск записан в реестр {registry.path} (№ {run_id})')
+    return 0
+
+
+def command_train(args) -> int:
+    """Обучение сети мини-пакетами, начиная с весов из лога"""
+    from excel_generator.weight_correction_table_creator import \
+        WeightCorrectionTableCreator
+    from utils.parallel_training import train_parallel
+
+    input_file = Path(args.input)
+    pipeline = create_processing_pipeline()
+    plan = _plan(pipeline, input_file, args)
+    pipeline.set_params(input_file=file_signature(input_file), precision=args.precision,
+                        prune=args.prune)
+    if args.checkpoint:
+        checkpoint = load_resume_point(args.checkpoint)
+        resume_pipeline(pipeline, checkpoint)
+    # Как и при коррекции, результат не зависит от способа хранения слоев
+    network = pipeline.get('network')
+    network = network.to_sparse() if args.prune else network.to_dense()
+    inputs, targets = load_patterns(Path(args.patterns), network.topology[-1])
+    if inputs.shape[1] != network.topology[0]:
+        raise ValueError(f"Число входов в образах ({inputs.shape[1]}) не совпадает "
+                         f"с числом входов сети ({network.topology[0]})")
+
+    learning_rate = args.rate if args.rate is not None else args.alpha
+    trained, history = train_parallel(network, inputs, targets, args.alpha, args.optimizer,
+                                      learning_rate, batch_size=args.batch_size, epochs=args.epochs,
+                                      seed=args.seed, processes=plan.processes, log_func=print)
+    if network.dtype != np.float64 and not args.no_precision_report:
+        print('Эталонное обучение в float64 для отчета о точности...')
+        reference, reference_history = train_parallel(
+            network.astype(np.float64), inputs, targets, args.alpha, args.optimizer, learning_rate,
+            batch_size=args.batch_size, epochs=args.epochs, seed=args.seed, processes=plan.processes)
+        print('\n'.join(training_precision_report(reference, trained, reference_history,
+                                                   history, args.precision).describe()))
+    if args.save_checkpoint:
+        cycles = pipeline.get('parsed_weights')[0]
+        save_checkpoint(args.save_checkpoint,
+                        Checkpoint(trained, args.alpha, learning_rate,
+                                   (cycles or 0) + args.epochs))
+        print(f'Контрольная точка сохранена: {args.save_checkpoint}')
+    new_weights, new_biases = trained.to_dicts()
+    output_file = _output_path(input_file, 'trained_weights', args.output)
+    files = WeightCorrectionTableCreator(pipeline.get('weights'), new_weights, new_biases,
+                                         args.nonzero_only, args.row_budget,
+                                         args.split).create_table(str(output_file))
+    print(f'Итоговая ошибка: {history[-1]:.8f}')
+    print(f"Таблица обученных весов создана: {', '.join(files)}")
+    return 0
+
+
+def command_infer(args) -> int:
+    """Выходы сети для файла входных образов"""
+    from utils.inference import run_inference
+
+    weights_file = Path(args.weights)
+    alpha = args.alpha
+    if weights_file.suffix.lower() in (CHECKPOINT_SUFFIX, WORKBOOK_SUFFIX):
+        checkpoint = load_resume_point(weights_file)
+        network = checkpoint.network
+        alpha = alpha if alpha is not None else checkpoint.alpha
+    else:
+        network = load_network(weights_file)
+    if args.precision:
+        network = network.astype(precision_dtype(args.precision))
+    if alpha is None:
+        raise ValueError('Коэффициент крутизны --alpha не сохранен вместе с весами и должен быть задан')
+    patterns = Path(args.patterns)
+    output_file = Path(args.output) if args.output else \
+        patterns.parent / f'{patterns.stem}_outputs{patterns.suffix.lower()}'
+    log_func = print if args.verbose else None
+    count = run_inference(network, alpha, patterns, output_file, args.batch_size, log_func)
+    print(f'Выходы сети для {count} образов записаны: {output_file}')
+    return 0
+
+
+def command_checkpoint(args) -> int:
+    """Контрольная точка с весами из лога"""
+    pipeline = create_processing_pipeline()
+    _plan(pipeline, Path(args.input), args)
+    pipeline.set_params(input_file=file_signature(Path(args.input)),
+                        alpha=args.alpha, learning_rate=args.rate, precision=args.precision)
+    save_checkpoint(args.output, checkpoint_from_pipeline(pipeline, 'weights'))
+    print(f'Контрольная точка сохранена: {args.output}')
+    return 0
+
+
+def command_convert(args) -> int:
+    """Структурированный дамп (.npz, .jsonl) из текстового лога"""
+    input_file = Path(args.input)
+    output_file = Path(args.output) if args.output else input_file.parent / f'{log_stem(input_file)}.npz'
+    if output_file.suffix.lower() not in STRUCTURED_SUFFIXES:
+        raise ValueError(f"Дамп сохраняется в файл {' или '.join(STRUCTURED_SUFFIXES)}")
+    pipeline = create_processing_pipeline()
+    _plan(pipeline, input_file, args)
+    pipeline.set_param('input_file', file_signature(input_file))
+    cycles, weights = pipeline.get('parsed_weights')
+    if not weights:
+        raise ValueError('В логе не найдены веса нейронов')
+    save_structured(output_file, cycles, weights, pipeline.get('weighted_sums'),
+                    pipeline.get('input_signals'))
+    print(f'Дамп сохранен: {output_file} (нейронов с весами {len(weights)})')
+    return 0
+
+
+def command_diff(args) -> int:
+    """Отчет об изменении весов между двумя наборами или до и после коррекции"""
+    from excel_generator.diff_table_creator import DiffTableCreator
+
+    before_file = Path(args.before)
+    if args.after:
+        summary, top = diff_networks(load_network(before_file), load_network(Path(args.after)),
+                                     args.top, args.by)
+    else:
+        if args.alpha is None or before_file.suffix.lower() in (CHECKPOINT_SUFFIX, WORKBOOK_SUFFIX):
+            raise ValueError("Без второго набора весов нужен лог и коэффициент крутизны --alpha")
+        pipeline = create_processing_pipeline()
+        pipeline.set_params(
+            input_file=file_signature(before_file),
+            alpha=args.alpha,
+            target=args.target,
+            learning_rate=args.rate if args.rate is not None else args.alpha,
+            optimizer=args.optimizer,
+        )
+        summary, top = diff_networks(pipeline.get('network'), pipeline.get('corrected_network'),
+                                     args.top, args.by)
+    output_file = _output_path(before_file, 'weight_diff', args.output)
+    DiffTableCreator(summary, top).create_table(str(output_file))
+    total = summary.iloc[-1]
+    print(f"||ΔW|| = {total['||ΔW||']:.8f}, max |Δw| = {total['max |Δw|']:.8f}, "
+          f"изменено синапсов: {total['Изменено']} из {total['Синапсов']}")
+    print(f'Отчет об изменении весов создан: {output_file}')
+    return 0
+
+
+def command_registry_ingest(args) -> int:
+    """Обработка логов и запись результатов в реестр без создания таблиц"""
+    failed = 0
+    with RunRegistry(args.registry) as registry:
+        for name in args.inputs:
+            pipeline = create_processing_pipeline()
+            try:
+                pipeline.set_params(
+                    input_file=file_signature(Path(name)),
+                    alpha=args.alpha,
+                    target=args.target,
+                    learning_rate=args.rate if args.rate is not None else args.alpha,
+                    optimizer=args.optimizer,
+                )
+                if not pipeline.get('weights'):
+                    raise ValueError('в логе не найдены веса нейронов')
+                run_id = registry.record_pipeline(pipeline)
+                print(f'{name}: запуск № {run_id}')
+            except (OSError, ValueError) as e:
+                failed += 1
+                print(f'{name}: ошибка: {e}', file=sys.stderr)
+    print(f'Записано запусков: {len(args.inputs) - failed} из {len(args.inputs)}')
+    return 1 if failed else 0
+
+
+def command_registry_query(args) -> int:
+    """Запросы к реестру запусков"""
+    with RunRegistry(args.registry) as registry:
+        if args.registry_command == 'runs':
+            result = registry.runs(args.min_error, args.since, args.name)
+        elif args.registry_command == 'neuron':
+            result = registry.neuron_history(args.layer, args.neuron, args.since)
+        else:
+            result = registry.weight_history(args.layer, args.neuron, args.synapse, args.since)
+    if args.csv:
+        result.to_csv(args.csv, index=False)
+        print(f'Записано строк: {len(result)} в {args.csv}')
+    elif result.empty:
+        print('Нет записей')
+    else:
+        print(result.to_string(index=False))
+    return 0
+
+
+def command_serve(args) -> int:
+    """Локальный HTTP-сервис обработки логов"""
+    from service import serve
+
+    serve(args.host, args.port, args.workers, args.queue, args.verbose)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Параметры командной строки"""
+    parser = argparse.ArgumentParser(description='Обработка данных нейронной сети без графического интерфейса')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_sharding(sub):
+        sub.add_argument('--row-budget', type=int,
+                         help=f'Максимум строк на листе (по умолчанию {EXCEL_MAX_ROWS - 1})')
+        sub.add_argument('--split', choices=SPLIT_MODES, default='sheets',
+                         help='Разделение больших таблиц на листы или книги')
+
+    def add_selection(sub):
+        sub.add_argument('--neurons', help='Только выбранные нейроны, например '
+                                           '"1:500-520,600; 2; top=20" (слой:номера, слой '
+                                           'целиком, top=k - k нейронов с наибольшим |γ|)')
+
+    def add_registry(sub):
+        sub.add_argument('--registry', help='Файл реестра запусков SQLite (по умолчанию '
+                                            '$KPS_REGISTRY или ~/.kps/runs.sqlite)')
+
+    def add_planning(sub, tables: bool = False):
+        sub.add_argument('--parsing', choices=PARSING_MODES,
+                         help='Разбор лога в памяти или потоковый (по умолчанию - по размеру '
+                              'файла и свободной памяти, $KPS_PARSING)')
+        if tables:
+            sub.add_argument('--tables', choices=TABLE_MODES,
+                             help=f'Объединять ли ячейки блоков в таблице (по умолчанию - '
+                                  f'для таблиц до {MERGE_ROWS} строк, $KPS_TABLES)')
+
+    def add_precision(sub, default: Optional[str] = DEFAULT_PRECISION):
+        sub.add_argument('--precision', choices=list(PRECISIONS), default=default,
+                         help='Точность весов и расчета (float32 - вдвое меньше памяти; '
+                              f'по умолчанию {default or "тип сохраненных весов"})')
+
+    def add_common(sub):
+        add_sharding(sub)
+        add_planning(sub)
+        add_precision(sub)
+        sub.add_argument('input', help='Файл трассировки симулятора')
+        sub.add_argument('--alpha', type=float, required=True, help='Коэффициент крутизны α')
+        sub.add_argument('--rate', type=float, help='Скорость обучения η (по умолчанию равна α)')
+        sub.add_argument('--optimizer', choices=sorted(OPTIMIZERS), default='sgd',
+                         help='Правило коррекции весов')
+        sub.add_argument('--nonzero-only', action='store_true',
+                         help='Не выводить удаленные при прореживании синапсы')
+        sub.add_argument('--prune', action='store_true',
+                         help='Прореженная сеть: нулевые синапсы считаются удаленными и не '
+                              'корректируются (слои с долей нулей от 50%% хранятся разреженно)')
+        sub.add_argument('-o', '--output', help='Выходной файл .xlsx')
+        sub.add_argument('--checkpoint', help='Начальные веса из контрольной точки или таблицы '
+                                              'новых весов (.xlsx) вместо лога')
+        sub.add_argument('--save-checkpoint', help='Сохранить полученные веса в контрольную точку')
+
+    weights = subparsers.add_parser('weights', help='Таблица весов по логу')
+    weights.add_argument('input', help='Файл трассировки симулятора')
+    weights.add_argument('--alpha', type=float, required=True, help='Коэффициент крутизны α')
+    weights.add_argument('--value-mode', choices=VALUE_MODES, default='cached',
+                         help='Формулы, формулы с вычисленными значениями или только значения')
+    weights.add_argument('-o', '--output', help='Выходной файл .xlsx')
+    weights.add_argument('--target', type=float, default=0.69266,
+                         help='Целевое значение t (для выбора нейронов top=k)')
+    add_sharding(weights)
+    add_planning(weights, tables=True)
+    add_selection(weights)
+    weights.set_defaults(func=command_weights)
+
+    correct = subparsers.add_parser('correct', help='Таблица новых весов по образу из лога')
+    add_common(correct)
+    correct.add_argument('--target', type=float, default=0.69266, help='Целевое значение t')
+    correct.add_argument('-v', '--verbose', action='store_true', help='Трассировка расчетов')
+    add_selection(correct)
+    add_registry(correct)
+    correct.add_argument('--no-registry', action='store_true', help='Не записывать запуск в реестр')
+    correct.set_defaults(func=command_correct)
+
+    train_parser = subparsers.add_parser('train', help='Обучение сети мини-пакетами')
+    add_common(train_parser)
+    train_parser.add_argument('patterns', help='Образы .npy/.csv: входы, затем целевые значения')
+    train_parser.add_argument('--epochs', type=int, default=100, help='Число эпох')
+    train_parser.add_argument('--batch-size', type=int, default=32, help='Размер мини-пакета')
+    train_parser.add_argument('--seed', type=int, default=0, help='Зерно перемешивания образов')
+    train_parser.add_argument('--processes', type=int,
+                              help='Число процессов, между которыми делится каждый мини-пакет '
+                                   '(по умолчанию - по размеру пакета, ядрам и памяти, '
+                                   '$KPS_PROCESSES)')
+    train_parser.add_argument('--no-precision-report', action='store_true',
+                              help='Без эталонного обучения в float64 при --precision float32')
+    train_parser.set_defaults(func=command_train)
+
+    infer = subparsers.add_parser('infer', help='Выходы сети для файла входных образов')
+    infer.add_argument('weights', help='Веса: лог, дамп, контрольная точка или таблица новых весов')
+    infer.add_argument('patterns', help='Входные образы .npy/.csv (лишние столбцы пропускаются)')
+    infer.add_argument('-o', '--output', help='Выходной файл .npy или .csv')
+    infer.add_argument('--alpha', type=float, help='Коэффициент крутизны α (по умолчанию - из контрольной точки)')
+    infer.add_argument('--batch-size', type=int,
+                       help='Число образов, обрабатываемых за один шаг (по умолчанию - по ширине '
+                            'слоев, около 64 МБ буферов)')
+    infer.add_argument('-v', '--verbose', action='store_true', help='Сообщать о ходе расчета')
+    add_precision(infer, None)
+    infer.set_defaults(func=command_infer)
+
+    checkpoint = subparsers.add_parser('checkpoint', help='Контрольная точка с весами из лога')
+    checkpoint.add_argument('input', help='Файл трассировки симулятора')
+    checkpoint.add_argument('-o', '--output', required=True, help='Файл контрольной точки')
+    checkpoint.add_argument('--alpha', type=float, help='Коэффициент крутизны α')
+    checkpoint.add_argument('--rate', type=float, help='Скорость обучения η')
+    add_planning(checkpoint)
+    add_precision(checkpoint)
+    checkpoint.set_defaults(func=command_checkpoint)
+
+    convert = subparsers.add_parser('convert', help='Структурированный дамп из лога')
+    convert.add_argument('input', help='Файл трассировки симулятора')
+    convert.add_argument('-o', '--output', help='Файл дампа .npz или .jsonl (по умолчанию - .npz рядом с логом)')
+    add_planning(convert)
+    convert.set_defaults(func=command_convert)
+
+    diff = subparsers.add_parser('diff', help='Отчет об изменении весов')
+    diff.add_argument('before', help='Веса до изменения: лог, контрольная точка или таблица новых весов')
+    diff.add_argument('after', nargs='?',
+                      help='Веса после изменения; если не задан, сравниваются веса лога до и после коррекции')
+    diff.add_argument('--alpha', type=float, help='Коэффициент крутизны α')
+    diff.add_argument('--rate', type=float, help='Скорость обучения η (по умолчанию равна α)')
+    diff.add_argument('--target', type=float, default=0.69266, help='Целевое значение t')
+    diff.add_argument('--optimizer', choices=sorted(OPTIMIZERS), default='sgd',
+                      help='Правило коррекции весов')
+    diff.add_argument('--top', type=int, default=DEFAULT_TOP_K,
+                      help='Число синапсов с наибольшим изменением')
+    diff.add_argument('--by', choices=('absolute', 'relative'), default='absolute',
+                      help='Отбор по абсолютному или относительному изменению')
+    diff.add_argument('-o', '--output', help='Выходной файл .xlsx')
+    diff.set_defaults(func=command_diff)
+
+    registry = subparsers.add_parser('registry', help='Реестр обработанных логов')
+    registry_commands = registry.add_subparsers(dest='registry_command', required=True)
+    ingest = registry_commands.add_parser('ingest', help='Обработать логи и записать результаты в реестр')
+    ingest.add_argument('inputs', nargs='+', help='Файлы трассировки симулятора')
+    ingest.add_argument('--alpha', type=float, required=True, help='Коэффициент крутизны α')
+    ingest.add_argument('--rate', type=float, help='Скорость обучения η (по умолчанию равна α)')
+    ingest.add_argument('--target', type=float, default=0.69266, help='Целевое значение t')
+    ingest.add_argument('--optimizer', choices=sorted(OPTIMIZERS), default='sgd',
+                        help='Правило коррекции весов')
+    add_registry(ingest)
+    ingest.set_defaults(func=command_registry_ingest)
+    runs = registry_commands.add_parser('runs', help='Список запусков')
+    runs.add_argument('--min-error', type=float, help='Только запуски с |γ| выхода не меньше заданного')
+    runs.add_argument('--name', help='Шаблон имени лога (SQL LIKE, например "run_%%")')
+    neuron = registry_commands.add_parser('neuron', help="S, F'(S) и γ нейрона по запускам")
+    weights_history = registry_commands.add_parser('weights', help='Веса нейрона по запускам')
+    weights_history.add_argument('--synapse', type=int, help='Номер синапса (с 1)')
+    for sub in (neuron, weights_history):
+        sub.add_argument('layer', type=int, help='Номер слоя')
+        sub.add_argument('neuron', type=int, help='Номер нейрона')
+    for sub in (runs, neuron, weights_history):
+        sub.add_argument('--since', help='Только запуски, обработанные не раньше даты (ГГГГ-ММ-ДД)')
+        sub.add_argument('--csv', help='Сохранить результат в .csv вместо вывода')
+        add_registry(sub)
+        sub.set_defaults(func=command_registry_query)
+
+    serve = subparsers.add_parser('serve', help='HTTP-сервис обработки логов')
+    serve.add_argument('--host', default='127.0.0.1', help='Адрес для приема соединений')
+    serve.add_argument('--port', type=int, default=8765, help='Порт')
+    serve.add_argument('--workers', type=int, help='Число процессов обработки (по умолчанию - число ядер)')
+    serve.add_argument('--queue', type=int, default=16, help='Число запросов, ожидающих обработки')
+    serve.add_argument('-v', '--verbose', action='store_true', help='Журнал запросов')
+    serve.set_defaults(func=command_serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f'Ошибка: {e}', file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
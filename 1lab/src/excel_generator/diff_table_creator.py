@@ -0,0 +1,40 @@
+import pandas as pd
+
+from excel_generator.xlsx_template import SheetTemplate, write_workbook
+
+
+class DiffTableCreator:
+    def __init__(self, summary: pd.DataFrame, top_changes: pd.DataFrame):
+        """
+        Инициализация генератора отчета об изменении весов.
+
+        Args:
+            summary: Сводка по слоям (см. utils.weight_diff.diff_networks)
+            top_changes: Синапсы с наибольшим изменением
+        """
+        self.summary = summary
+        self.top_changes = top_changes
+
+    def create_table(self, output_file: str) -> None:
+        """
+        Создает Excel файл с листами 'Сводка' (нормы и изменения по слоям)
+        и 'Наибольшие изменения' (отобранные синапсы).
+
+        Args:
+            output_file: Путь к выходному файлу
+        """
+        write_workbook(output_file, [
+            (sheet_name, self._template(df), df.itertuples(index=False, name=None))
+            for sheet_name, df in (('Сводка', self.summary),
+                                   ('Наибольшие изменения', self.top_changes))
+        ])
+
+    def _template(self, df: pd.DataFrame) -> SheetTemplate:
+        """
+        Шаблон листа: дробные столбцы - с восемью знаками после запятой,
+        остальные - в общем формате; автофильтр на заголовках.
+        """
+        formats = ['0.00000000' if pd.api.types.is_float_dtype(df[column]) else None
+                   for column in df.columns]
+        return SheetTemplate([str(column) for column in df.columns], widths=15,
+                             number_formats=formats, autofilter=len(df) > 0)
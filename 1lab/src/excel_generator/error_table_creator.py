@@ -1,18 +1,25 @@
-from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
-import pandas as pd
+from excel_generator.xlsx_template import SheetTemplate, write_workbook
+from utils.selection import NeuronSelection
+
+TEMPLATE = SheetTemplate(['№ слоя', '№ нейрона', 'Si', "F'(Si)", 'Ошибка'],
+                         widths=15, number_formats='0.000000')
 
 
 class ErrorTableCreator:
-    def __init__(self, errors: Dict[Tuple[int, int], Tuple[float, float, float]]):
+    def __init__(self, errors: Dict[Tuple[int, int], Tuple[float, float, float]],
+                 selection: Optional[NeuronSelection] = None):
         """
         Инициализация генератора таблицы ошибок.
         
         Args:
             errors: Словарь с результатами для каждого нейрона (Si, F'(Si), ошибка)
+            selection: Выводимые нейроны; по умолчанию - все рассчитанные
+                       нейроны скрытого слоя и выходной нейрон
         """
         self.errors = errors
+        self.selection = selection
     
     def create_table(self, output_file: str) -> None:
         """
@@ -23,11 +30,14 @@ class ErrorTableCreator:
         """
         data = []
         
-        # Добавляем данные скрытого слоя
-        for i in range(1, 11):
+        # Добавляем данные скрытого слоя: рассчитанные нейроны (при выборе -
+        # только выбранные)
+        hidden = sorted(n for l, n in self.errors
+                        if l == 1 and (self.selection is None or self.selection.contains((l, n))))
+        for i in hidden:
             si, derivative, error = self.errors.get((1, i), (0.0, 0.0, 0.0))
             data.append({
-                '№ слоя': '1' if i == 1 else '',
+                '№ слоя': '1' if i == hidden[0] else '',
                 '№ нейрона': i,
                 'Si': si,
                 "F'(Si)": derivative,
@@ -35,54 +45,14 @@ class ErrorTableCreator:
             })
         
         # Добавляем данные выходного слоя
-        si, derivative, error = self.errors.get((2, 1), (0.0, 0.0, 0.0))
-        data.append({
-            '№ слоя': 'Выход',
-            '№ нейрона': 1,
-            'Si': si,
-            "F'(Si)": derivative,
-            'Ошибка': error
-        })
-        
-        # Создаем DataFrame
-        df = pd.DataFrame(data)
-        
-        # Создаем Excel writer
-        with pd.ExcelWriter(output_file, engine='xlsxwriter') as writer:
-            df.to_excel(writer, sheet_name='Ошибки', index=False)
-            
-            # Получаем объект workbook и worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Ошибки']
-            
-            # Форматирование
-            self._apply_formatting(workbook, worksheet, df)
-    
-    def _apply_formatting(self, workbook, worksheet, df):
-        """
-        Применяет форматирование к Excel файлу.
-        """
-        header_format = workbook.add_format({
-            'bold': True,
-            'text_wrap': True,
-            'valign': 'vcenter',
-            'align': 'center',
-            'border': 1
-        })
-        
-        cell_format = workbook.add_format({
-            'align': 'center',
-            'border': 1,
-            'num_format': '0.000000'
-        })
-        
-        # Применяем форматирование к заголовкам
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-            worksheet.set_column(col_num, col_num, 15)
+        if self.selection is None or ((2, 1) in self.errors and self.selection.contains((2, 1))):
+            si, derivative, error = self.errors.get((2, 1), (0.0, 0.0, 0.0))
+            data.append({
+                '№ слоя': 'Выход',
+                '№ нейрона': 1,
+                'Si': si,
+                "F'(Si)": derivative,
+                'Ошибка': error
+            })
         
-        # Применяем форматирование к ячейкам
-        for row in range(len(df)):
-            for col in range(len(df.columns)):
-                cell_value = df.iloc[row, col]
-                worksheet.write(row + 1, col, cell_value, cell_format) 
\ No newline at end of file
+        write_workbook(output_file, [('Ошибки', TEMPLATE, [[row[column] for column in TEMPLATE.columns] for row in data])])
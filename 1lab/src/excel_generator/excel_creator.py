@@ -1,13 +1,47 @@
-from typing import Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-import pandas as pd
+import numpy as np
+
+from excel_generator.sharded_writer import ShardedTableWriter
+from excel_generator.xlsx_template import Formula, SheetTemplate
+from utils.selection import NeuronSelection
+from utils.vectorized import bipolar_sigmoid
+
+# Режимы записи расчетных столбцов:
+#   formulas - только формулы (Excel пересчитывает книгу при открытии)
+#   cached   - формулы вместе с вычисленными значениями
+#   values   - только вычисленные значения
+VALUE_MODES = ('formulas', 'cached', 'values')
+
+COLUMNS = [
+    '№ Слоя',
+    '№ Нейрона',
+    '№ Выхода',
+    'Входной сигнал xi',
+    'Весовой коэффициент wij',
+    'Смещение wi0',
+    'Вес смещения',
+    'wij * xi',
+    'Взвешенная сумма Si',
+    'Выход нейрона yi = F(Si)',
+]
+# Столбцы, объединяемые по строкам нейрона: № слоя, № нейрона, смещение,
+# вес смещения, взвешенная сумма и выход нейрона
+MERGED_COLUMNS = (0, 1, 5, 6, 8, 9)
+# Оформление листов таблицы весов
+TEMPLATE = SheetTemplate(COLUMNS, widths=15, number_formats='0.000000', merge_columns=MERGED_COLUMNS)
 
 
 class ExcelCreator:
     def __init__(self, weights: Dict[Tuple[int, int], List[float]], 
                  weighted_sums: Dict[Tuple[int, int], float],
                  input_signals: List[float],
-                 alpha: float):
+                 alpha: float,
+                 value_mode: str = 'formulas',
+                 row_budget: Optional[int] = None,
+                 split: Optional[str] = 'sheets',
+                 selection: Optional[NeuronSelection] = None,
+                 merge_cells: Optional[bool] = None):
         """
         Инициализация генератора Excel файла.
         
@@ -16,159 +50,140 @@ class ExcelCreator:
             weighted_sums: Словарь взвешенных сумм
             input_signals: Список входных сигналов
             alpha: Коэффициент крутизны α
+            value_mode: Режим записи расчетных столбцов (см. VALUE_MODES)
+            row_budget: Максимум строк данных на листе (по умолчанию - предел Excel)
+            split: Разделение таблицы, превышающей бюджет: 'sheets', 'workbooks'
+                   или None (см. ShardedTableWriter)
+            selection: Выводимые нейроны (по умолчанию - все)
+            merge_cells: Объединять ли ячейки нейрона (None - по размеру таблицы,
+                         см. ShardedTableWriter)
         """
+        if value_mode not in VALUE_MODES:
+            raise ValueError(f"Неизвестный режим записи {value_mode}, допустимы: {', '.join(VALUE_MODES)}")
         self.weights = weights
         self.weighted_sums = weighted_sums
         self.input_signals = input_signals
         self.alpha = alpha
+        self.value_mode = value_mode
+        self.row_budget = row_budget
+        self.split = split
+        self.selection = selection
+        self.merge_cells = merge_cells
         
-    def create_table(self, output_file: str) -> None:
+    def create_table(self, output_file: str) -> List[str]:
         """
         Создает Excel таблицу с данными нейронной сети.
         
+        Строки входного слоя, затем по блоку строк на каждый нейрон (по строке
+        на синапс). Таблица пишется блоками, не собираясь целиком в памяти;
+        если она не помещается на лист, блоки нейронов распределяются по
+        листам или книгам.
+        
         Args:
             output_file: Путь к выходному файлу
+            
+        Returns:
+            List[str]: Пути созданных книг
         """
-        data = []
+        layers = sorted({layer for layer, _ in self.weights})
+        layer_sizes = {layer: max(neuron for l, neuron in self.weights if l == layer) for layer in layers}
+        layer_inputs = {layer: self._layer_width(layer) for layer in layers}
+        layer_neurons = {layer: (self.selection.neurons(layer, layer_sizes[layer]) if self.selection is not None
+                                 else range(1, layer_sizes[layer] + 1))
+                         for layer in layers}
+        total_rows = len(self.input_signals) + sum(len(layer_neurons[layer]) * layer_inputs[layer]
+                                                   for layer in layers)
+        
+        writer = ShardedTableWriter(output_file, TEMPLATE, 'Sheet1', total_rows, self.row_budget,
+                                    max(layer_inputs.values(), default=1), self.split, self.merge_cells,
+                                    full_calc=self.value_mode == 'formulas')
         
         # Добавляем входной слой
         for i, signal in enumerate(self.input_signals, 1):
-            data.append({
-                '№ Слоя': 'Вход' if i == 1 else '',
-                '№ Нейрона': i,
-                '№ Выхода': 1,
-                'Входной сигнал xi': signal,
-                'Весовой коэффициент wij': '-',
-                'Смещение wi0': '-',
-                'Вес смещения': '-',
-                'wij * xi': '-',
-                'Взвешенная сумма Si': '-',
-                'Выход нейрона yi = F(Si)': signal
-            })
+            writer.write_block(f'Вход {i}', [[
+                'Вход' if i == 1 else '', i, 1, signal, '-', '-', '-', '-', '-', signal
+            ]])
         
-        # Добавляем скрытый слой
-        for neuron in range(1, 11):
-            neuron_weights = self.weights.get((1, neuron), [])
-            weighted_sum = self.weighted_sums.get((1, neuron), '')
-            
-            # Три строки для каждого нейрона
-            for i in range(3):
-                data.append({
-                    '№ Слоя': '1' if i == 0 else '',
-                    '№ Нейрона': neuron if i == 0 else '',
-                    '№ Выхода': i + 1,
-                    'Входной сигнал xi': self.input_signals[i],
-                    'Весовой коэффициент wij': neuron_weights[i] if i < len(neuron_weights) else None,
-                    'Смещение wi0': self.alpha,
-                    'Вес смещения': 1,
-                    'wij * xi': f'=D{len(data) + 2}*E{len(data) + 2}',
-                    'Взвешенная сумма Si': weighted_sum,
-                    'Выход нейрона yi = F(Si)': f'=2/(1+EXP(-{self.alpha}*I{len(data) + 2}))-1'
-                })
-        
-        # Добавляем выходной слой
-        output_weights = self.weights.get((2, 1), [])
-        weighted_sum = self.weighted_sums.get((2, 1), '')
-        
-        # Десять строк для выходного нейрона
-        for i in range(10):
-            data.append({
-                '№ Слоя': 'Выход' if i == 0 else '',
-                '№ Нейрона': 1 if i == 0 else '',
-                '№ Выхода': i + 1,
-                'Входной сигнал xi': self.input_signals[0],
-                'Весовой коэффициент wij': output_weights[i] if i < len(output_weights) else None,
-                'Смещение wi0': self.alpha,
-                'Вес смещения': 1,
-                'wij * xi': f'=D{len(data) + 2}*E{len(data) + 2}',
-                'Взвешенная сумма Si': weighted_sum,
-                'Выход нейрона yi = F(Si)': f'=2/(1+EXP(-{self.alpha}*I{len(data) + 2}))-1'
-            })
+        # Добавляем нейроны слоев; последний слой - выходной. Выходы F(S)
+        # считаются векторно по слою, произведения wij * xi - по блоку нейрона
+        for layer in layers:
+            width = layer_inputs[layer]
+            signals = self._layer_signals(layer)[:width]
+            signals += [''] * (width - len(signals))
+            # Пустые ячейки сигналов в Excel равны 0
+            signal_values = np.array([s if isinstance(s, (int, float)) else 0.0 for s in signals],
+                                     dtype=np.float64)
+            neurons = list(layer_neurons[layer])
+            sums = [self.weighted_sums.get((layer, neuron), '') for neuron in neurons]
+            outputs = self._outputs(sums)
+            label = 'Выход' if layer == layers[-1] and len(layers) > 1 else str(layer)
+            for neuron, weighted_sum, output in zip(neurons, sums, outputs):
+                rows = list(self._neuron_rows(layer, neuron, label, signals, signal_values,
+                                              weighted_sum, output))
+                writer.write_block(f'Нейрон [{layer}][{neuron}]', rows)
         
-        # Создаем DataFrame
-        df = pd.DataFrame(data)
-        
-        # Создаем Excel writer
-        with pd.ExcelWriter(output_file, engine='xlsxwriter') as writer:
-            df.to_excel(writer, sheet_name='Sheet1', index=False)
-            
-            # Получаем объект workbook и worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Sheet1']
-            
-            # Форматирование
-            self._apply_formatting(workbook, worksheet, df)
+        return writer.close()
     
-    def _apply_formatting(self, workbook, worksheet, df):
+    def _layer_width(self, layer: int) -> int:
+        """Число входов нейронов слоя (строк на нейрон)"""
+        return max(len(weights) for (l, _), weights in self.weights.items() if l == layer)
+    
+    def _layer_signals(self, layer: int) -> List[Any]:
         """
-        Применяет форматирование к Excel файлу.
+        Входные сигналы нейронов слоя: входы сети для слоя 1, выходы
+        нейронов предыдущего слоя F(S) для остальных (как в build_neuron_inputs).
         """
-        header_format = workbook.add_format({
-            'bold': True,
-            'text_wrap': True,
-            'valign': 'vcenter',
-            'align': 'center',
-            'border': 1
-        })
-        
-        cell_format = workbook.add_format({
-            'align': 'center',
-            'border': 1,
-            'num_format': '0.000000'
-        })
-        
-        merge_format = workbook.add_format({
-            'align': 'center',
-            'valign': 'vcenter',
-            'border': 1,
-            'num_format': '0.000000'
-        })
-        
-        # Применяем форматирование к заголовкам
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-            worksheet.set_column(col_num, col_num, 15)
+        if layer == 1:
+            return list(self.input_signals)
+        return self._outputs([self.weighted_sums.get((layer - 1, i), '')
+                              for i in range(1, self._layer_width(layer) + 1)])
+    
+    def _outputs(self, weighted_sums: List[Any]) -> List[Any]:
+        """
+        yi = 2/(1+exp(-α*Si)) - 1 для списка сумм одним векторным расчетом;
+        пустое значение, если сумма не задана или не конечна.
+        """
+        sums = np.array([s if isinstance(s, (int, float)) else np.nan for s in weighted_sums],
+                        dtype=np.float64)
+        # exp переполняется при больших аргументах, предел функции равен -1
+        with np.errstate(over='ignore'):
+            outputs = bipolar_sigmoid(sums, self.alpha)
+        return [value if finite else '' for value, finite in zip(outputs.tolist(), np.isfinite(sums).tolist())]
+    
+    def _neuron_rows(self, layer: int, neuron: int, label: str, signals: List[Any],
+                     signal_values: np.ndarray, weighted_sum: Any,
+                     output_value: Any) -> Iterator[List[Any]]:
+        """
+        Строки одного нейрона. Значения формул вычисляются так же, как в Excel:
+          wij * xi = D * E (пустые ячейки равны 0) - векторно по строкам блока,
+          yi = 2/(1+exp(-α*Si)) - 1 - передается готовым (см. _outputs).
+        """
+        width = len(signals)
+        neuron_weights = self.weights.get((layer, neuron), [])[:width]
+        weight_values = np.zeros(width)
+        weight_values[:len(neuron_weights)] = neuron_weights
+        products = (signal_values * weight_values).tolist()
         
-        # Применяем форматирование к ячейкам и объединяем
-        current_row = 1
-        while current_row < len(df) + 1:
-            # Определяем количество строк для объединения
-            if current_row <= 3:  # Входной слой
-                merge_rows = 1
-            elif current_row >= len(df) - 9:  # Выходной слой
-                merge_rows = 10
-            else:  # Скрытый слой
-                merge_rows = 3
-            
-            # Объединяем ячейки
-            if merge_rows > 1:
-                # Объединяем № Слоя
-                if df.iloc[current_row-1]['№ Слоя']:
-                    worksheet.merge_range(current_row, 0, current_row + merge_rows - 1, 0, 
-                                       df.iloc[current_row-1]['№ Слоя'], merge_format)
-                # Объединяем № Нейрона
-                if df.iloc[current_row-1]['№ Нейрона']:
-                    worksheet.merge_range(current_row, 1, current_row + merge_rows - 1, 1, 
-                                       df.iloc[current_row-1]['№ Нейрона'], merge_format)
-                
-                # Объединяем остальные столбцы
-                worksheet.merge_range(current_row, 5, current_row + merge_rows - 1, 5, 
-                                   df.iloc[current_row-1]['Смещение wi0'], merge_format)
-                worksheet.merge_range(current_row, 6, current_row + merge_rows - 1, 6, 
-                                   df.iloc[current_row-1]['Вес смещения'], merge_format)
-                worksheet.merge_range(current_row, 8, current_row + merge_rows - 1, 8, 
-                                   df.iloc[current_row-1]['Взвешенная сумма Si'], merge_format)
-                worksheet.merge_range(current_row, 9, current_row + merge_rows - 1, 9, 
-                                   df.iloc[current_row-1]['Выход нейрона yi = F(Si)'], merge_format)
+        for i, (signal, product_value) in enumerate(zip(signals, products)):
+            weight = neuron_weights[i] if i < len(neuron_weights) else None
             
-            # Записываем остальные ячейки
-            for row in range(current_row, current_row + merge_rows):
-                for col in range(len(df.columns)):
-                    if (col not in [0, 1, 5, 6, 8, 9] or merge_rows == 1):
-                        cell_value = df.iloc[row-1, col]
-                        if isinstance(cell_value, str) and cell_value.startswith('='):
-                            worksheet.write_formula(row, col, cell_value, cell_format)
-                        else:
-                            worksheet.write(row, col, cell_value, cell_format)
+            if self.value_mode == 'values':
+                product, output = product_value, output_value
+            else:
+                cached = self.value_mode == 'cached'
+                product = Formula('=D{row}*E{row}', product_value if cached else None)
+                output = Formula(f'=2/(1+EXP(-{self.alpha}*I{{row}}))-1',
+                                 output_value if cached else None)
             
-            current_row += merge_rows 
\ No newline at end of file
+            yield [
+                label if i == 0 else '',
+                neuron if i == 0 else '',
+                i + 1,
+                signal,
+                weight,
+                self.alpha,
+                1,
+                product,
+                weighted_sum,
+                output,
+            ]
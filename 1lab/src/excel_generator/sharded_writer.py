@@ -0,0 +1,160 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from excel_generator.xlsx_template import SheetTemplate, XlsxBook, XlsxSheet
+
+# Максимальное число строк листа Excel (включая строку заголовков)
+EXCEL_MAX_ROWS = 1_048_576
+# Число строк таблицы, до которого столбцы блоков объединяются: объединения
+# листа записываются после всех его строк и хранятся в памяти до конца
+# листа, а Excel медленно открывает листы с сотнями тысяч объединений.
+# В больших таблицах значение пишется только в первую строку блока
+MERGE_ROWS = 100_000
+# Способы разделения таблицы, не помещающейся в бюджет строк листа
+SPLIT_MODES = ('sheets', 'workbooks')
+INDEX_SHEET = 'Оглавление'
+INDEX_TEMPLATE = SheetTemplate(['Книга', 'Лист', 'Строки с', 'Строки по', 'Первый блок', 'Последний блок'],
+                               widths=[25, 25, 12, 12, 25, 25], number_formats=None)
+
+
+class ShardedTableWriter:
+    """
+    Запись таблицы блоками строк с разделением на листы или книги.
+
+    Таблица пишется блоками (например, все строки одного нейрона); блок
+    никогда не разделяется между листами. Когда очередной блок не помещается
+    в бюджет строк листа, начинается новый лист (split='sheets') или новая
+    книга с номером в имени (split='workbooks'). Если таблица разделена,
+    в первую книгу добавляется лист INDEX_SHEET с диапазонами блоков
+    каждого листа.
+
+    Оформление листов задается шаблоном (SheetTemplate), строки пишутся
+    в XML листа напрямую (см. XlsxBook).
+    """
+
+    def __init__(self, output_file: str, template: SheetTemplate, sheet_name: str,
+                 total_rows: int, row_budget: Optional[int] = None,
+                 max_block_rows: int = 1,
+                 split: Optional[str] = 'sheets', merge_blocks: Optional[bool] = None,
+                 full_calc: bool = False):
+        """
+        Args:
+            output_file: Путь к выходному файлу (первой книге)
+            template: Шаблон листов таблицы (заголовки, ширина, форматы,
+                      объединяемые столбцы блоков)
+            sheet_name: Имя первого листа таблицы
+            total_rows: Число строк таблицы (без заголовков)
+            row_budget: Максимум строк данных на листе (не больше EXCEL_MAX_ROWS - 1)
+            max_block_rows: Число строк самого большого блока
+            split: 'sheets', 'workbooks' или None - ошибка, если таблица не
+                   помещается на один лист
+            merge_blocks: Объединять ли столбцы блоков (None - если в таблице
+                          не больше MERGE_ROWS строк)
+            full_calc: Пересчет книг при открытии (есть формулы без значений)
+        """
+        row_budget = row_budget or EXCEL_MAX_ROWS - 1
+        if not 0 < row_budget <= EXCEL_MAX_ROWS - 1:
+            raise ValueError(f"Бюджет строк листа должен быть от 1 до {EXCEL_MAX_ROWS - 1}")
+        if split is not None and split not in SPLIT_MODES:
+            raise ValueError(f"Неизвестный способ разделения {split}, допустимы: {', '.join(SPLIT_MODES)}")
+        if max_block_rows > row_budget:
+            raise ValueError(f"Блок из {max_block_rows} строк не помещается в бюджет листа "
+                             f"({row_budget} строк)")
+        if split is None and total_rows > row_budget:
+            # Проверка до записи: без разделения таблица не поместится на лист
+            raise ValueError(f"Таблица из {total_rows} строк не помещается на лист "
+                             f"({row_budget} строк); включите разделение на листы или книги")
+
+        self.output_file = Path(output_file)
+        self.template = template
+        self.sheet_name = sheet_name
+        self.row_budget = row_budget
+        self.split = split
+        self.merge_blocks = total_rows <= MERGE_ROWS if merge_blocks is None else merge_blocks
+        self.sharded = total_rows > row_budget
+        self.full_calc = full_calc
+
+        self.files: List[str] = []
+        self.index: List[Dict[str, Any]] = []
+        self._books: List[XlsxBook] = []
+        self._book: Optional[XlsxBook] = None
+        self._sheet: Optional[XlsxSheet] = None
+
+    def _open_book(self, path: Path) -> XlsxBook:
+        book = XlsxBook(path, self.full_calc)
+        self._books.append(book)
+        self.files.append(str(path))
+        return book
+
+    def _new_sheet(self) -> None:
+        """Начинает новый лист (и, при разделении на книги, новую книгу)"""
+        number = len(self.index) + 1
+        if self._book is None:
+            self._book = self._open_book(self.output_file)
+        elif self.split == 'workbooks':
+            self._sheet.close()
+            if self._book is not self._books[0]:
+                self._book.close()
+            self._book = self._open_book(
+                self.output_file.with_name(f'{self.output_file.stem}_{number}{self.output_file.suffix}'))
+        name = self.sheet_name if number == 1 or self.split == 'workbooks' else f'{self.sheet_name} ({number})'
+        self._sheet = self._book.add_sheet(name[:31], self.template)
+        self.index.append({'file': self.files[-1], 'sheet': name[:31],
+                           'first_row': 2, 'last_row': 1, 'first_block': '', 'last_block': ''})
+
+    def write_block(self, label: str, rows: List[Sequence[Any]]) -> None:
+        """
+        Записывает блок строк на один лист.
+
+        Столбцы template.merge_columns объединяются по всем строкам блока,
+        значение берется из первой строки. Без объединения (по умолчанию - в
+        таблицах больше MERGE_ROWS строк) значение пишется только в первую строку.
+
+        Args:
+            label: Подпись блока для оглавления (например, "Нейрон [1][5]")
+            rows: Строки блока, значения в порядке столбцов (Formula для формул)
+        """
+        if len(rows) > self.row_budget:
+            raise ValueError(f"Блок {label} из {len(rows)} строк не помещается в бюджет листа")
+        if self._sheet is None or self._sheet.row - 2 + len(rows) > self.row_budget:
+            self._new_sheet()
+
+        sheet = self._sheet
+        first = sheet.row
+        merge_columns = self.template.merge_columns if len(rows) > 1 else ()
+        merged = bool(merge_columns) and self.merge_blocks
+        for offset, values in enumerate(rows):
+            if offset and merge_columns:
+                values = list(values)
+                for col in merge_columns:
+                    values[col] = None
+            sheet.write_row(values, merged)
+        if merged:
+            for col in merge_columns:
+                sheet.merge(first, sheet.row - 1, col)
+
+        entry = self.index[-1]
+        if not entry['first_block']:
+            entry['first_block'] = label
+        entry['last_block'] = label
+        entry['last_row'] = sheet.row - 1
+
+    def close(self) -> List[str]:
+        """
+        Завершает запись: заполняет оглавление и закрывает книги.
+
+        Returns:
+            List[str]: Пути записанных книг
+        """
+        if self._sheet is None:
+            self._new_sheet()
+        self._sheet.close()
+        if self.sharded:
+            # Оглавление - первый лист первой книги
+            index = self._books[0].add_sheet(INDEX_SHEET, INDEX_TEMPLATE, first=True)
+            index.write_rows([Path(entry['file']).name, entry['sheet'], entry['first_row'],
+                              entry['last_row'], entry['first_block'], entry['last_block']]
+                             for entry in self.index)
+        for book in self._books:
+            book.close()
+        return self.files
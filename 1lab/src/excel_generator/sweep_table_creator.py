@@ -0,0 +1,27 @@
+import pandas as pd
+
+from excel_generator.xlsx_template import SheetTemplate, write_workbook
+
+
+class SweepTableCreator:
+    def __init__(self, summary: pd.DataFrame):
+        """
+        Инициализация генератора сводной таблицы перебора параметров.
+
+        Args:
+            summary: Сводка перебора (см. utils.sweep.sweep_to_dataframe)
+        """
+        self.summary = summary
+
+    def create_table(self, output_file: str) -> None:
+        """
+        Создает Excel таблицу со сводкой ошибок и приращений весов
+        для каждой комбинации α, η и t.
+
+        Args:
+            output_file: Путь к выходному файлу
+        """
+        template = SheetTemplate([str(column) for column in self.summary.columns], widths=15,
+                                 number_formats='0.000000', autofilter=True)
+        write_workbook(output_file, [('Перебор', template,
+                                      self.summary.itertuples(index=False, name=None))])
@@ -2,9 +2,13 @@ import logging
 import os
 import sys
 import traceback
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
-import pandas as pd
+import numpy as np
+
+from excel_generator.sharded_writer import ShardedTableWriter
+from excel_generator.xlsx_template import SheetTemplate
+from utils.selection import NeuronSelection
 
 # Создаем директорию для логов, если её нет
 log_dir = "logs"
@@ -24,13 +28,31 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+COLUMNS = [
+    '№ слоя',
+    '№ нейрона',
+    '№ выхода',
+    'Предыдущий весовой коэффициент wij(t)',
+    'Предыдущий вес смещения Tj(t)',
+    'Новый весовой коэффициент wij(t+1)',
+    'Новый вес смещения Tj(t+1)'
+]
+# Оформление листов: ширина столбцов рассчитана на числа формата
+# 0.00000000 со знаком, длинные заголовки переносятся на две строки
+TEMPLATE = SheetTemplate(COLUMNS, widths=[10, 11, 10, 22, 22, 22, 22], number_formats='0.00000000')
+
+
 class WeightCorrectionTableCreator:
     """Класс для создания таблицы с новыми весами"""
     
     def __init__(self, 
                  old_weights: Union[Dict[Tuple[int, int], List[float]], List[List[float]]],
                  new_weights: Union[Dict[Tuple[int, int], List[float]], List[List[float]]],
-                 new_biases: Union[Dict[Tuple[int, int], float], List[float]]):
+                 new_biases: Union[Dict[Tuple[int, int], float], List[float]],
+                 nonzero_only: bool = False,
+                 row_budget: Optional[int] = None,
+                 split: Optional[str] = 'sheets',
+                 selection: Optional[NeuronSelection] = None):
         """
         Инициализация создателя таблицы
         
@@ -38,12 +60,21 @@ class WeightCorrectionTableCreator:
             old_weights: Словарь или список старых весов
             new_weights: Словарь или список новых весов
             new_biases: Словарь или список новых смещений
+            nonzero_only: Выводить только ненулевые синапсы (для прореженных сетей)
+            row_budget: Максимум строк данных на листе (по умолчанию - предел Excel)
+            split: Разделение таблицы, превышающей бюджет: 'sheets', 'workbooks'
+                   или None (см. ShardedTableWriter)
+            selection: Выводимые нейроны (по умолчанию - все)
         """
+        self.nonzero_only = nonzero_only
+        self.selection = selection
+        self.row_budget = row_budget
+        self.split = split
         try:
             logger.info("Инициализация WeightCorrectionTableCreator")
-            logger.info(f"Тип old_weights: {type(old_weights)}, значение: {old_weights}")
-            logger.info(f"Тип new_weights: {type(new_weights)}, значение: {new_weights}")
-            logger.info(f"Тип new_biases: {type(new_biases)}, значение: {new_biases}")
+            logger.info(f"Тип old_weights: {type(old_weights)}, элементов: {len(old_weights)}")
+            logger.info(f"Тип new_weights: {type(new_weights)}, элементов: {len(new_weights)}")
+            logger.info(f"Тип new_biases: {type(new_biases)}, элементов: {len(new_biases)}")
             
             # Преобразуем входные данные в словари, если они переданы как списки
             self.old_weights = self._ensure_dict(old_weights, "old_weights")
@@ -51,9 +82,6 @@ class WeightCorrectionTableCreator:
             self.new_biases = self._ensure_dict(new_biases, "new_biases")
             
             logger.info("Преобразование входных данных завершено успешно")
-            logger.debug(f"Преобразованный old_weights: {self.old_weights}")
-            logger.debug(f"Преобразованный new_weights: {self.new_weights}")
-            logger.debug(f"Преобразованный new_biases: {self.new_biases}")
             
         except Exception as e:
             logger.error(f"Ошибка при инициализации: {str(e)}")
@@ -63,9 +91,9 @@ class WeightCorrectionTableCreator:
     def _ensure_dict(self, data: Union[Dict, List], name: str) -> Dict:
         """Преобразует данные в словарь, если они переданы как список"""
         try:
-            logger.info(f"Начало преобразования данных {name}")
-            logger.debug(f"Входные данные {name}: {data}")
-            logger.debug(f"Тип входных данных {name}: {type(data)}")
+            # Содержимое данных не выводится: для больших сетей форматирование
+            # весов занимало бы больше времени, чем сама таблица
+            logger.debug("Преобразование данных %s, тип %s", name, type(data).__name__)
             
             if data is None:
                 error_msg = f"Параметр {name} не может быть None"
@@ -73,11 +101,11 @@ class WeightCorrectionTableCreator:
                 raise ValueError(error_msg)
             
             if isinstance(data, dict):
-                logger.debug(f"{name} уже является словарем")
+                logger.debug("%s уже является словарем", name)
                 return data
             
             if isinstance(data, list):
-                logger.debug(f"Преобразование списка {name} в словарь")
+                logger.debug("Преобразование списка %s в словарь", name)
                 if not data:  # Пустой список
                     error_msg = f"Параметр {name} не может быть пустым списком"
                     logger.error(error_msg)
@@ -92,10 +120,12 @@ class WeightCorrectionTableCreator:
                             idx = (neuron - 1) if layer == 1 else 10
                             if idx < len(data):
                                 result[(layer, neuron)] = float(data[idx])  # Преобразуем в float
-                                logger.debug(f"Установлено смещение для слоя {layer}, нейрона {neuron}: {data[idx]}")
+                                logger.debug("Установлено смещение для слоя %s, нейрона %s: %s",
+                                             layer, neuron, data[idx])
                             else:
                                 result[(layer, neuron)] = 1.0
-                                logger.debug(f"Установлено значение по умолчанию для слоя {layer}, нейрона {neuron}: 1.0")
+                                logger.debug("Установлено значение по умолчанию для слоя %s, нейрона %s: 1.0",
+                                             layer, neuron)
                     return result
                 else:
                     # Для весов создаем словарь с ключами (layer, neuron)
@@ -107,16 +137,16 @@ class WeightCorrectionTableCreator:
                             if idx < len(data):
                                 weights = data[idx]
                                 if not isinstance(weights, list):
-                                    logger.debug(f"Преобразование скалярного значения {weights} в список")
+                                    logger.debug("Преобразование скалярного значения %s в список", weights)
                                     weights = [float(weights)]  # Преобразуем в float
                                 else:
                                     weights = [float(w) for w in weights]  # Преобразуем все элементы в float
                                 result[(layer, neuron)] = weights
-                                logger.debug(f"Установлены веса для слоя {layer}, нейрона {neuron}: {weights}")
+                                logger.debug("Установлены веса для слоя %s, нейрона %s", layer, neuron)
                             else:
                                 default_weights = [0.0] * (3 if layer == 1 else 10)
                                 result[(layer, neuron)] = default_weights
-                                logger.debug(f"Установлены веса по умолчанию для слоя {layer}, нейрона {neuron}: {default_weights}")
+                                logger.debug("Установлены веса по умолчанию для слоя %s, нейрона %s", layer, neuron)
                     return result
             
             error_msg = f"Параметр {name} должен быть словарем или списком, получен {type(data)}"
@@ -128,90 +158,79 @@ class WeightCorrectionTableCreator:
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise
     
-    def create_table(self, output_file: str):
+    def _synapses(self, old_weights: List[float], count: int) -> List[int]:
+        """Индексы выводимых синапсов нейрона (при nonzero_only - только ненулевых)"""
+        if not self.nonzero_only:
+            return list(range(count))
+        return np.flatnonzero(np.asarray(old_weights[:count], dtype=np.float64)).tolist()
+    
+    def _layout(self) -> List[Tuple[int, List[int], int]]:
+        """Слои сети: (номер слоя, номера выводимых нейронов, число входов нейрона)"""
+        layers = sorted({layer for layer, _ in self.old_weights})
+        layout = []
+        for layer in layers:
+            count = max(neuron for l, neuron in self.old_weights if l == layer)
+            neurons = (self.selection.neurons(layer, count) if self.selection is not None
+                       else list(range(1, count + 1)))
+            layout.append((layer, neurons,
+                           max(len(weights) for (l, _), weights in self.old_weights.items() if l == layer)))
+        return layout
+    
+    def create_table(self, output_file: str) -> List[str]:
         """
         Создает Excel таблицу с новыми весами
         
+        Строки нейрона (по строке на синапс) пишутся одним блоком; таблица,
+        не помещающаяся на лист, распределяется по листам или книгам.
+        
         Args:
             output_file: Путь к выходному файлу
+            
+        Returns:
+            List[str]: Пути созданных книг
         """
         logger.info(f"Создание таблицы Excel: {output_file}")
-        # Создаем список строк для таблицы
-        rows = []
         
         try:
-            # Добавляем строки для скрытого слоя
-            for neuron in range(1, 11):  # 10 нейронов
-                logger.debug(f"Обработка нейрона {neuron} скрытого слоя")
-                old_weights = self.old_weights.get((1, neuron), [0.0] * 3)
-                new_weights = self.new_weights.get((1, neuron), [0.0] * 3)
-                new_bias = self.new_biases.get((1, neuron), 1.0)
-                
-                # Добавляем строки для каждого входа
-                for i in range(3):  # 3 входа
-                    row = {
-                        '№ слоя': '1' if i == 0 else '',
-                        '№ нейрона': neuron if i == 0 else '',
-                        '№ выхода': i + 1,
-                        'Предыдущий весовой коэффициент wij(t)': old_weights[i],
-                        'Предыдущий вес смещения Tj(t)': 1.0 if i == 0 else '',
-                        'Новый весовой коэффициент wij(t+1)': new_weights[i],
-                        'Новый вес смещения Tj(t+1)': new_bias if i == 0 else ''
-                    }
-                    logger.debug(f"Добавлена строка для входа {i+1}: {row}")
-                    rows.append(row)
-            
-            # Добавляем строки для выходного слоя
-            logger.debug("Обработка выходного слоя")
-            old_weights = self.old_weights.get((2, 1), [0.0] * 10)
-            new_weights = self.new_weights.get((2, 1), [0.0] * 10)
-            new_bias = self.new_biases.get((2, 1), 1.0)
+            layout = self._layout()
+            # Число строк считается заранее, чтобы превышение предела листа
+            # обнаруживалось до записи
+            total_rows = sum(
+                len(self._synapses(self.old_weights.get((layer, neuron), []), width))
+                for layer, neurons, width in layout for neuron in neurons
+            )
+            writer = ShardedTableWriter(output_file, TEMPLATE, 'Таблица 10', total_rows,
+                                        self.row_budget, max((w for _, _, w in layout), default=1),
+                                        self.split)
             
-            # Добавляем строки для каждого входа
-            for i in range(10):  # 10 входов от скрытого слоя
-                row = {
-                    '№ слоя': 'Выход' if i == 0 else '',
-                    '№ нейрона': 1 if i == 0 else '',
-                    '№ выхода': i + 1,
-                    'Предыдущий весовой коэффициент wij(t)': old_weights[i],
-                    'Предыдущий вес смещения Tj(t)': 1.0 if i == 0 else '',
-                    'Новый весовой коэффициент wij(t+1)': new_weights[i],
-                    'Новый вес смещения Tj(t+1)': new_bias if i == 0 else ''
-                }
-                logger.debug(f"Добавлена строка для входа {i+1}: {row}")
-                rows.append(row)
+            # Последний слой - выходной
+            for layer, neurons, width in layout:
+                label = 'Выход' if layer == layout[-1][0] and len(layout) > 1 else str(layer)
+                for neuron in neurons:
+                    old_weights = self.old_weights.get((layer, neuron), [0.0] * width)
+                    new_weights = self.new_weights.get((layer, neuron), [0.0] * width)
+                    new_bias = self.new_biases.get((layer, neuron), 1.0)
+                    
+                    # Строка для каждого входа
+                    rows = []
+                    for n, i in enumerate(self._synapses(old_weights, width)):
+                        rows.append([
+                            label if n == 0 else '',
+                            neuron if n == 0 else '',
+                            i + 1,
+                            old_weights[i] if i < len(old_weights) else 0.0,
+                            1.0 if n == 0 else '',
+                            new_weights[i] if i < len(new_weights) else 0.0,
+                            new_bias if n == 0 else ''
+                        ])
+                    if rows:
+                        writer.write_block(f'Нейрон [{layer}][{neuron}]', rows)
             
-            # Создаем DataFrame
-            df = pd.DataFrame(rows)
-            logger.debug("DataFrame создан успешно")
-            
-            # Создаем Excel writer
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Таблица 10')
-                
-                # Получаем рабочий лист
-                worksheet = writer.sheets['Таблица 10']
-                
-                # Устанавливаем ширину столбцов
-                for column in worksheet.columns:
-                    max_length = 0
-                    column = list(column)
-                    for cell in column:
-                        try:
-                            if cell.value:
-                                max_length = max(max_length, len(str(cell.value)))
-                        except:
-                            pass
-                    adjusted_width = (max_length + 2)
-                    worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
-                
-                # Устанавливаем формат чисел (8 знаков после запятой)
-                for row in worksheet.iter_rows(min_row=2):  # Пропускаем заголовки
-                    for cell in row:
-                        if isinstance(cell.value, (int, float)):
-                            cell.number_format = '0.00000000'
+            files = writer.close()
+            logger.debug("Таблица записана: %s", files)
+            return files
                 
         except Exception as e:
             logger.error(f"Ошибка при создании таблицы: {e}")
             logger.error(f"Traceback: {traceback.format_exc()}")
-            raise 
\ No newline at end of file
+            raise
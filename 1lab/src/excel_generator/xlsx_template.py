@@ -0,0 +1,421 @@
+"""
+Книги .xlsx по шаблонам листов.
+
+Шаблон листа (SheetTemplate) заранее задает все оформление таблицы:
+заголовки, ширину столбцов, форматы чисел и объединяемые столбцы. Стили
+книги и XML строки заголовков строятся по шаблону один раз, а строки
+данных записываются в XML листа напрямую, без промежуточной модели книги:
+ячейка ссылается на готовый стиль по номеру, объекты форматов и ширина
+по содержимому ячеек не вычисляются.
+
+Лист пишется в архив книги потоково, поэтому объем памяти не зависит от
+числа строк; строки хранятся в ячейках (inlineStr), без таблицы общих
+строк. Одновременно в книге открыт только один лист.
+"""
+import math
+import numbers
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Уровень сжатия архива: XML листов сжимается в несколько раз уже на
+# первом уровне; уровень 6 (по умолчанию zlib) уменьшает книгу еще на
+# 20%, но запись большой таблицы с ним в полтора раза дольше
+COMPRESS_LEVEL = 1
+# Число строк, накапливаемых перед записью в архив
+FLUSH_ROWS = 2048
+# Первый номер пользовательского формата чисел (номера до 163 - встроенные форматы)
+FIRST_CUSTOM_FORMAT = 164
+# Высота строки Excel по умолчанию (пункты) и ширина символа "0" шрифта
+# Calibri 11 (пиксели): по ним ширина столбца переводится в единицы Excel
+DEFAULT_ROW_HEIGHT = 15
+DIGIT_WIDTH = 7
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+SHEET_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+
+NumberFormats = Union[Optional[str], Sequence[Optional[str]]]
+
+
+class Formula:
+    """
+    Формула ячейки. В шаблоне {row} заменяется номером строки Excel,
+    в которую попала ячейка; value - вычисленное значение (если известно).
+    """
+
+    def __init__(self, template: str, value: Any = None):
+        self.template = template
+        self.value = value
+
+
+def _escape(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _escape_attribute(text: str) -> str:
+    return _escape(text).replace('"', '&quot;')
+
+
+def column_letter(col: int) -> str:
+    """Буквенное обозначение столбца по номеру с 0 (0 - A, 26 - AA)"""
+    letters = ''
+    col += 1
+    while col:
+        col, rest = divmod(col - 1, 26)
+        letters = chr(ord('A') + rest) + letters
+    return letters
+
+
+def _column_width(width: float) -> float:
+    """Ширина столбца в единицах файла по ширине в символах (как в Excel)"""
+    if width <= 0:
+        return 0.0
+    padding = 5 if width >= 1 else 0
+    pixels = int(width * DIGIT_WIDTH + 0.5) + padding
+    return int(pixels / DIGIT_WIDTH * 256) / 256
+
+
+class SheetTemplate:
+    """
+    Оформление листа таблицы, заданное заранее.
+
+    Первая строка листа - заголовки (полужирные, с переносом, по центру),
+    она закреплена при прокрутке. Ячейки данных - с рамкой и по центру,
+    числа - в формате своего столбца. Столбцы merge_columns объединяются
+    по строкам блока (см. ShardedTableWriter), значение берется из первой
+    строки блока.
+    """
+
+    def __init__(self, columns: Sequence[str],
+                 widths: Union[float, Sequence[float]] = 15,
+                 number_formats: NumberFormats = '0.000000',
+                 merge_columns: Sequence[int] = (),
+                 autofilter: bool = False):
+        """
+        Args:
+            columns: Заголовки столбцов
+            widths: Ширина столбцов в символах (одна для всех или по столбцам)
+            number_formats: Формат чисел (один для всех или по столбцам; None - общий)
+            merge_columns: Столбцы, объединяемые по строкам блока
+            autofilter: Добавить автофильтр на строку заголовков
+        """
+        self.columns = list(columns)
+        count = len(self.columns)
+        self.widths = [widths] * count if isinstance(widths, (int, float)) else list(widths)
+        self.number_formats = ([number_formats] * count
+                               if number_formats is None or isinstance(number_formats, str)
+                               else list(number_formats))
+        if len(self.widths) != count or len(self.number_formats) != count:
+            raise ValueError(f"Ширина и форматы задаются для каждого из {count} столбцов")
+        self.merge_columns = tuple(merge_columns)
+        self.autofilter = autofilter
+        self.letters = [column_letter(col) for col in range(count)]
+        # Высота строки заголовков - по числу строк самого длинного заголовка
+        # с переносом по ширине столбца
+        lines = max((math.ceil(len(header) / max(width, 1)) for header, width
+                     in zip(self.columns, self.widths)), default=1)
+        self.header_height = DEFAULT_ROW_HEIGHT * max(lines, 1)
+        self.cols_xml = ''.join(
+            f'<col min="{col}" max="{col}" width="{_column_width(width)}" customWidth="1"/>'
+            for col, width in enumerate(self.widths, 1))
+        if self.cols_xml:
+            self.cols_xml = f'<cols>{self.cols_xml}</cols>'
+
+
+class _Styles:
+    """
+    Стили книги: по одному стилю заголовков и по стилю обычной и
+    объединенной ячейки на каждый формат чисел. Номера стилей выдаются при
+    добавлении листа, XML стилей записывается при закрытии книги.
+    """
+
+    def __init__(self):
+        self.formats: Dict[str, int] = {}
+        # (вид, номер формата чисел); номер 0 - стиль по умолчанию
+        self.xfs: List[Tuple[str, int]] = [('default', 0), ('header', 0)]
+
+    def xf(self, kind: str, number_format: Optional[str] = None) -> int:
+        format_id = 0
+        if number_format:
+            format_id = self.formats.setdefault(number_format, FIRST_CUSTOM_FORMAT + len(self.formats))
+        key = (kind, format_id)
+        if key not in self.xfs:
+            self.xfs.append(key)
+        return self.xfs.index(key)
+
+    def xml(self) -> str:
+        formats = ''.join(f'<numFmt numFmtId="{number}" formatCode="{_escape_attribute(code)}"/>'
+                          for code, number in self.formats.items())
+        xfs = []
+        for kind, format_id in self.xfs:
+            if kind == 'default':
+                xfs.append('<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>')
+                continue
+            font = 1 if kind == 'header' else 0
+            wrap = ' wrapText="1"' if kind == 'header' else ''
+            vertical = ' vertical="center"' if kind in ('header', 'merge') else ''
+            number = ' applyNumberFormat="1"' if format_id else ''
+            xfs.append(f'<xf numFmtId="{format_id}" fontId="{font}" fillId="0" borderId="1" xfId="0"'
+                       f'{number} applyFont="1" applyBorder="1" applyAlignment="1">'
+                       f'<alignment horizontal="center"{vertical}{wrap}/></xf>')
+        border = '<left style="thin"><color auto="1"/></left><right style="thin"><color auto="1"/></right>' \
+                 '<top style="thin"><color auto="1"/></top><bottom style="thin"><color auto="1"/></bottom>'
+        return (XML_HEADER + f'<styleSheet xmlns="{MAIN_NS}">'
+                + (f'<numFmts count="{len(self.formats)}">{formats}</numFmts>' if self.formats else '')
+                + '<fonts count="2"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+                '<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font></fonts>'
+                '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+                '<fill><patternFill patternType="gray125"/></fill></fills>'
+                f'<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+                f'<border>{border}<diagonal/></border></borders>'
+                '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                f'<cellXfs count="{len(xfs)}">{"".join(xfs)}</cellXfs>'
+                '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+                '</styleSheet>')
+
+
+def _number(value) -> Optional[str]:
+    """Запись числа в XML или None для NaN и бесконечности (пустая ячейка)"""
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    value = float(value)
+    return repr(value) if math.isfinite(value) else None
+
+
+def _cell(ref: str, style: str, value: Any, row: int) -> str:
+    """
+    XML ячейки. ref - обозначение ячейки с открывающей кавычкой атрибута
+    ('<c r="A12'), style - атрибут стиля ('" s="2"').
+    """
+    kind = type(value)
+    if kind is float or kind is int:
+        if value == value and value - value == 0:  # не NaN и не бесконечность
+            return f'{ref}{style}><v>{value!r}</v></c>'
+        return f'{ref}{style}/>'
+    if kind is str:
+        if not value:
+            return f'{ref}{style}/>'
+        space = ' xml:space="preserve"' if value[0].isspace() or value[-1].isspace() else ''
+        return f'{ref}{style} t="inlineStr"><is><t{space}>{_escape(value)}</t></is></c>'
+    if value is None:
+        return f'{ref}{style}/>'
+    if kind is Formula:
+        formula = _escape(value.template.format(row=row).lstrip('='))
+        cached = value.value
+        if cached is None:
+            return f'{ref}{style}><f>{formula}</f></c>'
+        if isinstance(cached, str):
+            return f'{ref}{style} t="str"><f>{formula}</f><v>{_escape(cached)}</v></c>'
+        number = _number(cached)
+        return f'{ref}{style}><f>{formula}</f>' + (f'<v>{number}</v></c>' if number else '</c>')
+    if isinstance(value, bool) or type(value).__name__ == 'bool_':
+        return f'{ref}{style} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Number):
+        number = _number(value)
+        return f'{ref}{style}><v>{number}</v></c>' if number else f'{ref}{style}/>'
+    return _cell(ref, style, str(value), row)
+
+
+class XlsxSheet:
+    """Лист книги, в который строки данных дописываются по порядку"""
+
+    def __init__(self, book: 'XlsxBook', name: str, template: SheetTemplate, path: str):
+        self.book = book
+        self.name = name
+        self.template = template
+        self.path = path
+        styles = book.styles
+        header = styles.xf('header')
+        self._cell_styles = [f'" s="{styles.xf("cell", fmt)}"' for fmt in template.number_formats]
+        self._merged_styles = list(self._cell_styles)
+        for col in template.merge_columns:
+            self._merged_styles[col] = f'" s="{styles.xf("merge", template.number_formats[col])}"'
+        self._merges: List[str] = []
+        self._pending: List[str] = []
+        # Номер следующей строки Excel (1 - строка заголовков)
+        self.row = 1
+        self._stream = book.archive.open(path, 'w', force_zip64=True)
+        self._pending.append(
+            XML_HEADER + f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+            '<sheetViews><sheetView workbookViewId="0">'
+            '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+            '<selection pane="bottomLeft"/></sheetView></sheetViews>'
+            f'<sheetFormatPr defaultRowHeight="{DEFAULT_ROW_HEIGHT}"/>'
+            f'{template.cols_xml}<sheetData>'
+            f'<row r="1" ht="{template.header_height}" customHeight="1">'
+            + ''.join(_cell(f'<c r="{letter}1', f'" s="{header}"', title, 1)
+                      for letter, title in zip(template.letters, template.columns))
+            + '</row>')
+        self.row = 2
+
+    def write_row(self, values: Sequence[Any], merged: bool = False) -> None:
+        """
+        Дописывает строку.
+
+        Args:
+            values: Значения в порядке столбцов шаблона (Formula для формул)
+            merged: Строка блока с объединенными столбцами - ячейки этих
+                    столбцов получают стиль объединенной ячейки
+        """
+        row = self.row
+        styles = self._merged_styles if merged else self._cell_styles
+        suffix = f'{row}'
+        self._pending.append(
+            f'<row r="{row}">'
+            + ''.join([_cell(f'<c r="{letter}{suffix}', style, value, row)
+                       for letter, style, value in zip(self.template.letters, styles, values)])
+            + '</row>')
+        self.row = row + 1
+        if len(self._pending) >= FLUSH_ROWS:
+            self._flush()
+
+    def write_rows(self, rows: Iterable[Sequence[Any]]) -> None:
+        for values in rows:
+            self.write_row(values)
+
+    def merge(self, first_row: int, last_row: int, col: int) -> None:
+        """Объединяет ячейки столбца col в строках first_row..last_row (номера Excel)"""
+        letter = self.template.letters[col]
+        self._merges.append(f'<mergeCell ref="{letter}{first_row}:{letter}{last_row}"/>')
+
+    def _flush(self) -> None:
+        self._stream.write(''.join(self._pending).encode('utf-8'))
+        self._pending = []
+
+    def data_range(self, absolute: bool = False) -> str:
+        """Диапазон таблицы с заголовками: A1:E10 или $A$1:$E$10"""
+        mark = '$' if absolute else ''
+        return f'{mark}A{mark}1:{mark}{self.template.letters[-1]}{mark}{max(self.row - 1, 1)}'
+
+    def close(self) -> None:
+        if self._stream is None:
+            return
+        self._pending.append('</sheetData>')
+        if self.template.autofilter:
+            self._pending.append(f'<autoFilter ref="{self.data_range()}"/>')
+        if self._merges:
+            self._pending.append(f'<mergeCells count="{len(self._merges)}">{"".join(self._merges)}</mergeCells>')
+        self._pending.append('<pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" '
+                             'header="0.3" footer="0.3"/></worksheet>')
+        self._flush()
+        self._merges = []
+        self._stream.close()
+        self._stream = None
+        self.book._current = None
+
+
+class XlsxBook:
+    """
+    Книга .xlsx, листы которой пишутся потоково по шаблонам.
+
+    Листы добавляются и заполняются по одному; описание книги, стили и
+    связи записываются при закрытии.
+    """
+
+    def __init__(self, path: Union[str, Path], full_calc: bool = False):
+        """
+        Args:
+            path: Путь к файлу книги
+            full_calc: Пересчитывать ли книгу при открытии - нужно, только если
+                       в ней есть формулы без вычисленных значений
+        """
+        self.path = Path(path)
+        self.full_calc = full_calc
+        self.archive = zipfile.ZipFile(self.path, 'w', zipfile.ZIP_DEFLATED,
+                                       compresslevel=COMPRESS_LEVEL)
+        self.styles = _Styles()
+        self.sheets: List[XlsxSheet] = []
+        self._current: Optional[XlsxSheet] = None
+        self.closed = False
+
+    def add_sheet(self, name: str, template: SheetTemplate, first: bool = False) -> XlsxSheet:
+        """
+        Начинает новый лист (предыдущий лист закрывается).
+
+        Args:
+            name: Имя листа (не длиннее 31 символа)
+            template: Шаблон оформления листа
+            first: Поместить лист перед остальными листами книги
+
+        Returns:
+            XlsxSheet: Лист для записи строк
+        """
+        if len(name) > 31:
+            raise ValueError(f"Имя листа длиннее 31 символа: {name}")
+        if any(sheet.name == name for sheet in self.sheets):
+            raise ValueError(f"Лист {name} уже есть в книге")
+        if self._current is not None:
+            self._current.close()
+        sheet = XlsxSheet(self, name, template, f'xl/worksheets/sheet{len(self.sheets) + 1}.xml')
+        self.sheets.insert(0 if first else len(self.sheets), sheet)
+        self._current = sheet
+        return sheet
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self._current is not None:
+            self._current.close()
+        if not self.sheets:
+            self.add_sheet('Sheet1', SheetTemplate([])).close()
+        self.closed = True
+        archive = self.archive
+        sheets = ''.join(f'<sheet name="{_escape_attribute(sheet.name)}" sheetId="{number}" r:id="rId{number}"/>'
+                         for number, sheet in enumerate(self.sheets, 1))
+        filters = ''.join(
+            f'<definedName name="_xlnm._FilterDatabase" localSheetId="{index}" hidden="1">'
+            + _escape("'" + sheet.name.replace("'", "''") + "'!" + sheet.data_range(absolute=True))
+            + '</definedName>'
+            for index, sheet in enumerate(self.sheets) if sheet.template.autofilter)
+        archive.writestr('xl/workbook.xml', XML_HEADER + (
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+            '<bookViews><workbookView activeTab="0"/></bookViews>'
+            f'<sheets>{sheets}</sheets>'
+            + (f'<definedNames>{filters}</definedNames>' if filters else '')
+            + ('<calcPr calcId="124519" fullCalcOnLoad="1"/>' if self.full_calc else '<calcPr calcId="124519"/>')
+            + '</workbook>'))
+        rels = ''.join(f'<Relationship Id="rId{number}" Type="{REL_NS}/worksheet" '
+                       f'Target="/{sheet.path}"/>'
+                       for number, sheet in enumerate(self.sheets, 1))
+        styles_id = len(self.sheets) + 1
+        archive.writestr('xl/_rels/workbook.xml.rels', XML_HEADER + (
+            f'<Relationships xmlns="{PACKAGE_REL_NS}">{rels}'
+            f'<Relationship Id="rId{styles_id}" Type="{REL_NS}/styles" Target="styles.xml"/>'
+            '</Relationships>'))
+        archive.writestr('xl/styles.xml', self.styles.xml())
+        archive.writestr('_rels/.rels', XML_HEADER + (
+            f'<Relationships xmlns="{PACKAGE_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'))
+        overrides = ''.join(f'<Override PartName="/{sheet.path}" ContentType="{SHEET_TYPE}"/>'
+                            for sheet in self.sheets)
+        archive.writestr('[Content_Types].xml', XML_HEADER + (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'))
+        archive.close()
+
+
+def write_workbook(output_file: Union[str, Path],
+                   sheets: Sequence[Tuple[str, SheetTemplate, Iterable[Sequence[Any]]]]) -> None:
+    """
+    Записывает книгу из нескольких небольших таблиц.
+
+    Args:
+        output_file: Путь к выходному файлу
+        sheets: Листы: (имя, шаблон, строки данных)
+    """
+    book = XlsxBook(output_file)
+    try:
+        for name, template, rows in sheets:
+            book.add_sheet(name, template).write_rows(rows)
+    finally:
+        book.close()
@@ -0,0 +1,293 @@
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from PyQt6.QtCore import QPointF, QRectF, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QImage, QPainter
+from PyQt6.QtWidgets import QComboBox, QDialog, QHBoxLayout, QLabel, QVBoxLayout, QWidget
+
+from utils.downsample import MinMaxPyramid, extremes
+
+# Поля области вывода под подписи осей (пиксели)
+LEFT_MARGIN = 70
+BOTTOM_MARGIN = 20
+# Изменение масштаба на один шаг колеса мыши
+ZOOM_STEP = 0.8
+# Наименьшее число ячеек в окне по оси
+MIN_SPAN = 2
+BACKGROUND = 0xFFFFFFFF
+NAN_COLOR = 0xFFC8C8C8
+ENVELOPE_COLOR = 0xFF2166AC
+ZERO_COLOR = 0xFF909090
+
+
+def _diverging_lut() -> np.ndarray:
+    """Палитра из 256 цветов: синий (отрицательные) - белый (0) - красный (положительные)"""
+    negative = np.array([33, 102, 172], dtype=np.float64)
+    positive = np.array([178, 24, 43], dtype=np.float64)
+    white = np.array([255, 255, 255], dtype=np.float64)
+    t = np.linspace(-1, 1, 256)[:, None]
+    rgb = np.where(t < 0, white + (negative - white) * -t, white + (positive - white) * t)
+    rgb = np.rint(rgb).astype(np.uint32)
+    return 0xFF000000 | (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+
+LUT = _diverging_lut()
+
+
+class HeatmapView(QWidget):
+    """
+    Просмотр матрицы как тепловой карты или вектора как графика.
+
+    Изображение строится из массивов numpy по пирамиде минимумов и
+    максимумов (MinMaxPyramid) с разрешением окна: на пиксель приходится
+    не больше одного значения, поэтому время отрисовки не зависит от
+    размера сети, и отдельные объекты для ячеек не создаются. Колесо
+    мыши - масштаб относительно курсора, перетаскивание - сдвиг,
+    двойной щелчок - вся матрица.
+    """
+
+    # Описание ячейки под курсором
+    hovered = pyqtSignal(str)
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setMouseTracking(True)
+        self.setMinimumSize(400, 300)
+        self.pyramid: Optional[MinMaxPyramid] = None
+        self.is_vector = False
+        self.describe: Optional[Callable[[int, int, float], str]] = None
+        # Видимая область в координатах ячеек: строки [r0, r1), столбцы [c0, c1)
+        self.view = [0.0, 1.0, 0.0, 1.0]
+        self._drag: Optional[QPointF] = None
+        self._cache_key = None
+        self._image: Optional[QImage] = None
+        self._image_rect = QRectF()
+        self._pixels: Optional[np.ndarray] = None
+
+    def set_data(self, pyramid: MinMaxPyramid, is_vector: bool,
+                 describe: Callable[[int, int, float], str]) -> None:
+        """
+        Args:
+            pyramid: Пирамида выводимой матрицы (вектор - матрица из одной строки)
+            is_vector: Выводить график значений по номеру, а не тепловую карту
+            describe: Описание ячейки (строка, столбец, значение) для подсказки
+        """
+        self.pyramid = pyramid
+        self.is_vector = is_vector
+        self.describe = describe
+        self.reset_view()
+
+    def reset_view(self) -> None:
+        if self.pyramid is not None:
+            self.view = [0.0, float(self.pyramid.shape[0]), 0.0, float(self.pyramid.shape[1])]
+        self._cache_key = None
+        self.update()
+
+    def plot_rect(self) -> QRectF:
+        return QRectF(LEFT_MARGIN, 0, max(self.width() - LEFT_MARGIN, 1),
+                      max(self.height() - BOTTOM_MARGIN, 1))
+
+    def _cell_at(self, point: QPointF) -> Tuple[float, float]:
+        """Координаты ячейки (строка, столбец) под точкой окна"""
+        rect = self.plot_rect()
+        r0, r1, c0, c1 = self.view
+        col = c0 + (point.x() - rect.left()) / rect.width() * (c1 - c0)
+        row = r0 + (point.y() - rect.top()) / rect.height() * (r1 - r0)
+        return row, col
+
+    def _render(self) -> None:
+        """Изображение видимой области по пирамиде (пересчитывается при изменении области)"""
+        rect = self.plot_rect()
+        height, width = int(rect.height()), int(rect.width())
+        key = (tuple(self.view), height, width)
+        if key == self._cache_key:
+            return
+        self._cache_key = key
+        r0, r1, c0, c1 = self.view
+        rows = (int(np.floor(r0)), int(np.ceil(r1)))
+        cols = (int(np.floor(c0)), int(np.ceil(c1)))
+        mins, maxs, covered = self.pyramid.render(rows, cols, 1 if self.is_vector else height, width)
+        if self.is_vector:
+            pixels = self._envelope(mins[0], maxs[0], height)
+        else:
+            pixels = self._heatmap(mins, maxs)
+        self._pixels = np.ascontiguousarray(pixels, dtype=np.uint32)
+        image_height, image_width = self._pixels.shape
+        self._image = QImage(self._pixels.data, image_width, image_height, 4 * image_width,
+                             QImage.Format.Format_RGB32)
+        # Прямоугольник, который занимает покрытая изображением область
+        top, bottom, left, right = covered
+        x0 = rect.left() + (left - c0) / (c1 - c0) * rect.width()
+        x1 = rect.left() + (right - c0) / (c1 - c0) * rect.width()
+        if self.is_vector:
+            self._image_rect = QRectF(x0, rect.top(), x1 - x0, rect.height())
+        else:
+            y0 = rect.top() + (top - r0) / (r1 - r0) * rect.height()
+            y1 = rect.top() + (bottom - r0) / (r1 - r0) * rect.height()
+            self._image_rect = QRectF(x0, y0, x1 - x0, y1 - y0)
+
+    def _heatmap(self, mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+        """Цвета пикселей тепловой карты; шкала симметрична и общая для всей матрицы"""
+        values = extremes(mins, maxs)
+        low, high = self.pyramid.value_range
+        scale = max(abs(low), abs(high)) if np.isfinite(low) else 0.0
+        missing = np.isnan(values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            index = np.rint((values / (scale or 1.0) + 1) * 127.5)
+        index = np.clip(np.nan_to_num(index, nan=127.0), 0, 255).astype(np.intp)
+        pixels = LUT[index]
+        pixels[missing] = NAN_COLOR
+        return pixels
+
+    def _envelope(self, mins: np.ndarray, maxs: np.ndarray, height: int) -> np.ndarray:
+        """
+        График вектора: для каждого столбца пикселей закрашивается отрезок от
+        минимума до максимума значений, попавших в столбец.
+        """
+        low, high = self.pyramid.value_range
+        if not np.isfinite(low):
+            low, high = -1.0, 1.0
+        pad = (high - low) * 0.05 or 1.0
+        low, high = low - pad, high + pad
+        # Отрезок столбца продлевается до значений соседнего слева, чтобы
+        # график был непрерывным на крутых участках
+        mins, maxs = mins.copy(), maxs.copy()
+        np.fmin(mins[1:], maxs[:-1], out=mins[1:])
+        np.fmax(maxs[1:], mins[:-1].copy(), out=maxs[1:])
+        y = np.arange(height)[:, None]
+        with np.errstate(invalid='ignore'):
+            top = np.floor((high - maxs) / (high - low) * (height - 1))
+            bottom = np.ceil((high - mins) / (high - low) * (height - 1))
+            mask = (y >= top) & (y <= bottom)
+        pixels = np.where(mask, np.uint32(ENVELOPE_COLOR), np.uint32(BACKGROUND))
+        zero = int(round(high / (high - low) * (height - 1)))
+        if 0 <= zero < height:
+            pixels[zero, ~mask[zero]] = ZERO_COLOR
+        return pixels
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(Qt.GlobalColor.white))
+        if self.pyramid is None:
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, 'Нет данных')
+            return
+        self._render()
+        rect = self.plot_rect()
+        painter.save()
+        painter.setClipRect(rect)
+        painter.drawImage(self._image_rect, self._image)
+        painter.restore()
+        painter.setPen(QColor(Qt.GlobalColor.black))
+        painter.drawRect(rect)
+        r0, r1, c0, c1 = self.view
+        # Подписи осей: границы видимой области
+        painter.drawText(QRectF(rect.left(), rect.bottom(), 80, BOTTOM_MARGIN),
+                         Qt.AlignmentFlag.AlignLeft, str(int(c0) + 1))
+        painter.drawText(QRectF(rect.right() - 80, rect.bottom(), 80, BOTTOM_MARGIN),
+                         Qt.AlignmentFlag.AlignRight, str(int(np.ceil(c1))))
+        low, high = self.pyramid.value_range
+        if self.is_vector:
+            top_label, bottom_label = f'{high:.4g}', f'{low:.4g}'
+        else:
+            top_label, bottom_label = str(int(r0) + 1), str(int(np.ceil(r1)))
+        painter.drawText(QRectF(0, rect.top(), LEFT_MARGIN - 4, 20),
+                         Qt.AlignmentFlag.AlignRight, top_label)
+        painter.drawText(QRectF(0, rect.bottom() - 20, LEFT_MARGIN - 4, 20),
+                         Qt.AlignmentFlag.AlignRight, bottom_label)
+
+    def _clamp_view(self) -> None:
+        n_rows, n_cols = self.pyramid.shape
+        for start, size in ((0, n_rows), (2, n_cols)):
+            low, high = self.view[start], self.view[start + 1]
+            span = min(max(high - low, min(MIN_SPAN, size)), size)
+            low = min(max(low, 0.0), size - span)
+            self.view[start], self.view[start + 1] = low, low + span
+        self.update()
+
+    def wheelEvent(self, event):
+        if self.pyramid is None:
+            return
+        factor = ZOOM_STEP ** (event.angleDelta().y() / 120)
+        row, col = self._cell_at(event.position())
+        r0, r1, c0, c1 = self.view
+        if not self.is_vector:
+            self.view[0], self.view[1] = row - (row - r0) * factor, row + (r1 - row) * factor
+        self.view[2], self.view[3] = col - (col - c0) * factor, col + (c1 - col) * factor
+        self._clamp_view()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag = event.position()
+
+    def mouseReleaseEvent(self, event):
+        self._drag = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.reset_view()
+
+    def mouseMoveEvent(self, event):
+        if self.pyramid is None:
+            return
+        if self._drag is not None:
+            rect = self.plot_rect()
+            delta = event.position() - self._drag
+            self._drag = event.position()
+            r0, r1, c0, c1 = self.view
+            dc = delta.x() / rect.width() * (c1 - c0)
+            self.view[2], self.view[3] = c0 - dc, c1 - dc
+            if not self.is_vector:
+                dr = delta.y() / rect.height() * (r1 - r0)
+                self.view[0], self.view[1] = r0 - dr, r1 - dr
+            self._clamp_view()
+            return
+        row, col = self._cell_at(event.position())
+        n_rows, n_cols = self.pyramid.shape
+        row = 0 if self.is_vector else int(row)
+        if 0 <= row < n_rows and 0 <= col < n_cols and self.plot_rect().contains(event.position()):
+            self.hovered.emit(self.describe(row, int(col), self.pyramid.value(row, int(col))))
+
+
+class NetworkViewer(QDialog):
+    """
+    Окно просмотра весов слоев (тепловые карты) и векторов S, F'(S), γ
+    по нейронам (графики). Пирамида строится при первом выборе элемента.
+    """
+
+    def __init__(self, items: List[Tuple[str, object, bool, Callable[[int, int, float], str]]],
+                 parent: Optional[QWidget] = None):
+        """
+        Args:
+            items: Элементы просмотра: название, матрица или вектор, признак
+                   вектора и описание ячейки (строка, столбец, значение)
+        """
+        super().__init__(parent)
+        self.setWindowTitle('Просмотр весов и ошибок')
+        self.resize(900, 600)
+        self.items = items
+        self.pyramids = {}
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.item_combo = QComboBox()
+        for title, *_ in items:
+            self.item_combo.addItem(title)
+        self.item_combo.currentIndexChanged.connect(self.show_item)
+        controls.addWidget(QLabel('Показать:'))
+        controls.addWidget(self.item_combo, 1)
+        layout.addLayout(controls)
+        self.view = HeatmapView()
+        layout.addWidget(self.view, 1)
+        self.status = QLabel('Колесо мыши - масштаб, перетаскивание - сдвиг, '
+                             'двойной щелчок - вся матрица')
+        self.view.hovered.connect(self.status.setText)
+        layout.addWidget(self.status)
+        if items:
+            self.show_item(0)
+
+    def show_item(self, index: int) -> None:
+        if index < 0:
+            return
+        _, data, is_vector, describe = self.items[index]
+        if index not in self.pyramids:
+            self.pyramids[index] = MinMaxPyramid(data)
+        self.view.set_data(self.pyramids[index], is_vector, describe)
@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import Optional
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from parsers.log_reader import LogTail
+from parsers.stream_parser import IncrementalLogParser
+
+# Интервал опроса файла, если уведомления файловой системы недоступны (мс)
+POLL_INTERVAL_MS = 1000
+
+
+class LogFollower(QObject):
+    """
+    Слежение за дописываемым логом симулятора.
+
+    Новые данные читаются с запомненного смещения и передаются в потоковый
+    парсер, поэтому стоимость обновления пропорциональна объему дописанного
+    текста, а не размеру файла. Уведомления QFileSystemWatcher дополняются
+    опросом по таймеру: на части файловых систем уведомления о дописывании
+    не приходят.
+    """
+
+    # Множество изменившихся результатов разбора ('weights', 'sums', ...)
+    updated = pyqtSignal(set)
+    # Ошибка чтения файла
+    failed = pyqtSignal(str)
+
+    def __init__(self, path: Path, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.path = Path(path)
+        self.tail = LogTail(self.path)
+        self.parser = IncrementalLogParser()
+
+        self._watcher = QFileSystemWatcher([str(self.path)], self)
+        self._watcher.fileChanged.connect(self.poll)
+        self._timer = QTimer(self)
+        self._timer.setInterval(POLL_INTERVAL_MS)
+        self._timer.timeout.connect(self.poll)
+
+    def start(self) -> None:
+        """Разбирает уже записанную часть файла и начинает слежение"""
+        self._timer.start()
+        self.poll()
+
+    def stop(self) -> None:
+        """Прекращает слежение"""
+        self._timer.stop()
+        self._watcher.removePaths(self._watcher.files())
+
+    def poll(self, *_) -> None:
+        """Читает и разбирает новые данные, если они появились"""
+        try:
+            restarted, text = self.tail.poll()
+        except OSError as e:
+            self.failed.emit(str(e))
+            return
+        if restarted:
+            self.parser = IncrementalLogParser()
+        # Некоторые редакторы и симуляторы заменяют файл целиком - возобновляем слежение
+        if str(self.path) not in self._watcher.files() and self.path.exists():
+            self._watcher.addPath(str(self.path))
+        if not text and not restarted:
+            return
+        changed = self.parser.feed(text)
+        if restarted:
+            changed |= {'cycles', 'weights', 'sums', 'signals'}
+        if changed:
+            self.updated.emit(changed)
@@ -0,0 +1,95 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from parsers.log_reader import LogDecoder, file_signature, is_compressed_log, open_log
+from parsers.preview import preview_dump, preview_log
+from parsers.stream_parser import IncrementalLogParser
+from parsers.structured import StructuredLog, log_format, read_log_input
+from utils.planner import plan_execution
+
+# Размер блока фонового чтения (распакованных байтов)
+LOAD_CHUNK_SIZE = 4 << 20
+
+
+class LogLoader(QThread):
+    """
+    Фоновая загрузка лога: сначала обзор по началу и концу файла, затем
+    потоковый разбор всего файла с сообщениями о ходе чтения.
+    Структурированный дамп (.jsonl, .npz) загружается целиком без разбора.
+
+    По обзору составляется план выполнения (utils.planner): при потоковом
+    режиме разбора текст лога не сохраняется, и содержимым файла
+    становятся результаты разбора (StructuredLog).
+
+    Результаты передаются сигналами в поток интерфейса; поток можно
+    прервать (requestInterruption), например при выборе другого файла.
+    """
+
+    # Обзор лога (LogPreview)
+    preview = pyqtSignal(object)
+    # План выполнения (ExecutionPlan)
+    planned = pyqtSignal(object)
+    # Прочитано байтов, всего байтов (0 - размер распакованных данных неизвестен)
+    progress = pyqtSignal('qint64', 'qint64')
+    # Сигнатура файла, текст лога или StructuredLog и результаты разбора
+    # (как IncrementalLogParser.results)
+    loaded = pyqtSignal(object, object, object)
+    # Ошибка чтения
+    failed = pyqtSignal(str)
+
+    def __init__(self, path: Path, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.path = Path(path)
+
+    def run(self) -> None:
+        try:
+            # Сигнатура до чтения: если файл изменится во время разбора,
+            # результаты не совпадут с ней и не будут использованы
+            signature = file_signature(self.path)
+            if log_format(self.path) != 'text':
+                dump = read_log_input(self.path)
+                self.preview.emit(preview_dump(self.path, dump))
+                self.planned.emit(plan_execution(self.path))
+                if not self.isInterruptionRequested():
+                    self.loaded.emit(signature, dump, dump.results())
+                return
+            preview = preview_log(self.path)
+            self.preview.emit(preview)
+            plan = plan_execution(self.path, preview=preview)
+            self.planned.emit(plan)
+            keep_text = plan.parsing == 'memory'
+
+            total = 0 if is_compressed_log(self.path) else os.path.getsize(self.path)
+            decoder = LogDecoder()
+            parser = IncrementalLogParser()
+            parts = []
+            done = 0
+            with open_log(self.path) as f:
+                while not self.isInterruptionRequested():
+                    chunk = f.read(LOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    done += len(chunk)
+                    text = decoder.decode(chunk)
+                    if keep_text:
+                        parts.append(text)
+                    parser.feed(text)
+                    self.progress.emit(done, total)
+            if self.isInterruptionRequested():
+                return
+            tail = decoder.decode(b'', final=True)
+            parts.append(tail)
+            parser.feed(tail)
+            parser.finish()
+            results = parser.results()
+            if keep_text:
+                content = ''.join(parts)
+            else:
+                (cycles, weights), weighted_sums, input_signals = results
+                content = StructuredLog(cycles, weights, weighted_sums, input_signals)
+            self.loaded.emit(signature, content, results)
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))
@@ -0,0 +1,139 @@
+import re
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import (QCheckBox, QHBoxLayout, QLabel, QLineEdit,
+                             QPlainTextEdit, QPushButton, QVBoxLayout, QWidget)
+
+# Максимальное число строк (блоков) в окне лога
+MAX_BLOCKS = 5000
+# Максимальное число сообщений, хранимых для фильтрации и раскрытия трассировки
+MAX_RECORDS = 1_000_000
+# Период вывода накопленных сообщений (мс)
+FLUSH_INTERVAL_MS = 100
+
+NEURON_HEADER = re.compile(r'НЕЙРОН \[(\d+)\]\[(\d+)\]')
+SECTION_HEADER = re.compile(r'СЛОЙ \[\d+\]')
+NEURON_FILTER = re.compile(r'\[?\s*(\d+)\s*\]?\s*\[\s*(\d+)\s*\]?')
+
+
+class LogView(QWidget):
+    """
+    Панель лога операций.
+
+    Сообщения накапливаются в буфере и выводятся в QPlainTextEdit пачкой по
+    таймеру, число строк в окне ограничено. Сообщения трассировки расчетов
+    (все, что выводится внутри раздела нейрона после заголовка "НЕЙРОН [l][n]")
+    хранятся, но показываются только при включенной подробной трассировке.
+    Фильтр по нейрону оставляет сообщения выбранного нейрона.
+    """
+
+    def __init__(self, parent: Optional[QWidget] = None,
+                 max_blocks: int = MAX_BLOCKS, max_records: int = MAX_RECORDS):
+        super().__init__(parent)
+        self.max_blocks = max_blocks
+        # (нейрон, признак трассировки, текст)
+        self._records: Deque[Tuple[Optional[Tuple[int, int]], bool, str]] = deque(maxlen=max_records)
+        self._pending: Deque[str] = deque(maxlen=max_blocks)
+        self._current_neuron: Optional[Tuple[int, int]] = None
+        self._neuron_filter: Optional[Tuple[int, int]] = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        controls = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText('Нейрон, например [1][7]')
+        self.filter_edit.editingFinished.connect(self._apply_filter)
+        self.details_checkbox = QCheckBox('Подробная трассировка')
+        self.details_checkbox.toggled.connect(self.rerender)
+        clear_button = QPushButton('Очистить')
+        clear_button.clicked.connect(self.clear)
+        controls.addWidget(QLabel('Фильтр:'))
+        controls.addWidget(self.filter_edit)
+        controls.addWidget(self.details_checkbox)
+        controls.addWidget(clear_button)
+        layout.addLayout(controls)
+
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setUndoRedoEnabled(False)
+        self.view.setMaximumBlockCount(max_blocks)
+        layout.addWidget(self.view)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def append(self, message: str) -> None:
+        """Добавляет сообщение в буфер вывода"""
+        header = NEURON_HEADER.search(message)
+        if header:
+            self._current_neuron = (int(header.group(1)), int(header.group(2)))
+            record = (self._current_neuron, False, message)
+        elif message.strip().startswith('=' * 10) or SECTION_HEADER.search(message):
+            # Заголовок нового этапа расчета или слоя завершает раздел нейрона
+            self._current_neuron = None
+            record = (None, False, message)
+        elif message.strip() and not message.strip().strip('-'):
+            # Разделители оформления показываются и без подробной трассировки
+            record = (self._current_neuron, False, message)
+        else:
+            record = (self._current_neuron, self._current_neuron is not None, message)
+        self._records.append(record)
+
+        if self._is_visible(record):
+            self._pending.append(message)
+            if not self._timer.isActive():
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Выводит накопленные сообщения одной операцией"""
+        self._timer.stop()
+        if not self._pending:
+            return
+        text = '\n'.join(self._pending)
+        self._pending.clear()
+        self.view.appendPlainText(text)
+        scrollbar = self.view.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def rerender(self) -> None:
+        """Перестраивает окно лога по текущим фильтру и режиму трассировки"""
+        self._pending.clear()
+        visible: Deque[str] = deque(maxlen=self.max_blocks)
+        for record in reversed(self._records):
+            if self._is_visible(record):
+                visible.appendleft(record[2])
+                if len(visible) == self.max_blocks:
+                    break
+        self.view.clear()
+        self._pending.extend(visible)
+        self.flush()
+
+    def clear(self) -> None:
+        """Очищает лог и сохраненные сообщения"""
+        self._records.clear()
+        self._pending.clear()
+        self._current_neuron = None
+        self.view.clear()
+
+    def toPlainText(self) -> str:
+        """Текст, выведенный в окно лога (с учетом еще не выведенных сообщений)"""
+        self.flush()
+        return self.view.toPlainText()
+
+    def _apply_filter(self) -> None:
+        text = self.filter_edit.text().strip()
+        match = NEURON_FILTER.fullmatch(text) if text else None
+        neuron_filter = (int(match.group(1)), int(match.group(2))) if match else None
+        if neuron_filter != self._neuron_filter:
+            self._neuron_filter = neuron_filter
+            self.rerender()
+
+    def _is_visible(self, record: Tuple[Optional[Tuple[int, int]], bool, str]) -> bool:
+        neuron, is_detail, _ = record
+        if self._neuron_filter is not None and neuron != self._neuron_filter:
+            return False
+        return not is_detail or self.details_checkbox.isChecked()
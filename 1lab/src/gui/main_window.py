@@ -1,19 +1,45 @@
+import os
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Tuple, Union
 
+import numpy as np
 from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import (QFileDialog, QHBoxLayout, QLabel, QLineEdit,
-                             QMainWindow, QMessageBox, QPushButton, QTextEdit,
-                             QVBoxLayout, QWidget)
+from PyQt6.QtWidgets import (QCheckBox, QComboBox, QFileDialog, QHBoxLayout, QLabel,
+                             QLineEdit, QMainWindow, QMessageBox, QProgressBar,
+                             QPushButton, QVBoxLayout, QWidget)
 
+from excel_generator.diff_table_creator import DiffTableCreator
 from excel_generator.error_table_creator import ErrorTableCreator
 from excel_generator.excel_creator import ExcelCreator
+from excel_generator.sweep_table_creator import SweepTableCreator
 from excel_generator.weight_correction_table_creator import \
     WeightCorrectionTableCreator
-from parsers.signal_parser import parse_input_signals
-from parsers.sum_parser import parse_weighted_sums
-from parsers.weight_parser import parse_neural_network_weights
-from utils.calculations import calculate_errors, calculate_new_weights
+from gui.heatmap_view import NetworkViewer
+from gui.log_follower import LogFollower
+from gui.log_loader import LogLoader
+from gui.log_view import LogView
+from parsers.log_reader import file_signature, is_compressed_log, log_stem
+from parsers.structured import StructuredLog, log_format, read_log_input
+from utils.checkpoint import (Checkpoint, checkpoint_from_pipeline, load_resume_point,
+                              resume_pipeline, save_checkpoint)
+from utils.optimizers import OPTIMIZER_NAMES
+from utils.pipeline import create_processing_pipeline
+from utils.planner import ExecutionPlan
+from utils.precision import DEFAULT_PRECISION
+from utils.registry import REGISTRY_ENV, RunRegistry, default_registry_path
+from utils.selection import NeuronSelection
+from utils.sweep import parse_grid, sweep_hyperparameters, sweep_to_dataframe
+from utils.weight_diff import DEFAULT_TOP_K
+
+# Целевое значение для коррекции весов, если поле t не заполнено
+DEFAULT_CORRECTION_TARGET = 0.69266
+# Фильтр диалогов выбора контрольной точки
+CHECKPOINT_FILTER = 'Контрольные точки сети (*.kpsnet)'
+# Начальные веса: контрольная точка или таблица новых весов предыдущей итерации
+RESUME_FILTER = 'Контрольные точки и таблицы новых весов (*.kpsnet *.xlsx)'
+# Фильтр выбора лога: текст или архивы (сжатие определяется по содержимому)
+LOG_FILTER = ('Логи симулятора (*.txt *.gz *.bz2 *.xz *.zst);;'
+              'Дампы симулятора (*.jsonl *.npz);;Все файлы (*)')
 
 
 class MainWindow(QMainWindow):
@@ -21,6 +47,21 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.input_file: Optional[Path] = None
         self.wi: Optional[float] = None
+        self.learning_rate: Optional[float] = None
+        self.follower: Optional[LogFollower] = None
+        # Фоновая загрузка выбранного файла
+        self.loader: Optional[LogLoader] = None
+        # План выполнения для выбранного файла (составляется при загрузке)
+        self.plan: Optional[ExecutionPlan] = None
+        # Таблицы, обновляемые при дописывании лога: этап -> параметр пути
+        self.followed_tables: Dict[str, str] = {}
+        # Загруженная контрольная точка (подставляется заново при смене
+        # выбора нейронов, от которого зависит разбор лога)
+        self.resumed_checkpoint: Optional[Checkpoint] = None
+        # Окно просмотра весов и ошибок
+        self.viewer: Optional[NetworkViewer] = None
+        self.pipeline = create_processing_pipeline(self.log)
+        self._register_table_stages()
         
         self.init_ui()
     
@@ -43,8 +84,31 @@ class MainWindow(QMainWindow):
         input_button.clicked.connect(self.select_input_file)
         input_layout.addWidget(self.input_path_edit)
         input_layout.addWidget(input_button)
+        self.follow_checkbox = QCheckBox('Следить за файлом')
+        self.follow_checkbox.setToolTip('Разбирать дописываемые симулятором данные '
+                                        'и обновлять созданные таблицы')
+        self.follow_checkbox.toggled.connect(self.toggle_following)
+        input_layout.addWidget(self.follow_checkbox)
         main_layout.addLayout(input_layout)
         
+        # Ход фонового разбора выбранного файла
+        self.load_progress = QProgressBar()
+        self.load_progress.setVisible(False)
+        main_layout.addWidget(self.load_progress)
+        
+        # Контрольные точки весов
+        checkpoint_layout = QHBoxLayout()
+        load_checkpoint_button = QPushButton('Загрузить веса из контрольной точки')
+        load_checkpoint_button.setToolTip('Веса и смещения берутся из контрольной точки или таблицы '
+                                          'новых весов предыдущей итерации, взвешенные суммы и '
+                                          'сигналы - из входного файла')
+        load_checkpoint_button.clicked.connect(self.load_checkpoint)
+        checkpoint_layout.addWidget(load_checkpoint_button)
+        save_checkpoint_button = QPushButton('Сохранить новые веса в контрольную точку')
+        save_checkpoint_button.clicked.connect(self.save_checkpoint)
+        checkpoint_layout.addWidget(save_checkpoint_button)
+        main_layout.addLayout(checkpoint_layout)
+        
         # Секция коэффициента крутизны
         wi_layout = QHBoxLayout()
         self.wi_edit = QLineEdit()
@@ -61,12 +125,63 @@ class MainWindow(QMainWindow):
         target_layout.addWidget(self.target_edit)
         main_layout.addLayout(target_layout)
         
+        # Секция скорости обучения
+        rate_layout = QHBoxLayout()
+        self.rate_edit = QLineEdit()
+        self.rate_edit.setPlaceholderText('По умолчанию равна коэффициенту крутизны...')
+        rate_layout.addWidget(QLabel('Скорость обучения (η):'))
+        rate_layout.addWidget(self.rate_edit)
+        main_layout.addLayout(rate_layout)
+        
+        # Секция выбора нейронов
+        selection_layout = QHBoxLayout()
+        self.selection_edit = QLineEdit()
+        self.selection_edit.setPlaceholderText('Все нейроны; например: 1:500-520,600; 2; top=20')
+        self.selection_edit.setToolTip('Слой:номера и диапазоны через запятую, слой целиком или '
+                                       'top=k - k нейронов с наибольшей ошибкой |γ|. Разбираются, '
+                                       'рассчитываются и выводятся в таблицы только выбранные нейроны')
+        selection_layout.addWidget(QLabel('Нейроны:'))
+        selection_layout.addWidget(self.selection_edit)
+        main_layout.addLayout(selection_layout)
+        
+        # Формат расчетных столбцов таблицы весов
+        mode_layout = QHBoxLayout()
+        self.value_mode_combo = QComboBox()
+        self.value_mode_combo.addItem('Формулы с вычисленными значениями', 'cached')
+        self.value_mode_combo.addItem('Только формулы', 'formulas')
+        self.value_mode_combo.addItem('Только значения', 'values')
+        mode_layout.addWidget(QLabel('Расчетные столбцы таблицы весов:'))
+        mode_layout.addWidget(self.value_mode_combo)
+        self.nonzero_checkbox = QCheckBox('Только ненулевые синапсы')
+        self.nonzero_checkbox.setToolTip('Не выводить удаленные при прореживании синапсы '
+                                         'в таблицу новых весов')
+        mode_layout.addWidget(self.nonzero_checkbox)
+        self.prune_checkbox = QCheckBox('Прореженная сеть')
+        self.prune_checkbox.setToolTip('Нулевые синапсы считаются удаленными: хранятся разреженно '
+                                       'и не корректируются')
+        mode_layout.addWidget(self.prune_checkbox)
+        self.registry_checkbox = QCheckBox('Записывать в реестр')
+        # Без явно заданного реестра (KPS_REGISTRY) запуски не записываются в домашний каталог
+        self.registry_checkbox.setChecked(bool(os.environ.get(REGISTRY_ENV)))
+        self.registry_checkbox.setToolTip('Сохранять параметры, ошибки и новые веса в реестр '
+                                          f'запусков {default_registry_path()}')
+        mode_layout.addWidget(self.registry_checkbox)
+        mode_layout.addWidget(QLabel('Правило коррекции:'))
+        self.optimizer_combo = QComboBox()
+        for key, name in OPTIMIZER_NAMES.items():
+            self.optimizer_combo.addItem(name, key)
+        mode_layout.addWidget(self.optimizer_combo)
+        self.float32_checkbox = QCheckBox('Расчет в float32')
+        self.float32_checkbox.setToolTip('Веса и коррекция в float32 (вдвое меньше памяти); '
+                                         'отклонение от расчета float64 выводится в лог')
+        mode_layout.addWidget(self.float32_checkbox)
+        main_layout.addLayout(mode_layout)
+        
         # Лог операций
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        self.log_text.setMinimumHeight(200)
+        self.log_view = LogView()
+        self.log_view.setMinimumHeight(200)
         main_layout.addWidget(QLabel('Лог операций:'))
-        main_layout.addWidget(self.log_text)
+        main_layout.addWidget(self.log_view)
         
         # Кнопки
         buttons_layout = QHBoxLayout()
@@ -86,6 +201,27 @@ class MainWindow(QMainWindow):
         correction_button.setMinimumHeight(40)
         buttons_layout.addWidget(correction_button)
         
+        diff_button = QPushButton('Отчет об изменении весов')
+        diff_button.setToolTip(f'Нормы изменений по слоям и {DEFAULT_TOP_K} синапсов '
+                               'с наибольшим изменением при коррекции')
+        diff_button.clicked.connect(self.process_weight_diff)
+        diff_button.setMinimumHeight(40)
+        buttons_layout.addWidget(diff_button)
+        
+        sweep_button = QPushButton('Перебор параметров')
+        sweep_button.setToolTip('Поля α, t и η принимают списки через ";" '
+                                'или диапазоны вида начало:конец:шаг')
+        sweep_button.clicked.connect(self.process_sweep)
+        sweep_button.setMinimumHeight(40)
+        buttons_layout.addWidget(sweep_button)
+        
+        viewer_button = QPushButton('Просмотр весов и ошибок')
+        viewer_button.setToolTip('Тепловые карты весов слоев и графики S, F\'(S), γ по нейронам '
+                                 'без создания книги Excel')
+        viewer_button.clicked.connect(self.show_network_viewer)
+        viewer_button.setMinimumHeight(40)
+        buttons_layout.addWidget(viewer_button)
+        
         main_layout.addLayout(buttons_layout)
         
         # Устанавливаем размер окна и показываем его
@@ -98,16 +234,114 @@ class MainWindow(QMainWindow):
             self,
             'Выберите входной файл',
             str(Path.home()),
-            'Текстовые файлы (*.txt)'
+            LOG_FILTER
         )
         if file_path:
+            self.follow_checkbox.setChecked(False)
             self.input_file = Path(file_path)
+            self.resumed_checkpoint = None
             self.input_path_edit.setText(str(self.input_file))
             self.log('Выбран входной файл: ' + str(self.input_file))
+            self.start_loading()
+    
+    def start_loading(self):
+        """
+        Запускает фоновую загрузку входного файла: обзор по началу файла
+        появляется сразу, разбор остального идет с индикатором хода.
+        """
+        self.cancel_loading()
+        self.loader = LogLoader(self.input_file, self)
+        self.loader.preview.connect(self.on_preview)
+        self.loader.planned.connect(self.on_planned)
+        self.loader.progress.connect(self.on_load_progress)
+        self.loader.loaded.connect(self.on_loaded)
+        self.loader.failed.connect(self.on_load_failed)
+        self.load_progress.setRange(0, 0)
+        self.load_progress.setVisible(True)
+        self.loader.start()
+    
+    def cancel_loading(self):
+        """Прерывает фоновую загрузку (например, при выборе другого файла)"""
+        if not self.loader:
+            return
+        self.loader.requestInterruption()
+        self.loader.wait()
+        self.loader.deleteLater()
+        self.loader = None
+        self.load_progress.setVisible(False)
+    
+    def on_preview(self, preview):
+        """Вывод обзора лога по началу файла"""
+        if self.sender() is not self.loader:
+            return
+        for line in preview.describe():
+            self.log(line)
+    
+    def on_planned(self, plan: ExecutionPlan):
+        """Вывод плана выполнения; режим разбора сохраняется для повторного чтения файла"""
+        if self.sender() is not self.loader:
+            return
+        self.plan = plan
+        for line in plan.describe():
+            self.log(line)
+        self.pipeline.set_param('parsing', plan.parsing)
+    
+    def on_load_progress(self, done: int, total: int):
+        """Обновление индикатора хода разбора"""
+        if self.sender() is not self.loader:
+            return
+        if total:
+            self.load_progress.setRange(0, 1000)
+            self.load_progress.setValue(min(done * 1000 // total, 1000))
+        self.load_progress.setFormat(f'Разбор файла: {done / (1 << 20):.0f} МБ'
+                                     + (' (%p%)' if total else ''))
+    
+    def on_loaded(self, signature, content: Union[str, StructuredLog], results):
+        """Передача текста (или дампа) и результатов фонового разбора в конвейер"""
+        if self.sender() is not self.loader:
+            return
+        self.loader.deleteLater()
+        self.loader = None
+        self.load_progress.setVisible(False)
+        try:
+            current = file_signature(self.input_file)
+        except OSError:
+            current = None
+        if current != signature:
+            self.log('Файл изменился во время разбора и будет прочитан заново при обработке')
+            return
+        (cycles, weights), weighted_sums, input_signals = results
+        self.pipeline.set_param('input_file', signature)
+        self.pipeline.set_value('content', content)
+        # При выборе нейронов лог разбирается заново по выбору из сохраненного текста
+        if self.pipeline.get_param('selection') is None:
+            self.pipeline.set_value('weighted_sums', weighted_sums)
+            self.pipeline.set_value('input_signals', input_signals)
+            if self.resumed_checkpoint is None:
+                self.pipeline.set_value('parsed_weights', (cycles, weights))
+        # Веса контрольной точки, загруженной во время разбора, сохраняются
+        if self.resumed_checkpoint is not None:
+            resume_pipeline(self.pipeline, self.resumed_checkpoint)
+        self.log(f'Файл разобран: циклов обучения {cycles}, нейронов с весами {len(weights)}, '
+                 f'взвешенных сумм {len(weighted_sums)}')
+    
+    def on_load_failed(self, message: str):
+        """Ошибка фоновой загрузки"""
+        if self.sender() is not self.loader:
+            return
+        self.loader.deleteLater()
+        self.loader = None
+        self.load_progress.setVisible(False)
+        self.log(f'Ошибка чтения файла: {message}')
+    
+    def closeEvent(self, event):
+        self.cancel_loading()
+        self.stop_following()
+        super().closeEvent(event)
     
     def get_output_file(self, suffix: str) -> Path:
         """Создает путь к выходному файлу на основе входного"""
-        input_stem = self.input_file.stem
+        input_stem = log_stem(self.input_file)
         return self.input_file.parent / f"{input_stem}_{suffix}.xlsx"
     
     def validate_wi(self) -> bool:
@@ -134,6 +368,16 @@ class MainWindow(QMainWindow):
             self.show_error('Ошибка', 'Некорректное целевое значение!')
             return None
     
+    def validate_learning_rate(self) -> bool:
+        """Проверка скорости обучения (пустое поле - η равна α)"""
+        try:
+            rate_text = self.rate_edit.text().strip().replace(',', '.')
+            self.learning_rate = float(rate_text) if rate_text else self.wi
+            return True
+        except ValueError:
+            self.show_error('Ошибка', 'Некорректное значение скорости обучения!')
+            return False
+    
     def validate_input_file(self) -> bool:
         """Проверка наличия входного файла"""
         if not self.input_file:
@@ -144,46 +388,135 @@ class MainWindow(QMainWindow):
             return False
         return True
     
-    def read_input_file(self) -> Optional[str]:
-        """Чтение входного файла"""
+    def read_input_file(self) -> Optional[Union[str, StructuredLog]]:
+        """Чтение входного файла: текст лога или структурированный дамп"""
         try:
-            # Сначала пробуем прочитать в UTF-8
-            with open(self.input_file, 'r', encoding='utf-8') as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # Если не получилось, читаем в CP1251
-            with open(self.input_file, 'r', encoding='cp1251') as f:
-                return f.read()
+            return read_log_input(self.input_file,
+                                  streaming=self.pipeline.get_param('parsing') == 'streaming')
         except Exception as e:
             self.show_error('Ошибка', f'Ошибка при чтении файла: {str(e)}')
             return None
     
+    def _register_table_stages(self):
+        """Регистрация этапов создания таблиц в конвейере"""
+        def weights_table(weights, weighted_sums, input_signals, table_selection, alpha, value_mode,
+                          weights_output):
+            excel_creator = ExcelCreator(weights, weighted_sums, input_signals, alpha, value_mode,
+                                         selection=table_selection,
+                                         merge_cells=self.plan.merge_cells if self.plan else None)
+            self.log_shards(excel_creator.create_table(str(weights_output)))
+            return weights_output
+        
+        def errors_table(errors, table_selection, errors_output):
+            error_creator = ErrorTableCreator(errors, table_selection)
+            error_creator.create_table(str(errors_output))
+            return errors_output
+        
+        def correction_table(weights, corrected, table_selection, nonzero_only, correction_output):
+            new_weights, new_biases = corrected
+            correction_creator = WeightCorrectionTableCreator(weights, new_weights, new_biases,
+                                                              nonzero_only, selection=table_selection)
+            self.log_shards(correction_creator.create_table(str(correction_output)))
+            return correction_output
+        
+        def diff_table(weight_diff, diff_output):
+            summary, top_changes = weight_diff
+            DiffTableCreator(summary, top_changes).create_table(str(diff_output))
+            return diff_output
+        
+        self.pipeline.add_stage('weights_table', weights_table,
+                                deps=('weights', 'weighted_sums', 'input_signals', 'table_selection'),
+                                params=('alpha', 'value_mode', 'weights_output'))
+        self.pipeline.add_stage('errors_table', errors_table,
+                                deps=('errors', 'table_selection'), params=('errors_output',))
+        self.pipeline.add_stage('correction_table', correction_table,
+                                deps=('weights', 'corrected', 'table_selection'),
+                                params=('nonzero_only', 'correction_output'))
+        self.pipeline.add_stage('diff_table', diff_table,
+                                deps=('weight_diff',), params=('diff_output',))
+    
+    def log_shards(self, files):
+        """Сообщает о таблице, разделенной на несколько книг"""
+        if len(files) > 1:
+            self.log(f'Таблица не помещается на лист Excel и разделена на {len(files)} книг(и): '
+                     + ', '.join(files))
+    
+    def prepare_pipeline(self, target: float = 0.0, use_selection: bool = True) -> bool:
+        """
+        Передает текущие параметры в конвейер.
+        
+        Этапы, не зависящие от изменившихся параметров, не пересчитываются:
+        например, при изменении α повторно используются прочитанный файл
+        и результаты разбора лога. В режиме слежения результаты разбора
+        поступают от LogFollower, и файл целиком не перечитывается.
+        
+        Args:
+            target: Целевое значение t
+            use_selection: Учитывать выбор нейронов (False - вся сеть, например
+                           для контрольной точки и перебора параметров)
+        """
+        if self.loader:
+            self.show_error('Ошибка', 'Файл еще разбирается, дождитесь окончания загрузки')
+            return False
+        selection = None
+        if use_selection:
+            try:
+                selection = NeuronSelection.parse(self.selection_edit.text())
+            except ValueError as e:
+                self.show_error('Ошибка', f'Некорректный выбор нейронов: {str(e)}')
+                return False
+        if not self.follower:
+            try:
+                self.pipeline.set_param('input_file', file_signature(self.input_file))
+            except OSError as e:
+                self.show_error('Ошибка', f'Ошибка при чтении файла: {str(e)}')
+                return False
+        if selection != self.pipeline.get_param('selection'):
+            self.pipeline.set_param('selection', selection)
+            # Разбор лога зависит от выбора; веса, полученные не разбором
+            # файла, подставляются заново (выбор применяется при расчете)
+            if self.follower:
+                self.push_follower_results({'cycles', 'weights', 'sums', 'signals'})
+            elif self.resumed_checkpoint is not None:
+                resume_pipeline(self.pipeline, self.resumed_checkpoint)
+        self.pipeline.set_params(
+            alpha=self.wi,
+            target=target,
+            value_mode=self.value_mode_combo.currentData(),
+            nonzero_only=self.nonzero_checkbox.isChecked(),
+            prune=self.prune_checkbox.isChecked(),
+            optimizer=self.optimizer_combo.currentData(),
+            precision='float32' if self.float32_checkbox.isChecked() else DEFAULT_PRECISION,
+            top_k=DEFAULT_TOP_K,
+            learning_rate=self.learning_rate if self.learning_rate is not None else self.wi,
+        )
+        return True
+    
+    def run_table_stage(self, stage: str, output_param: str, suffix: str) -> Path:
+        """
+        Получает результат этапа таблицы, пересоздавая файл, если он был удален.
+        """
+        output_file = self.get_output_file(suffix)
+        self.pipeline.set_param(output_param, output_file)
+        if self.follower:
+            self.followed_tables[stage] = output_param
+        if self.pipeline.is_cached(stage) and not output_file.exists():
+            self.pipeline.invalidate(stage)
+        if self.pipeline.is_cached(stage):
+            self.log('Входные данные и параметры не изменились, таблица актуальна')
+        return self.pipeline.get(stage)
+    
     def process_weights_table(self):
         """Создание таблицы весов"""
         if not self.validate_input_file() or not self.validate_wi():
             return
         
         try:
-            content = self.read_input_file()
-            if not content:
+            if not self.prepare_pipeline():
                 return
             
-            output_file = self.get_output_file('weights')
-            
-            # Парсим данные
-            self.log('Парсинг весов нейронной сети...')
-            _, weights = parse_neural_network_weights(content)
-            
-            self.log('Парсинг взвешенных сумм...')
-            weighted_sums = parse_weighted_sums(content)
-            
-            self.log('Парсинг входных сигналов...')
-            input_signals = parse_input_signals(content)
-            
-            # Создаем Excel файл
             self.log('Создание таблицы весов...')
-            excel_creator = ExcelCreator(weights, weighted_sums, input_signals, self.wi)
-            excel_creator.create_table(str(output_file))
+            output_file = self.run_table_stage('weights_table', 'weights_output', 'weights')
             
             self.log(f'Таблица весов создана: {output_file}')
             self.show_info('Успех', f'Таблица весов создана:\n{output_file}')
@@ -201,27 +534,11 @@ class MainWindow(QMainWindow):
             return
         
         try:
-            content = self.read_input_file()
-            if not content:
+            if not self.prepare_pipeline(target):
                 return
             
-            output_file = self.get_output_file('errors')
-            
-            # Парсим данные
-            self.log('Парсинг весов нейронной сети...')
-            _, weights = parse_neural_network_weights(content)
-            
-            self.log('Парсинг взвешенных сумм...')
-            weighted_sums = parse_weighted_sums(content)
-            
-            # Рассчитываем ошибки
-            self.log('Расчет ошибок...')
-            errors = calculate_errors(weighted_sums, weights, self.wi, target, self.log)
-            
-            # Создаем Excel файл
             self.log('Создание таблицы ошибок...')
-            error_creator = ErrorTableCreator(errors)
-            error_creator.create_table(str(output_file))
+            output_file = self.run_table_stage('errors_table', 'errors_output', 'errors')
             
             self.log(f'Таблица ошибок создана: {output_file}')
             self.show_info('Успех', f'Таблица ошибок создана:\n{output_file}')
@@ -231,61 +548,282 @@ class MainWindow(QMainWindow):
     
     def process_weight_correction(self):
         """Создание таблицы с новыми весами"""
-        if not self.validate_input_file() or not self.validate_wi():
+        if (not self.validate_input_file() or not self.validate_wi()
+                or not self.validate_learning_rate()):
             return
             
         target = self.validate_target()
         if target is None:
             return
+        if not self.target_edit.text().strip():
+            target = DEFAULT_CORRECTION_TARGET
         
         try:
-            content = self.read_input_file()
-            if not content:
+            if not self.prepare_pipeline(target):
                 return
             
-            output_file = self.get_output_file('weight_correction')
+            self.log('Создание таблицы новых весов...')
+            output_file = self.run_table_stage('correction_table', 'correction_output',
+                                               'weight_correction')
             
-            # Парсим данные
-            self.log('Парсинг весов нейронной сети...')
-            _, weights = parse_neural_network_weights(content)
+            self.log(f'Таблица новых весов создана: {output_file}')
+            report = self.pipeline.get('precision_report')
+            if report is not None:
+                for line in report.describe():
+                    self.log(line)
+            if self.registry_checkbox.isChecked():
+                self.record_run()
+            self.show_info('Успех', f'Таблица новых весов создана:\n{output_file}')
             
-            self.log('Парсинг взвешенных сумм...')
-            weighted_sums = parse_weighted_sums(content)
+        except Exception as e:
+            self.show_error('Ошибка', f'Произошла ошибка при обработке данных: {str(e)}')
+    
+    def record_run(self):
+        """Запись результатов коррекции в реестр запусков"""
+        try:
+            with RunRegistry() as registry:
+                run_id = registry.record_pipeline(self.pipeline)
+            self.log(f'Запуск записан в реестр {registry.path} (№ {run_id})')
+        except Exception as e:
+            self.log(f'Не удалось записать запуск в реестр: {str(e)}')
+    
+    def process_weight_diff(self):
+        """Создание отчета об изменении весов при коррекции"""
+        if (not self.validate_input_file() or not self.validate_wi()
+                or not self.validate_learning_rate()):
+            return
             
-            self.log('Парсинг входных сигналов...')
-            input_signals = parse_input_signals(content)
+        target = self.validate_target()
+        if target is None:
+            return
+        if not self.target_edit.text().strip():
+            target = DEFAULT_CORRECTION_TARGET
+        
+        try:
+            if not self.prepare_pipeline(target):
+                return
             
-            # Создаем словарь смещений (все равны 1.0)
-            biases = {(layer, neuron): 1.0 
-                     for layer in [1, 2] 
-                     for neuron in range(1, 11 if layer == 1 else 2)}
+            self.log('Создание отчета об изменении весов...')
+            output_file = self.run_table_stage('diff_table', 'diff_output', 'weight_diff')
             
-            # Рассчитываем ошибки
-            self.log('Расчет ошибок...')
-            errors = calculate_errors(weighted_sums, weights, self.wi, 0.69266, self.log)
+            summary, _ = self.pipeline.get('weight_diff')
+            total = summary.iloc[-1]
+            self.log(f"||ΔW|| = {total['||ΔW||']:.8f}, max |Δw| = {total['max |Δw|']:.8f}")
+            self.log(f'Отчет об изменении весов создан: {output_file}')
+            self.show_info('Успех', f'Отчет об изменении весов создан:\n{output_file}')
             
-            # Рассчитываем новые веса
-            self.log('Расчет новых весов...')
-            new_weights, new_biases = calculate_new_weights(
-                weights, biases, errors, input_signals, self.wi, self.log
-            )
+        except Exception as e:
+            self.show_error('Ошибка', f'Произошла ошибка при обработке данных: {str(e)}')
+    
+    def show_network_viewer(self):
+        """Окно просмотра весов слоев и векторов S, F'(S), γ по нейронам"""
+        if not self.validate_input_file() or not self.validate_wi():
+            return
+        target = self.validate_target()
+        if target is None:
+            return
+        try:
+            if not self.prepare_pipeline(target):
+                return
+            network = self.pipeline.get('network')
+            weighted_sums = self.pipeline.get('weighted_sums')
+            errors = self.pipeline.get('errors')
+        except Exception as e:
+            self.show_error('Ошибка', f'Произошла ошибка при обработке данных: {str(e)}')
+            return
+        
+        items = []
+        for layer, matrix in enumerate(network.layers, 1):
+            items.append((f'Веса слоя {layer} ({matrix.shape[0]} нейронов × {matrix.shape[1]} входов)',
+                          matrix, False,
+                          lambda row, col, value, layer=layer:
+                              f'Нейрон[{layer}][{row + 1}], синапс {col + 1}: w = {value:.8g}'))
+        # Векторы по нейронам слоев; NaN - значение не рассчитано (например, при выборе нейронов)
+        for layer, size in enumerate(network.topology[1:], 1):
+            vectors = {name: np.full(size, np.nan) for name in ('S', "F'(S)", 'γ')}
+            for (key_layer, neuron), value in weighted_sums.items():
+                if key_layer == layer and neuron <= size:
+                    vectors['S'][neuron - 1] = value
+            for (key_layer, neuron), (_, derivative, error) in errors.items():
+                if key_layer == layer and neuron <= size:
+                    vectors["F'(S)"][neuron - 1] = derivative
+                    vectors['γ'][neuron - 1] = error
+            for name, vector in vectors.items():
+                items.append((f'{name} слоя {layer}', vector, True,
+                              lambda row, col, value, layer=layer, name=name:
+                                  f'Нейрон[{layer}][{col + 1}]: {name} = {value:.8g}'))
+        if self.viewer is not None:
+            self.viewer.close()
+        self.viewer = NetworkViewer(items, self)
+        self.viewer.show()
+    
+    def process_sweep(self):
+        """Перебор параметров α, η и t с созданием сводной таблицы"""
+        if not self.validate_input_file():
+            return
+        
+        try:
+            alphas = parse_grid(self.wi_edit.text())
+            targets = parse_grid(self.target_edit.text() or str(DEFAULT_CORRECTION_TARGET))
+            rates = parse_grid(self.rate_edit.text()) if self.rate_edit.text().strip() else alphas
+        except ValueError as e:
+            self.show_error('Ошибка', f'Некорректная сетка параметров: {str(e)}')
+            return
+        
+        try:
+            self.wi = alphas[0]
+            if not self.prepare_pipeline(use_selection=False):
+                return
             
-            # Создаем Excel файл
-            self.log('Создание таблицы новых весов...')
-            correction_creator = WeightCorrectionTableCreator(
-                weights, new_weights, new_biases
+            count = len(alphas) * len(rates) * len(targets)
+            self.log(f'Перебор {count} комбинаций параметров...')
+            result = sweep_hyperparameters(
+                self.pipeline.get('weights'),
+                self.pipeline.get('weighted_sums'),
+                self.pipeline.get('input_signals'),
+                alphas, rates, targets
             )
-            correction_creator.create_table(str(output_file))
             
-            self.log(f'Таблица новых весов создана: {output_file}')
-            self.show_info('Успех', f'Таблица новых весов создана:\n{output_file}')
+            output_file = self.get_output_file('sweep')
+            SweepTableCreator(sweep_to_dataframe(result, alphas, rates, targets)).create_table(str(output_file))
+            
+            self.log(f'Сводная таблица перебора создана: {output_file}')
+            self.show_info('Успех', f'Сводная таблица перебора создана:\n{output_file}')
             
         except Exception as e:
             self.show_error('Ошибка', f'Произошла ошибка при обработке данных: {str(e)}')
     
+    def load_checkpoint(self):
+        """Подстановка весов из контрольной точки вместо весов из лога"""
+        if not self.validate_input_file():
+            return
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, 'Выберите контрольную точку', str(self.input_file.parent), RESUME_FILTER)
+        if not file_path:
+            return
+        try:
+            checkpoint = load_resume_point(file_path)
+            if not self.follower:
+                # Сигнатура файла задается заранее, чтобы подставленные веса
+                # не были сброшены при следующем запуске
+                self.pipeline.set_param('input_file', file_signature(self.input_file))
+            resume_pipeline(self.pipeline, checkpoint)
+            self.resumed_checkpoint = checkpoint
+            if checkpoint.alpha is not None:
+                self.wi_edit.setText(str(checkpoint.alpha))
+            if checkpoint.learning_rate is not None:
+                self.rate_edit.setText(str(checkpoint.learning_rate))
+            self.log(f'Загружена контрольная точка: {file_path} '
+                     f'(топология {checkpoint.topology}, цикл {checkpoint.cycle})')
+        except Exception as e:
+            self.show_error('Ошибка', f'Ошибка при загрузке контрольной точки: {str(e)}')
+    
+    def save_checkpoint(self):
+        """Сохранение скорректированных весов в контрольную точку"""
+        if (not self.validate_input_file() or not self.validate_wi()
+                or not self.validate_learning_rate()):
+            return
+        target = self.validate_target()
+        if target is None:
+            return
+        if not self.target_edit.text().strip():
+            target = DEFAULT_CORRECTION_TARGET
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 'Сохранить контрольную точку',
+            str(self.input_file.parent / f'{log_stem(self.input_file)}.kpsnet'), CHECKPOINT_FILTER)
+        if not file_path:
+            return
+        try:
+            if not self.prepare_pipeline(target, use_selection=False):
+                return
+            save_checkpoint(file_path, checkpoint_from_pipeline(self.pipeline))
+            self.log(f'Контрольная точка сохранена: {file_path}')
+        except Exception as e:
+            self.show_error('Ошибка', f'Ошибка при сохранении контрольной точки: {str(e)}')
+    
+    def toggle_following(self, enabled: bool):
+        """Включение и выключение слежения за входным файлом"""
+        if enabled:
+            if not self.validate_input_file():
+                self.follow_checkbox.setChecked(False)
+                return
+            if is_compressed_log(self.input_file):
+                self.show_error('Ошибка', 'Слежение за сжатым логом невозможно: '
+                                          'дописанные данные нельзя распаковать отдельно')
+                self.follow_checkbox.setChecked(False)
+                return
+            if log_format(self.input_file) != 'text':
+                self.show_error('Ошибка', 'Слежение возможно только за текстовым логом трассировки')
+                self.follow_checkbox.setChecked(False)
+                return
+            # Слежение разбирает файл само
+            self.cancel_loading()
+            self.start_following()
+        else:
+            self.stop_following()
+    
+    def start_following(self):
+        """Начало слежения за дописываемым логом"""
+        self.follower = LogFollower(self.input_file, self)
+        self.follower.updated.connect(self.on_log_updated)
+        self.follower.failed.connect(lambda message: self.log(f'Ошибка чтения файла: {message}'))
+        self.followed_tables = {}
+        self.follower.start()
+        self.on_log_updated({'cycles', 'weights', 'sums', 'signals'})
+        self.log(f'Слежение за файлом включено: {self.input_file}')
+    
+    def stop_following(self):
+        """Прекращение слежения; следующий запуск перечитает файл целиком"""
+        if not self.follower:
+            return
+        self.follower.stop()
+        self.follower.deleteLater()
+        self.follower = None
+        self.followed_tables = {}
+        self.pipeline.invalidate('content')
+        self.log('Слежение за файлом выключено')
+    
+    def on_log_updated(self, changed: set):
+        """
+        Передает в конвейер новые результаты разбора и обновляет таблицы,
+        созданные в режиме слежения.
+        """
+        cycles, weights, weighted_sums = self.push_follower_results(changed)
+        
+        if not self.followed_tables:
+            return
+        log_func, self.pipeline.log_func = self.pipeline.log_func, None
+        try:
+            for stage in self.followed_tables:
+                self.pipeline.get(stage)
+            self.log(f'Лог дописан (циклов: {cycles}, нейронов с весами: {len(weights)}, '
+                     f'взвешенных сумм: {len(weighted_sums)}), таблицы обновлены')
+        except Exception as e:
+            self.log(f'Не удалось обновить таблицы: {str(e)}')
+        finally:
+            self.pipeline.log_func = log_func
+    
+    def push_follower_results(self, changed: set) -> Tuple[Optional[int], dict, dict]:
+        """
+        Передает в конвейер результаты разбора LogFollower.
+        
+        Returns:
+            Tuple: Число циклов, веса и взвешенные суммы
+        """
+        (cycles, weights), weighted_sums, input_signals = self.follower.parser.results()
+        # Парсер продолжает дополнять свои словари, в конвейер передаются копии
+        if changed & {'cycles', 'weights'}:
+            self.pipeline.set_value('parsed_weights', (cycles, dict(weights)))
+        if 'sums' in changed:
+            self.pipeline.set_value('weighted_sums', dict(weighted_sums))
+        if 'signals' in changed:
+            self.pipeline.set_value('input_signals', list(input_signals))
+        return cycles, weights, weighted_sums
+    
     def log(self, message: str):
         """Добавление сообщения в лог"""
-        self.log_text.append(message)
+        self.log_view.append(message)
     
     def show_error(self, title: str, message: str):
         """Показ сообщения об ошибке"""
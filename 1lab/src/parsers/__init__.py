@@ -1,5 +1,11 @@
 from .weight_parser import parse_neural_network_weights
 from .signal_parser import parse_input_signals
 from .sum_parser import parse_weighted_sums
+from .stream_parser import IncrementalLogParser, parse_log_file
+from .numeric import decode_numbers
+from .preview import LogPreview, preview_dump, preview_log
+from .structured import StructuredLog, read_log_input, save_structured
 
-__all__ = ['parse_neural_network_weights', 'parse_input_signals', 'parse_weighted_sums'] 
\ No newline at end of file
+__all__ = ['parse_neural_network_weights', 'parse_input_signals', 'parse_weighted_sums',
+           'IncrementalLogParser', 'parse_log_file', 'decode_numbers', 'LogPreview', 'preview_dump',
+           'preview_log', 'StructuredLog', 'read_log_input', 'save_structured'] 
\ No newline at end of file
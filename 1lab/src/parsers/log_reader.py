@@ -0,0 +1,251 @@
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # zstd - необязательная зависимость
+    zstandard = None
+
+# Размер блока при чтении дописанной части лога
+TAIL_CHUNK_SIZE = 1 << 20
+# Сигнатуры сжатых логов (первые байты файла)
+COMPRESSION_MAGIC = {
+    'gzip': b'\x1f\x8b',
+    'bz2': b'BZh',
+    'xz': b'\xfd7zXZ\x00',
+    'zstd': b'\x28\xb5\x2f\xfd',
+}
+# Расширения сжатых логов (для имен выходных файлов и фильтра диалога)
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz', '.zst')
+
+
+def detect_compression(header: bytes) -> Optional[str]:
+    """
+    Определяет формат сжатия по первым байтам файла.
+
+    Args:
+        header: Начало файла (не меньше 6 байт)
+
+    Returns:
+        Optional[str]: 'gzip', 'bz2', 'xz', 'zstd' или None для несжатого лога
+    """
+    for name, magic in COMPRESSION_MAGIC.items():
+        if header.startswith(magic):
+            return name
+    return None
+
+
+def _zstd_decompressor():
+    if zstandard is None:
+        raise ValueError('Для чтения логов, сжатых zstd, установите пакет zstandard')
+    return zstandard.ZstdDecompressor()
+
+
+def open_log(path: Union[str, Path]) -> BinaryIO:
+    """
+    Открывает лог для чтения байтов; сжатый лог распаковывается на лету.
+
+    Формат сжатия определяется по сигнатуре, а не по расширению. Распакованные
+    данные читаются блоками из потока и не записываются во временный файл.
+
+    Args:
+        path: Путь к файлу лога (обычному или сжатому gzip, bz2, xz, zstd)
+
+    Returns:
+        BinaryIO: Поток распакованных байтов
+    """
+    with open(path, 'rb') as f:
+        compression = detect_compression(f.read(8))
+    if compression is None:
+        return open(path, 'rb')
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'bz2':
+        return bz2.open(path, 'rb')
+    if compression == 'xz':
+        return lzma.open(path, 'rb')
+    decompressor = _zstd_decompressor()
+    return io.BufferedReader(decompressor.stream_reader(open(path, 'rb'), read_across_frames=True,
+                                                        closefd=True))
+
+
+def is_compressed_log(path: Union[str, Path]) -> bool:
+    """Проверяет по сигнатуре, сжат ли лог"""
+    with open(path, 'rb') as f:
+        return detect_compression(f.read(8)) is not None
+
+
+def log_stem(path: Union[str, Path]) -> str:
+    """Имя лога без расширений сжатия и текста (run.txt.gz -> run)"""
+    path = Path(path)
+    if path.suffix.lower() in COMPRESSED_SUFFIXES:
+        path = path.with_suffix('')
+    return path.stem
+
+
+def read_log_text(path: Union[str, Path]) -> str:
+    """
+    Читает лог симулятора целиком.
+
+    Сначала пробует кодировку UTF-8, при ошибке декодирования - CP1251.
+    Сжатые логи распаковываются при чтении (см. open_log).
+
+    Args:
+        path: Путь к файлу лога
+
+    Returns:
+        str: Содержимое файла
+    """
+    try:
+        with io.TextIOWrapper(open_log(path), encoding='utf-8') as f:
+            return f.read()
+    except UnicodeDecodeError:
+        with io.TextIOWrapper(open_log(path), encoding='cp1251') as f:
+            return f.read()
+
+
+def iter_log_text(path: Union[str, Path], chunk_size: int = TAIL_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Читает лог по частям для потокового парсера (IncrementalLogParser).
+
+    Сжатый лог распаковывается блоками, поэтому в памяти не хранится ни
+    распакованный файл, ни весь его текст.
+
+    Args:
+        path: Путь к файлу лога
+        chunk_size: Размер блока распакованных байтов
+
+    Returns:
+        Iterator[str]: Фрагменты текста
+    """
+    decoder = LogDecoder()
+    with open_log(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield decoder.decode(chunk)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def decode_log_bytes(data: bytes) -> str:
+    """
+    Декодирует содержимое лога, полученное не из файла (например, по сети).
+
+    Сжатые данные распаковываются; кодировка определяется так же, как в
+    read_log_text; переводы строк приводятся к '\\n', как при чтении
+    файла в текстовом режиме.
+    """
+    compression = detect_compression(data[:8])
+    if compression == 'gzip':
+        data = gzip.decompress(data)
+    elif compression == 'bz2':
+        data = bz2.decompress(data)
+    elif compression == 'xz':
+        data = lzma.decompress(data)
+    elif compression == 'zstd':
+        with _zstd_decompressor().stream_reader(io.BytesIO(data), read_across_frames=True) as stream:
+            data = stream.read()
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        text = data.decode('cp1251')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def file_signature(path: Union[str, Path]) -> Tuple[str, int, int]:
+    """
+    Возвращает сигнатуру файла (путь, время изменения, размер).
+
+    Сигнатура меняется при любом изменении файла на диске и используется
+    как параметр конвейера вместо самого содержимого.
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        Tuple[str, int, int]: Путь, время изменения в наносекундах и размер
+    """
+    stat = Path(path).stat()
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+class LogDecoder:
+    """
+    Инкрементальное декодирование лога: UTF-8, при ошибке - переход на
+    CP1251 вместе с недекодированным остатком. Многобайтовый символ,
+    разрезанный на границе блока, дочитывается со следующим блоком.
+    """
+
+    def __init__(self):
+        self.encoding = 'utf-8'
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def decode(self, chunk: bytes, final: bool = False) -> str:
+        try:
+            return self._decoder.decode(chunk, final)
+        except UnicodeDecodeError:
+            if self.encoding != 'utf-8':
+                raise
+            # Лог не в UTF-8: переходим на CP1251 вместе с недекодированным остатком
+            pending, _ = self._decoder.getstate()
+            self.encoding = 'cp1251'
+            self._decoder = codecs.getincrementaldecoder('cp1251')()
+            return self._decoder.decode(pending + chunk, final)
+
+
+class LogTail:
+    """
+    Чтение дописываемого лога по частям.
+
+    Запоминает смещение последнего прочитанного байта и состояние
+    декодера, поэтому каждый вызов poll читает только новые данные.
+    Многобайтовый символ UTF-8, разрезанный на границе записи, дочитывается
+    при следующем вызове. Сжатые логи не поддерживаются: дописанные
+    данные нельзя распаковать без чтения файла с начала.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.offset = 0
+        self._decoder = LogDecoder()
+
+    def poll(self) -> Tuple[bool, str]:
+        """
+        Читает данные, дописанные после предыдущего вызова.
+
+        Returns:
+            Tuple[bool, str]: Признак того, что файл был перезаписан
+            (чтение начато с начала), и новый текст
+        """
+        restarted = False
+        size = self.path.stat().st_size
+        if size < self.offset:
+            # Файл усечен или перезаписан - начинаем заново
+            self.offset = 0
+            self._decoder = LogDecoder()
+            restarted = True
+
+        parts = []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                chunk = f.read(TAIL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                parts.append(self._decoder.decode(chunk))
+        return restarted, ''.join(parts)
+
+    @property
+    def encoding(self) -> str:
+        """Кодировка лога, определенная по прочитанным данным"""
+        return self._decoder.encoding
+
@@ -0,0 +1,51 @@
+import warnings
+from typing import Sequence, Union
+
+import numpy as np
+
+# Замена десятичной запятой на точку за один проход по тексту
+DECIMAL_COMMA = str.maketrans(',', '.')
+DECIMAL_COMMA_BYTES = bytes.maketrans(b',', b'.')
+
+
+def decode_numbers(spans: Union[Sequence[str], str, bytes]) -> np.ndarray:
+    """
+    Преобразует числа лога с десятичной запятой в массив float.
+
+    Все значения секции склеиваются в одну строку, запятые заменяются
+    точками одним вызовом translate, и строка разбирается целиком
+    np.fromstring - без отдельных строк и float() на каждое число.
+    Если в данных встретилось некорректное значение, числа разбираются
+    по одному, чтобы ошибка указывала на это значение.
+
+    Args:
+        spans: Захваченные значения (список строк) или текст/байты,
+               в которых числа разделены пробельными символами
+
+    Returns:
+        np.ndarray: Значения в исходном порядке
+    """
+    if isinstance(spans, bytes):
+        text = spans.translate(DECIMAL_COMMA_BYTES).decode('ascii')
+    elif isinstance(spans, str):
+        text = spans.translate(DECIMAL_COMMA)
+    else:
+        if not spans:
+            return np.empty(0)
+        text = ' '.join(spans).translate(DECIMAL_COMMA)
+
+    with warnings.catch_warnings():
+        # При нечисловом значении fromstring выдает предупреждение и
+        # возвращает только разобранную часть
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            values = np.fromstring(text, dtype=float, sep=' ')
+        except (DeprecationWarning, ValueError):
+            values = None
+    if isinstance(spans, (str, bytes)):
+        if values is None:
+            values = np.array([float(value) for value in text.split()], dtype=float)
+    elif values is None or values.size != len(spans):
+        values = np.array([float(span.translate(DECIMAL_COMMA)) for span in spans], dtype=float)
+    return values
+
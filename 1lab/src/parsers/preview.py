@@ -0,0 +1,137 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from parsers.log_reader import LogDecoder, detect_compression, open_log
+from parsers.stream_parser import IncrementalLogParser
+from parsers.structured import StructuredLog, log_format, read_log_input
+
+# Объем начала и конца файла, по которым строится предварительный обзор
+PREVIEW_HEAD_SIZE = 1 << 20
+PREVIEW_TAIL_SIZE = 256 << 10
+# Число первых нейронов с весами в обзоре
+PREVIEW_NEURONS = 3
+
+NEURON_HEADER_PATTERN = re.compile(r'Нейрон\[(\d+)\]\[(\d+)\]')
+
+
+class LogPreview:
+    """
+    Предварительный обзор лога по его началу и концу.
+
+    Начало файла разбирается потоковым парсером (циклы обучения, первые
+    нейроны, входные сигналы, если они успели встретиться); у несжатого
+    файла дополнительно просматривается конец, где прямой проход
+    заканчивается последними нейронами слоев. Размеры слоев - наибольшие
+    номера нейронов, встреченные в этих частях файла.
+    """
+
+    def __init__(self, path: Path, size: int, compression: Optional[str], complete: bool,
+                 cycles: Optional[int], layers: Dict[int, int],
+                 first_neurons: List[Tuple[Tuple[int, int], List[float]]],
+                 input_signals: List[float]):
+        self.path = path
+        self.size = size
+        self.compression = compression
+        self.complete = complete
+        self.cycles = cycles
+        self.layers = layers
+        self.first_neurons = first_neurons
+        self.input_signals = input_signals
+
+    def describe(self) -> List[str]:
+        """Строки обзора для вывода в лог операций"""
+        source = 'весь файл' if self.complete else 'начало и конец файла'
+        if self.compression and not self.complete:
+            source = f'начало файла (сжат {self.compression})'
+        lines = [f'Предварительный обзор {self.path.name} ({self.size / (1 << 20):.1f} МБ, '
+                 f'по данным: {source}):']
+        lines.append(f'  Циклов обучения: {self.cycles if self.cycles is not None else "не найдено"}')
+        if self.layers:
+            bound = '' if self.complete else 'не менее '
+            lines.append('  Нейронов по слоям: ' + ', '.join(
+                f'слой {layer} - {bound}{count}' for layer, count in sorted(self.layers.items())))
+        else:
+            lines.append('  Заголовки нейронов не найдены - возможно, выбран не лог симулятора')
+        for (layer, neuron), weights in self.first_neurons:
+            shown = ', '.join(f'{w:.6g}' for w in weights[:5])
+            more = f' ... (всего {len(weights)})' if len(weights) > 5 else ''
+            lines.append(f'  Нейрон[{layer}][{neuron}]: {shown}{more}')
+        if self.input_signals:
+            lines.append('  Входные сигналы: ' + ', '.join(f'{x:.6g}' for x in self.input_signals))
+        else:
+            lines.append('  Входные сигналы: в начале файла не найдены')
+        return lines
+
+
+def preview_log(path: Union[str, Path], head_size: int = PREVIEW_HEAD_SIZE,
+                tail_size: int = PREVIEW_TAIL_SIZE) -> LogPreview:
+    """
+    Строит обзор лога, читая только его начало и (для несжатого файла) конец.
+
+    Args:
+        path: Путь к файлу лога
+        head_size: Объем начала файла (распакованных байтов)
+        tail_size: Объем конца файла
+
+    Returns:
+        LogPreview: Обзор лога
+    """
+    path = Path(path)
+    if log_format(path) != 'text':
+        return preview_dump(path, read_log_input(path))
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        compression = detect_compression(f.read(8))
+
+    decoder = LogDecoder()
+    parser = IncrementalLogParser()
+    with open_log(path) as f:
+        head = f.read(head_size)
+        complete = not f.read(1)
+    parser.feed(decoder.decode(head, final=complete))
+    if complete:
+        parser.finish()
+    (cycles, weights), weighted_sums, input_signals = parser.results()
+
+    layers: Dict[int, int] = {}
+    for layer, neuron in list(weights) + list(weighted_sums):
+        layers[layer] = max(layers.get(layer, 0), neuron)
+    if not complete and compression is None:
+        with open(path, 'rb') as f:
+            f.seek(max(size - tail_size, 0))
+            tail = f.read().decode(decoder.encoding, errors='replace')
+        for match in NEURON_HEADER_PATTERN.finditer(tail):
+            layer, neuron = int(match.group(1)), int(match.group(2))
+            layers[layer] = max(layers.get(layer, 0), neuron)
+    # Слой 0 - входы сети, а не нейроны
+    layers.pop(0, None)
+
+    first_neurons = [(key, weights[key]) for key in list(weights)[:PREVIEW_NEURONS]]
+    return LogPreview(path, size, compression, complete, cycles, layers, first_neurons,
+                      list(input_signals))
+
+
+def preview_dump(path: Union[str, Path], dump: StructuredLog) -> LogPreview:
+    """
+    Обзор структурированного дампа: дамп загружается целиком быстрее, чем
+    разбирается начало текстового лога, поэтому обзор строится по всему файлу.
+
+    Args:
+        path: Путь к файлу дампа
+        dump: Загруженный дамп (см. read_log_input)
+
+    Returns:
+        LogPreview: Обзор дампа
+    """
+    path = Path(path)
+    with open(path, 'rb') as f:
+        compression = detect_compression(f.read(8))
+    layers: Dict[int, int] = {}
+    for layer, neuron in list(dump.weights) + list(dump.weighted_sums):
+        layers[layer] = max(layers.get(layer, 0), neuron)
+    layers.pop(0, None)
+    first_neurons = [(key, dump.weights[key]) for key in list(dump.weights)[:PREVIEW_NEURONS]]
+    return LogPreview(path, os.path.getsize(path), compression, True, dump.cycles, layers,
+                      first_neurons, list(dump.input_signals))
@@ -1,5 +1,9 @@
 from typing import List
 
+from parsers.numeric import decode_numbers
+
+SIGNAL_COUNT = 3
+
 def parse_input_signals(file_content: str) -> List[float]:
     """
     Парсит входные сигналы из файла.
@@ -10,11 +14,12 @@ def parse_input_signals(file_content: str) -> List[float]:
     Returns:
         List[float]: Список входных сигналов
     """
-    signals = []
+    spans = []
     
     for line in file_content.split('\n'):
         if 'Аксон = ' in line:
-            value = float(line.split('=')[1].strip().replace(',', '.'))
-            signals.append(value)
+            spans.append(line.split('=')[1].strip())
+            if len(spans) == SIGNAL_COUNT:
+                break  # Нужны только первые три сигнала
     
-    return signals[:3]  # Возвращаем только первые три сигнала 
\ No newline at end of file
+    return decode_numbers(spans).tolist() 
\ No newline at end of file
@@ -0,0 +1,162 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from parsers.log_reader import iter_log_text
+from parsers.numeric import decode_numbers
+
+NEURON_PATTERN = re.compile(r'Нейрон\[(\d+)\]\[(\d+)\]')
+WEIGHT_PATTERN = re.compile(r'w\[[\d,\s]+\]\s*=\s*([-\d,.]+)')
+SUM_PATTERN = re.compile(r'Взвешенная сумма = ([-\d.,]+)')
+CYCLES_PATTERN = re.compile(r'Циклов обучения: (\d+)')
+
+INIT_START = 'Инициализация весов синапсов'
+INIT_END = 'Выбираем допустимый образ'
+SIGNAL_MARKER = 'Аксон = '
+SIGNAL_COUNT = 3
+
+
+class IncrementalLogParser:
+    """
+    Потоковый парсер лога симулятора.
+
+    Принимает текст частями (feed) и хранит состояние между вызовами,
+    поэтому каждый фрагмент разбирается один раз. Результаты совпадают с
+    parse_neural_network_weights, parse_weighted_sums и parse_input_signals;
+    веса нейрона становятся доступны, когда в логе начинается следующий
+    нейрон или заканчивается секция инициализации весов.
+    """
+
+    def __init__(self):
+        self.training_cycles: Optional[int] = None
+        self.weights: Dict[Tuple[int, int], List[float]] = {}
+        self.weighted_sums: Dict[Tuple[int, int], float] = {}
+        self.input_signals: List[float] = []
+
+        self._pending = ''
+        self._init_state = 'before'  # before -> inside -> done
+        self._init_neuron: Optional[Tuple[int, int]] = None
+        self._init_spans: List[str] = []
+        self._sum_neuron: Optional[Tuple[int, int]] = None
+        self.lines_parsed = 0
+
+    def feed(self, text: str) -> Set[str]:
+        """
+        Разбирает очередной фрагмент текста.
+
+        Незавершенная последняя строка откладывается до следующего вызова.
+
+        Args:
+            text: Новый фрагмент лога
+
+        Returns:
+            Set[str]: Изменившиеся результаты ('cycles', 'weights', 'sums', 'signals')
+        """
+        data = self._pending + text
+        lines = data.split('\n')
+        self._pending = lines.pop()
+        changed = set()
+        for line in lines:
+            self._parse_line(line.rstrip('\r'), changed)
+        return changed
+
+    def finish(self) -> Set[str]:
+        """Разбирает отложенную незавершенную строку (конец файла)"""
+        changed = set()
+        if self._pending:
+            line, self._pending = self._pending, ''
+            self._parse_line(line.rstrip('\r'), changed)
+        return changed
+
+    def results(self) -> Tuple[Tuple[Optional[int], Dict[Tuple[int, int], List[float]]],
+                               Dict[Tuple[int, int], float], List[float]]:
+        """
+        Возвращает текущие результаты разбора.
+
+        Returns:
+            Tuple: ((циклы обучения, веса), взвешенные суммы, входные сигналы) -
+            в формате функций модуля parsers
+        """
+        return (self.training_cycles, self.weights), self.weighted_sums, self.input_signals
+
+    def _parse_line(self, line: str, changed: Set[str]) -> None:
+        self.lines_parsed += 1
+
+        if self.training_cycles is None:
+            cycles_match = CYCLES_PATTERN.search(line)
+            if cycles_match:
+                self.training_cycles = int(cycles_match.group(1))
+                changed.add('cycles')
+
+        self._parse_init_line(line, changed)
+
+        # Взвешенные суммы: значение относится к последнему заголовку нейрона
+        stripped = line.strip()
+        neuron_match = NEURON_PATTERN.search(stripped)
+        if neuron_match:
+            self._sum_neuron = (int(neuron_match.group(1)), int(neuron_match.group(2)))
+        elif 'Нейрон[' in stripped:
+            self._sum_neuron = None
+        elif self._sum_neuron is not None:
+            sum_match = SUM_PATTERN.search(stripped)
+            if sum_match:
+                self.weighted_sums[self._sum_neuron] = float(sum_match.group(1).replace(',', '.'))
+                changed.add('sums')
+
+        if len(self.input_signals) < SIGNAL_COUNT and SIGNAL_MARKER in line:
+            self.input_signals.append(float(line.split('=')[1].strip().replace(',', '.')))
+            changed.add('signals')
+
+    def _parse_init_line(self, line: str, changed: Set[str]) -> None:
+        if self._init_state == 'done':
+            return
+        if self._init_state == 'before':
+            start = line.find(INIT_START)
+            if start < 0:
+                return
+            self._init_state = 'inside'
+            line = line[start:]
+
+        end = line.find(INIT_END)
+        if end >= 0:
+            line = line[:end]
+
+        neuron_match = NEURON_PATTERN.search(line)
+        if neuron_match:
+            self._commit_init_neuron(changed)
+            self._init_neuron = (int(neuron_match.group(1)), int(neuron_match.group(2)))
+            line = line[neuron_match.end():]
+        if self._init_neuron is not None:
+            self._init_spans.extend(WEIGHT_PATTERN.findall(line))
+
+        if end >= 0:
+            self._commit_init_neuron(changed)
+            self._init_state = 'done'
+
+    def _commit_init_neuron(self, changed: Set[str]) -> None:
+        if self._init_neuron is None:
+            return
+        # Значения нейрона преобразуются одним вызовом; последний вес -
+        # вес смещения, он не сохраняется
+        self.weights[self._init_neuron] = decode_numbers(self._init_spans[:-1]).tolist()
+        self._init_neuron = None
+        self._init_spans = []
+        changed.add('weights')
+
+
+def parse_log_file(path: Union[str, Path]) -> IncrementalLogParser:
+    """
+    Разбирает лог потоково, блок за блоком; сжатый лог распаковывается
+    на лету (см. parsers.log_reader.iter_log_text).
+
+    Args:
+        path: Путь к файлу лога
+
+    Returns:
+        IncrementalLogParser: Парсер с результатами разбора (см. results)
+    """
+    parser = IncrementalLogParser()
+    for text in iter_log_text(path):
+        parser.feed(text)
+    parser.finish()
+    return parser
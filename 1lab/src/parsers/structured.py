@@ -0,0 +1,253 @@
+"""
+Структурированные дампы симулятора вместо текстового лога трассировки.
+
+JSON Lines (.jsonl) - по объекту JSON на строку; вид записи определяется
+ее ключами, записи могут идти в любом порядке:
+    {"cycles": 5}
+    {"inputs": [0.1, -0.6, -0.8]}
+    {"layer": 1, "neuron": 1, "weights": [0.5, -0.2, 0.7], "sum": 1.06}
+Веса нейрона - без веса смещения; "weights" и "sum" необязательны.
+
+NumPy (.npz) - массивы cycles (число), inputs (входные сигналы),
+weights_<слой> (нейроны × входы) и sums_<слой> (по нейрону; NaN - сумма
+не записана).
+
+Формат определяется по содержимому файла (сигнатура zip у .npz, "{" в
+начале .jsonl, в том числе после распаковки), а не по расширению.
+"""
+import io
+import json
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from parsers.log_reader import decode_log_bytes, open_log, read_log_text
+from parsers.stream_parser import parse_log_file
+
+# Сигнатура zip-архива (.npz)
+NPZ_MAGIC = b'PK\x03\x04'
+# Расширения структурированных дампов (для имен выходных файлов и фильтра диалога)
+STRUCTURED_SUFFIXES = ('.jsonl', '.npz')
+LAYER_ARRAY_PATTERN = re.compile(r'^(weights|sums)_(\d+)$')
+
+NeuronFilter = Optional[Callable[[Tuple[int, int]], bool]]
+
+
+class StructuredLog:
+    """
+    Содержимое структурированного дампа.
+
+    Методы возвращают те же объекты, что и функции разбора текстового
+    лога (parse_neural_network_weights, parse_weighted_sums,
+    parse_input_signals), включая отбор нейронов neuron_filter.
+    """
+
+    def __init__(self, cycles: Optional[int], weights: Dict[Tuple[int, int], List[float]],
+                 weighted_sums: Dict[Tuple[int, int], float], input_signals: List[float]):
+        self.cycles = cycles
+        self.weights = weights
+        self.weighted_sums = weighted_sums
+        self.input_signals = input_signals
+
+    def parse_weights(self, neuron_filter: NeuronFilter = None
+                      ) -> Tuple[Optional[int], Dict[Tuple[int, int], List[float]]]:
+        """Аналог parse_neural_network_weights"""
+        if neuron_filter is None:
+            return self.cycles, dict(self.weights)
+        return self.cycles, {key: values if neuron_filter(key) else []
+                             for key, values in self.weights.items()}
+
+    def parse_sums(self, neuron_filter: NeuronFilter = None) -> Dict[Tuple[int, int], float]:
+        """Аналог parse_weighted_sums"""
+        if neuron_filter is None:
+            return dict(self.weighted_sums)
+        return {key: value for key, value in self.weighted_sums.items() if neuron_filter(key)}
+
+    def parse_signals(self) -> List[float]:
+        """Аналог parse_input_signals"""
+        return list(self.input_signals)
+
+    def results(self) -> Tuple[Tuple[Optional[int], Dict[Tuple[int, int], List[float]]],
+                               Dict[Tuple[int, int], float], List[float]]:
+        """Результаты в формате IncrementalLogParser.results"""
+        return (self.cycles, self.weights), self.weighted_sums, self.input_signals
+
+
+def detect_log_format(head: bytes) -> str:
+    """
+    Определяет формат входного файла по его (распакованному) началу.
+
+    Returns:
+        str: 'npz', 'jsonl' или 'text'
+    """
+    if head.startswith(NPZ_MAGIC):
+        return 'npz'
+    if head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'{'):
+        return 'jsonl'
+    return 'text'
+
+
+def log_format(path: Union[str, Path]) -> str:
+    """Формат входного файла: 'npz', 'jsonl' или 'text' (сжатый лог распаковывается)"""
+    with open(path, 'rb') as f:
+        if f.read(4) == NPZ_MAGIC:
+            return 'npz'
+    with open_log(path) as f:
+        return detect_log_format(f.read(64))
+
+
+def parse_jsonl(lines) -> StructuredLog:
+    """
+    Разбирает дамп JSON Lines.
+
+    Args:
+        lines: Итерируемые строки (str или bytes)
+
+    Returns:
+        StructuredLog: Содержимое дампа
+    """
+    cycles = None
+    weights = {}
+    sums = {}
+    signals = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f'Строка {number} дампа не является JSON: {e}')
+        if 'cycles' in record:
+            cycles = int(record['cycles'])
+        if 'inputs' in record:
+            signals = [float(x) for x in record['inputs']]
+        if 'layer' in record:
+            key = (int(record['layer']), int(record['neuron']))
+            if 'weights' in record:
+                weights[key] = [float(w) for w in record['weights']]
+            if record.get('sum') is not None:
+                sums[key] = float(record['sum'])
+    return StructuredLog(cycles, weights, sums, signals)
+
+
+def parse_npz(source) -> StructuredLog:
+    """
+    Загружает дамп .npz.
+
+    Args:
+        source: Путь или файловый объект
+
+    Returns:
+        StructuredLog: Содержимое дампа
+    """
+    weights = {}
+    sums = {}
+    with np.load(source, allow_pickle=False) as data:
+        cycles = int(data['cycles']) if 'cycles' in data.files else None
+        signals = np.asarray(data['inputs'], dtype=float).tolist() if 'inputs' in data.files else []
+        layers = sorted((int(match.group(2)), match.group(1), name) for name in data.files
+                        for match in [LAYER_ARRAY_PATTERN.match(name)] if match)
+        for layer, kind, name in layers:
+            array = np.asarray(data[name], dtype=float)
+            if kind == 'weights':
+                if array.ndim != 2:
+                    raise ValueError(f'Массив {name} должен быть матрицей нейроны × входы')
+                weights.update(zip(((layer, neuron) for neuron in range(1, len(array) + 1)),
+                                   array.tolist()))
+            else:
+                for neuron, value in enumerate(array.ravel().tolist(), 1):
+                    if value == value:  # NaN - сумма не записана
+                        sums[(layer, neuron)] = value
+    return StructuredLog(cycles, weights, sums, signals)
+
+
+def read_log_input(path: Union[str, Path], streaming: bool = False) -> Union[str, StructuredLog]:
+    """
+    Читает входной файл: текст лога трассировки или структурированный дамп.
+
+    Args:
+        path: Путь к файлу (лог, .jsonl или .npz, в том числе сжатые)
+        streaming: Разобрать текстовый лог потоково (IncrementalLogParser) и
+                   вернуть результаты как StructuredLog, не храня текст целиком
+
+    Returns:
+        Union[str, StructuredLog]: Текст лога или содержимое дампа
+    """
+    kind = log_format(path)
+    if kind == 'npz':
+        return parse_npz(path)
+    if kind == 'jsonl':
+        with open_log(path) as f:
+            return parse_jsonl(f)
+    if streaming:
+        (cycles, weights), weighted_sums, input_signals = parse_log_file(path).results()
+        return StructuredLog(cycles, weights, weighted_sums, input_signals)
+    return read_log_text(path)
+
+
+def decode_log_input(data: bytes) -> Union[str, StructuredLog]:
+    """
+    Декодирует входные данные, полученные не из файла (например, по сети):
+    текст лога (см. decode_log_bytes) или структурированный дамп.
+    """
+    if data.startswith(NPZ_MAGIC):
+        return parse_npz(io.BytesIO(data))
+    text = decode_log_bytes(data)
+    if detect_log_format(text[:64].encode('utf-8')) == 'jsonl':
+        return parse_jsonl(text.splitlines())
+    return text
+
+
+def save_structured(path: Union[str, Path], cycles: Optional[int],
+                    weights: Dict[Tuple[int, int], List[float]],
+                    weighted_sums: Dict[Tuple[int, int], float],
+                    input_signals: List[float]) -> None:
+    """
+    Сохраняет результаты разбора лога в дамп .npz или .jsonl (по расширению).
+
+    Args:
+        path: Выходной файл
+        cycles: Число циклов обучения
+        weights: Словарь весов нейронов
+        weighted_sums: Словарь взвешенных сумм
+        input_signals: Входные сигналы
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.npz':
+        arrays = {'inputs': np.asarray(input_signals, dtype=float)}
+        if cycles is not None:
+            arrays['cycles'] = np.asarray(cycles)
+        for layer in sorted({layer for layer, _ in weights} | {layer for layer, _ in weighted_sums}):
+            keys = [key for key in weights if key[0] == layer]
+            if keys:
+                count = max(neuron for _, neuron in keys)
+                width = max(len(weights[key]) for key in keys)
+                matrix = np.zeros((count, width))
+                for _, neuron in keys:
+                    row = weights[(layer, neuron)]
+                    matrix[neuron - 1, :len(row)] = row
+                arrays[f'weights_{layer}'] = matrix
+            sum_keys = [neuron for l, neuron in weighted_sums if l == layer]
+            if sum_keys:
+                vector = np.full(max(sum_keys), np.nan)
+                for neuron in sum_keys:
+                    vector[neuron - 1] = weighted_sums[(layer, neuron)]
+                arrays[f'sums_{layer}'] = vector
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+    elif path.suffix.lower() == '.jsonl':
+        with open(path, 'w', encoding='utf-8') as f:
+            if cycles is not None:
+                f.write(json.dumps({'cycles': cycles}) + '\n')
+            f.write(json.dumps({'inputs': list(input_signals)}) + '\n')
+            for key in sorted(set(weights) | set(weighted_sums)):
+                record = {'layer': key[0], 'neuron': key[1]}
+                if key in weights:
+                    record['weights'] = weights[key]
+                if key in weighted_sums:
+                    record['sum'] = weighted_sums[key]
+                f.write(json.dumps(record) + '\n')
+    else:
+        raise ValueError(f'Дамп сохраняется в .npz или .jsonl, получено {path.suffix}')
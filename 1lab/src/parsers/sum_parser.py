@@ -1,39 +1,51 @@
 import re
-from typing import Dict, Tuple
+from typing import Callable, Dict, Optional, Tuple
 
-def parse_weighted_sums(file_content: str) -> Dict[Tuple[int, int], float]:
+from parsers.numeric import decode_numbers
+
+def parse_weighted_sums(file_content: str,
+                        neuron_filter: Optional[Callable[[Tuple[int, int]], bool]] = None
+                        ) -> Dict[Tuple[int, int], float]:
     """
     Парсит взвешенные суммы из файла.
     
     Args:
         file_content (str): Содержимое файла
+        neuron_filter: Функция (слой, нейрон) → нужна ли сумма нейрона;
+                       строки остальных нейронов не просматриваются
         
     Returns:
         Dict[Tuple[int, int], float]: Словарь взвешенных сумм для каждого нейрона
     """
     sums = {}
-    current_layer = None
-    current_neuron = None
+    keys = []
+    spans = []
     
-    lines = file_content.split('\n')
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        neuron_match = re.search(r'Нейрон\[(\d+)\]\[(\d+)\]', line)
-        if neuron_match:
-            current_layer = int(neuron_match.group(1))
-            current_neuron = int(neuron_match.group(2))
-            i += 1
-            while i < len(lines):
-                current_line = lines[i].strip()
-                if 'Нейрон[' in current_line:
-                    break
-                sum_match = re.search(r'Взвешенная сумма = ([-\d.,]+)', current_line)
-                if sum_match:
-                    sum_value = float(sum_match.group(1).replace(',', '.'))
-                    sums[(current_layer, current_neuron)] = sum_value
-                i += 1
+    # Текст нейрона - строки после строки заголовка "Нейрон[l][n]" до
+    # строки со следующим "Нейрон["
+    header_pattern = re.compile(r'(\d+)\]\[(\d+)\]')
+    sum_pattern = re.compile(r'Взвешенная сумма = ([-\d.,]+)')
+    chunks = file_content.split('Нейрон[')
+    last = len(chunks) - 1
+    for index in range(1, len(chunks)):
+        neuron_text = chunks[index]
+        header = header_pattern.match(neuron_text)
+        if not header:
+            continue
+        key = (int(header.group(1)), int(header.group(2)))
+        if neuron_filter is not None and not neuron_filter(key):
             continue
-        i += 1
+        body_start = neuron_text.find('\n', header.end())
+        if body_start < 0:
+            continue
+        # Начало строки со следующим заголовком к нейрону не относится
+        body_end = len(neuron_text) if index == last else neuron_text.rfind('\n')
+        for value in sum_pattern.findall(neuron_text, body_start, body_end):
+            keys.append(key)
+            spans.append(value)
+    
+    # Значения преобразуются одним вызовом; при повторе берется последнее
+    for key, value in zip(keys, decode_numbers(spans).tolist()):
+        sums[key] = value
     
-    return sums 
\ No newline at end of file
+    return sums
@@ -1,13 +1,20 @@
 import re
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
+from parsers.numeric import decode_numbers
 
-def parse_neural_network_weights(text: str) -> Tuple[int, Dict[Tuple[int, int], List[float]]]:
+
+def parse_neural_network_weights(text: str,
+                                  neuron_filter: Optional[Callable[[Tuple[int, int]], bool]] = None
+                                  ) -> Tuple[int, Dict[Tuple[int, int], List[float]]]:
     """
     Парсит веса нейронной сети из текста.
     
     Args:
         text (str): Текст с данными нейронной сети
+        neuron_filter: Функция (слой, нейрон) → нужны ли веса нейрона. Веса
+                       остальных нейронов не разбираются: в словаре для них
+                       пустой список, чтобы размеры слоев не менялись
         
     Returns:
         Tuple[int, Dict]: Кортеж из количества циклов обучения и словаря весов
@@ -18,33 +25,38 @@ def parse_neural_network_weights(text: str) -> Tuple[int, Dict[Tuple[int, int],
     cycles_match = re.search(r'Циклов обучения: (\d+)', text)
     training_cycles = int(cycles_match.group(1)) if cycles_match else None
     
-    # Ищем секцию инициализации весов
-    init_section = re.search(r'Инициализация весов синапсов.*?(?=Выбираем допустимый образ)', text, re.DOTALL)
-    if init_section:
-        init_text = init_section.group(0)
+    # Ищем секцию инициализации весов (от начала секции до первого
+    # "Выбираем допустимый образ" после него)
+    init_start = text.find('Инициализация весов синапсов')
+    init_end = text.find('Выбираем допустимый образ', init_start + len('Инициализация весов синапсов'))
+    if init_start >= 0 and init_end >= 0:
+        init_text = text[init_start:init_end]
+        
+        # Паттерны заголовка нейрона (после "Нейрон[") и весов
+        header_pattern = re.compile(r'(\d+)\]\[(\d+)\]')
+        weight_pattern = re.compile(r'w\[[\d,\s]+\]\s*=\s*([-\d,.]+)')
         
-        # Паттерн для поиска информации о нейроне
-        neuron_pattern = r'Нейрон\[(\d+)\]\[(\d+)\](.*?)(?=Нейрон\[|$)'
+        # Текст нейрона продолжается до следующего "Нейрон["; значения
+        # весов всех нейронов собираются в один список
+        neurons = []  # (ключ, номер первого веса, число весов)
+        spans = []
+        for neuron_text in init_text.split('Нейрон[')[1:]:
+            header = header_pattern.match(neuron_text)
+            if not header:
+                continue
+            key = (int(header.group(1)), int(header.group(2)))
+            if neuron_filter is not None and not neuron_filter(key):
+                neurons.append((key, len(spans), 0))
+                continue
+            found = weight_pattern.findall(neuron_text, header.end())
+            neurons.append((key, len(spans), len(found)))
+            spans.extend(found)
         
-        # Находим все нейроны
-        neurons = re.finditer(neuron_pattern, init_text, re.DOTALL)
+        # Преобразуем все значения секции одним вызовом
+        values = decode_numbers(spans)
         
-        for neuron in neurons:
-            layer = int(neuron.group(1))
-            number = int(neuron.group(2))
-            neuron_text = neuron.group(3)
-            
-            # Паттерн для поиска весов
-            weight_pattern = r'w\[[\d,\s]+\]\s*=\s*([-\d,.]+)'
-            
-            # Находим все веса для текущего нейрона
-            weights_values = re.findall(weight_pattern, neuron_text)
-            
-            # Преобразуем строковые значения в float, заменяя запятую на точку
-            weights_values = [float(w.replace(',', '.')) for w in weights_values]
-            
+        for key, start, count in neurons:
             # Сохраняем веса в словарь (без веса смещения)
-            key = (layer, number)
-            weights[key] = weights_values[:-1]
+            weights[key] = values[start:start + max(count - 1, 0)].tolist()
     
     return training_cycles, weights 
\ No newline at end of file
@@ -0,0 +1,361 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import resource_tracker
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from utils.shared_arrays import SharedArrays
+
+# Максимальный размер загружаемого лога
+MAX_UPLOAD_SIZE = 256 << 20
+# Размер блока при отправке ответа
+RESPONSE_CHUNK_SIZE = 1 << 16
+# Таблицы, которые может вернуть сервис, и суффиксы их файлов
+TABLES = {
+    'weights': 'weights',
+    'errors': 'errors',
+    'correction': 'weight_correction',
+    'diff': 'weight_diff',
+}
+DEFAULT_TARGET = 0.69266
+XLSX_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _warm_worker() -> None:
+    """
+    Инициализация процесса пула: импорт pandas и генераторов таблиц
+    выполняется один раз при запуске процесса, а не в каждом запросе.
+    """
+    import pandas  # noqa: F401
+
+    import excel_generator.diff_table_creator  # noqa: F401
+    import excel_generator.error_table_creator  # noqa: F401
+    import excel_generator.excel_creator  # noqa: F401
+    import excel_generator.weight_correction_table_creator  # noqa: F401
+    import utils.pipeline  # noqa: F401
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def process_log(data: bytes, params: Dict[str, object]) -> List[Tuple[str, bytes]]:
+    """
+    Обрабатывает лог в процессе пула: разбор → расчет → таблицы.
+
+    Args:
+        data: Содержимое лога или структурированного дампа (.jsonl, .npz)
+        params: alpha, target, learning_rate, optimizer, value_mode, tables, name
+
+    Returns:
+        List[Tuple[str, bytes]]: Имена и содержимое созданных книг
+    """
+    from excel_generator.diff_table_creator import DiffTableCreator
+    from excel_generator.error_table_creator import ErrorTableCreator
+    from excel_generator.excel_creator import ExcelCreator
+    from excel_generator.weight_correction_table_creator import \
+        WeightCorrectionTableCreator
+    from parsers.structured import decode_log_input
+    from utils.pipeline import create_processing_pipeline
+    from utils.weight_diff import DEFAULT_TOP_K
+
+    pipeline = create_processing_pipeline()
+    pipeline.set_value('content', decode_log_input(data))
+    pipeline.set_params(alpha=params['alpha'], target=params['target'],
+                        learning_rate=params['learning_rate'], optimizer=params['optimizer'],
+                        top_k=DEFAULT_TOP_K)
+    if not pipeline.get('weights'):
+        raise ValueError('В логе не найдены веса нейронов')
+
+    result = []
+    with tempfile.TemporaryDirectory() as directory:
+        for table in params['tables']:
+            output_file = str(Path(directory) / f"{params['name']}_{TABLES[table]}.xlsx")
+            if table == 'weights':
+                files = ExcelCreator(pipeline.get('weights'), pipeline.get('weighted_sums'),
+                                     pipeline.get('input_signals'), params['alpha'],
+                                     params['value_mode']).create_table(output_file)
+            elif table == 'errors':
+                ErrorTableCreator(pipeline.get('errors')).create_table(output_file)
+                files = [output_file]
+            elif table == 'correction':
+                new_weights, new_biases = pipeline.get('corrected')
+                files = WeightCorrectionTableCreator(pipeline.get('weights'), new_weights,
+                                                     new_biases).create_table(output_file)
+            else:
+                summary, top_changes = pipeline.get('weight_diff')
+                DiffTableCreator(summary, top_changes).create_table(output_file)
+                files = [output_file]
+            for file in files:
+                result.append((Path(file).name, Path(file).read_bytes()))
+    return result
+
+
+def process_shared_log(descriptor, params: Dict[str, object]) -> List[Tuple[str, bytes]]:
+    """
+    process_log для лога, загруженного в разделяемую память: процессу пула
+    передается описание блока, а не содержимое лога.
+    """
+    with SharedArrays.attach(descriptor) as upload:
+        data = upload['data'].tobytes()
+    return process_log(data, params)
+
+
+def parse_request_params(query: str) -> Dict[str, object]:
+    """
+    Разбирает параметры запроса: alpha (обязателен), target, rate, optimizer,
+    value_mode, tables (через запятую), name.
+
+    Returns:
+        Dict[str, object]: Параметры обработки
+    """
+    from excel_generator.excel_creator import VALUE_MODES
+    from parsers.log_reader import log_stem
+    from utils.optimizers import OPTIMIZERS
+
+    values = {key: items[-1] for key, items in parse_qs(query).items()}
+
+    def number(key: str, default: Optional[float] = None) -> Optional[float]:
+        text = values.get(key, '').strip().replace(',', '.')
+        if not text:
+            return default
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f'Некорректное значение параметра {key}: {values[key]}')
+
+    alpha = number('alpha')
+    if alpha is None:
+        raise ValueError('Не задан коэффициент крутизны alpha')
+    tables = [t for t in values.get('tables', 'correction').split(',') if t]
+    unknown = [t for t in tables if t not in TABLES]
+    if unknown or not tables:
+        raise ValueError(f"Неизвестные таблицы {', '.join(unknown)}, допустимы: {', '.join(TABLES)}")
+    optimizer = values.get('optimizer', 'sgd')
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"Неизвестное правило коррекции {optimizer}")
+    value_mode = values.get('value_mode', 'cached')
+    if value_mode not in VALUE_MODES:
+        raise ValueError(f"Неизвестный режим записи {value_mode}")
+    name = log_stem(values.get('name', 'log')) or 'log'
+    return {
+        'alpha': alpha,
+        'target': number('target', DEFAULT_TARGET),
+        'learning_rate': number('rate', alpha),
+        'optimizer': optimizer,
+        'value_mode': value_mode,
+        'tables': list(dict.fromkeys(tables)),
+        'name': name,
+    }
+
+
+class ProcessingService:
+    """
+    Пул процессов обработки с ограничением очереди.
+
+    Одновременно выполняется не больше workers задач; еще до queue_size
+    задач ожидают в очереди. Запросы сверх этого отклоняются сразу, чтобы
+    клиент мог повторить их позже, а не ждать неограниченно.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: int = 16):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        # Процессы пула наследуют resource_tracker основного процесса: блоки
+        # загрузок (SharedArrays) учитывает только он, и удаляет их владелец
+        resource_tracker.ensure_running()
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_warm_worker)
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.processed = 0
+
+    def warm_up(self) -> List[int]:
+        """Запускает все процессы пула заранее; возвращает их PID"""
+        futures = [self.executor.submit(_ping) for _ in range(self.workers)]
+        return sorted({future.result() for future in futures})
+
+    def submit(self, data: Union[bytes, SharedArrays],
+               params: Dict[str, object]) -> Optional[List[Tuple[str, bytes]]]:
+        """
+        Выполняет обработку в пуле.
+
+        Args:
+            data: Содержимое лога или блок разделяемой памяти с массивом 'data'
+                  (в процесс пула передается только описание блока)
+            params: Параметры обработки (parse_request_params)
+
+        Returns:
+            Optional[List]: Созданные книги или None, если очередь заполнена
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        with self._lock:
+            self.in_flight += 1
+        try:
+            if isinstance(data, SharedArrays):
+                return self.executor.submit(process_shared_log, data.descriptor, params).result()
+            return self.executor.submit(process_log, data, params).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.processed += 1
+            self._slots.release()
+
+    def status(self) -> Dict[str, int]:
+        """Состояние пула"""
+        with self._lock:
+            return {'workers': self.workers, 'queue_size': self.queue_size,
+                    'in_flight': self.in_flight, 'processed': self.processed}
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    POST /process?alpha=1&target=0.69266&rate=0.3&tables=weights,correction -
+    тело запроса содержит лог; ответ - книга .xlsx или архив .zip, если книг
+    несколько. GET /health - состояние пула в JSON.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'KPSService/1.0'
+
+    def do_GET(self):
+        if urlparse(self.path).path != '/health':
+            self.send_error_json(HTTPStatus.NOT_FOUND, 'Неизвестный адрес')
+            return
+        self.send_json(HTTPStatus.OK, self.server.service.status())
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/process':
+            self.send_error_json(HTTPStatus.NOT_FOUND, 'Неизвестный адрес')
+            return
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.send_error_json(HTTPStatus.LENGTH_REQUIRED, 'Требуется заголовок Content-Length')
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, 'Некорректный заголовок Content-Length')
+            self.close_connection = True
+            return
+        if length > MAX_UPLOAD_SIZE:
+            self.send_error_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                 f'Размер лога превышает {MAX_UPLOAD_SIZE} байт')
+            self.close_connection = True
+            return
+        # Тело читается сразу в разделяемую память, откуда его берет процесс пула
+        with SharedArrays.create({'data': ((length,), np.uint8)}) as upload:
+            received = self.rfile.readinto(memoryview(upload['data'])) if length else 0
+            if received < length:
+                self.send_error_json(HTTPStatus.BAD_REQUEST, 'Тело запроса короче Content-Length')
+                self.close_connection = True
+                return
+            try:
+                params = parse_request_params(url.query)
+            except ValueError as e:
+                self.send_error_json(HTTPStatus.BAD_REQUEST, str(e))
+                return
+            try:
+                files = self.server.service.submit(upload, params)
+            except ValueError as e:
+                self.send_error_json(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+                return
+            except Exception as e:
+                self.send_error_json(HTTPStatus.INTERNAL_SERVER_ERROR, f'Ошибка обработки: {e}')
+                return
+        if files is None:
+            self.send_error_json(HTTPStatus.SERVICE_UNAVAILABLE, 'Очередь обработки заполнена',
+                                 {'Retry-After': '1'})
+            return
+
+        if len(files) == 1:
+            name, body = files[0]
+            content_type = XLSX_TYPE
+        else:
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for file_name, content in files:
+                    archive.writestr(file_name, content)
+            name, body = f"{params['name']}_tables.zip", buffer.getvalue()
+            content_type = 'application/zip'
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Content-Disposition', f'attachment; filename="{name}"')
+        self.end_headers()
+        view = memoryview(body)
+        for start in range(0, len(body), RESPONSE_CHUNK_SIZE):
+            self.wfile.write(view[start:start + RESPONSE_CHUNK_SIZE])
+
+    def send_json(self, status: HTTPStatus, payload: Dict[str, object],
+                  headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: HTTPStatus, message: str,
+                        headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_json(status, {'error': message}, headers)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ServiceServer(ThreadingHTTPServer):
+    """HTTP-сервер: по потоку на соединение, обработка - в пуле процессов"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: ProcessingService, verbose: bool = False):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+        self.verbose = verbose
+
+
+def serve(host: str = '127.0.0.1', port: int = 8765, workers: Optional[int] = None,
+          queue_size: int = 16, verbose: bool = False) -> None:
+    """
+    Запускает сервис обработки логов.
+
+    Args:
+        host: Адрес для приема соединений
+        port: Порт
+        workers: Число процессов пула (по умолчанию - число ядер)
+        queue_size: Число задач, ожидающих свободный процесс
+        verbose: Выводить журнал запросов
+    """
+    service = ProcessingService(workers, queue_size)
+    pids = service.warm_up()
+    server = ServiceServer((host, port), service, verbose)
+    print(f'Сервис запущен: http://{host}:{server.server_address[1]} '
+          f'(процессов: {len(pids)}, очередь: {queue_size})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
@@ -1,6 +1,8 @@
 import math
 from typing import Callable, Dict, List, Tuple
 
+from utils.selection import NeuronSelection
+
 
 def calculate_derivative(s: float, alpha: float, log_func: Callable[[str], None] = None) -> float:
     """
@@ -55,7 +57,8 @@ def calculate_errors(weighted_sums: Dict[Tuple[int, int], float],
                      weights: Dict[Tuple[int, int], List[float]],
                      alpha: float,
                      target: float = 0.0,
-                     log_func: Callable[[str], None] = None) -> Dict[Tuple[int, int], Tuple[float, float, float]]:
+                     log_func: Callable[[str], None] = None,
+                     selection: NeuronSelection = None) -> Dict[Tuple[int, int], Tuple[float, float, float]]:
     """
     Рассчитывает ошибки для всех нейронов сети.
     
@@ -68,6 +71,12 @@ def calculate_errors(weighted_sums: Dict[Tuple[int, int], float],
       (если сеть с одним выходным нейроном, то γ_eff(i) = γ_выход * w[i])
       Затем:
          γ_i = γ_eff(i) * F'(S_i)
+    
+    Без выбора нейронов рассчитываются нейроны 1..10 скрытого слоя. При
+    выборе (selection) рассчитываются только выбранные нейроны скрытого
+    слоя (γ выходного нейрона нужен им в любом случае), а при top_k -
+    оставляются нейроны с наибольшим |γ|; трассировка выводится только
+    для оставленных нейронов.
     """
     results = {}
     
@@ -92,7 +101,8 @@ def calculate_errors(weighted_sums: Dict[Tuple[int, int], float],
         log_func(f"Фактический выход y = 2/(1+e^(-αS))-1 = {output_y}")
     
     output_error = calculate_output_error(output_y, target, output_derivative, log_func)
-    results[(2, 1)] = (output_s, output_derivative, output_error)
+    if selection is None or selection.contains((2, 1)):
+        results[(2, 1)] = (output_s, output_derivative, output_error)
     
     # Для скрытого слоя (слой 1)
     if log_func:
@@ -103,7 +113,26 @@ def calculate_errors(weighted_sums: Dict[Tuple[int, int], float],
     # Получаем веса, ведущие к выходному нейрону.
     # Предполагается, что weights[(2, 1)] — это список весов связей от нейронов скрытого слоя (индексы 0..N-1)
     output_weights = weights.get((2, 1), [])
-    for i in range(1, 11):  # для 10 нейронов скрытого слоя
+    # Число нейронов скрытого слоя - по данным лога (и без выбора, и с ним)
+    n_hidden = max([len(output_weights)] + [n for l, n in weighted_sums if l == 1])
+    if selection is None:
+        hidden = range(1, n_hidden + 1)
+    else:
+        hidden = selection.neurons(1, n_hidden)
+        if selection.top_k is not None:
+            # Сначала γ всех кандидатов без трассировки, затем трассировка
+            # только оставленных нейронов
+            candidates = dict(results)
+            for i in hidden:
+                s = weighted_sums.get((1, i), 0.0)
+                w = output_weights[i-1] if i <= len(output_weights) else 0.0
+                derivative = calculate_derivative(s, alpha)
+                candidates[(1, i)] = (s, derivative, calculate_hidden_error(output_error * w, derivative))
+            top = selection.select_top(candidates)
+            hidden = [i for i in hidden if (1, i) in top]
+            if (2, 1) not in top:
+                results.pop((2, 1), None)
+    for i in hidden:
         if log_func:
             log_func(f"\nНЕЙРОН [1][{i}]")
             log_func("-"*30)
@@ -172,17 +201,50 @@ def calculate_new_bias(old_bias: float,
         log_func(f"  Новое смещение T_j(t+1) = {new_bias}")
     return new_bias
 
+def build_neuron_inputs(input_signals: List[float],
+                        weighted_sums: Dict[Tuple[int, int], float],
+                        weights: Dict[Tuple[int, int], List[float]],
+                        alpha: float) -> Dict[Tuple[int, int], List[float]]:
+    """
+    Формирует входные сигналы y_j для каждого нейрона сети.
+
+    Нейроны слоя 1 получают входные сигналы сети, нейроны слоя k > 1 -
+    выходы нейронов предыдущего слоя y = 2/(1+exp(-αS))-1.
+
+    Args:
+        input_signals: Входные сигналы сети
+        weighted_sums: Словарь взвешенных сумм
+        weights: Словарь весов (задает состав нейронов)
+        alpha: Коэффициент крутизны α
+
+    Returns:
+        Dict[Tuple[int, int], List[float]]: Входные сигналы для каждого нейрона
+    """
+    result = {}
+    for (layer, neuron), neuron_weights in weights.items():
+        if layer == 1:
+            result[(layer, neuron)] = list(input_signals)
+            continue
+        result[(layer, neuron)] = [
+            2 / (1 + math.exp(-alpha * weighted_sums.get((layer - 1, i), 0.0))) - 1
+            for i in range(1, len(neuron_weights) + 1)
+        ]
+    return result
+
 def calculate_new_weights(weights: Dict[Tuple[int, int], List[float]],
                           biases: Dict[Tuple[int, int], float],
                           errors: Dict[Tuple[int, int], Tuple[float, float, float]],
                           input_signals: Dict[Tuple[int, int], List[float]],
                           learning_rate: float,
-                          log_func: Callable[[str], None] = None) -> Tuple[Dict[Tuple[int, int], List[float]], 
-                                                                             Dict[Tuple[int, int], float]]:
+                          log_func: Callable[[str], None] = None,
+                          selection: NeuronSelection = None) -> Tuple[Dict[Tuple[int, int], List[float]], 
+                                                                      Dict[Tuple[int, int], float]]:
     """
     Рассчитывает новые веса и смещения для всех нейронов по формулам:
        ω_ij(t+1) = ω_ij(t) - η * γ_j * y_j
        T_j(t+1)   = T_j(t) - η * γ_j
+    
+    При выборе нейронов (selection) рассчитываются только выбранные нейроны.
     """
     new_weights = {}
     new_biases = {}
@@ -193,6 +255,8 @@ def calculate_new_weights(weights: Dict[Tuple[int, int], List[float]],
         log_func("="*50)
     
     for (layer, neuron), (_, _, error) in errors.items():
+        if selection is not None and not selection.contains((layer, neuron)):
+            continue
         if log_func:
             log_func(f"\n{'-'*50}")
             log_func(f"НЕЙРОН [{layer}][{neuron}]")
@@ -0,0 +1,261 @@
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from utils.correction_workbook import load_correction_workbook
+from utils.network import NetworkArrays
+from utils.precision import precision_dtype
+from utils.sparse import SparseLayer
+
+# Заголовок файла: сигнатура, версия формата, длина метаданных JSON
+CHECKPOINT_MAGIC = b'KPSNET\r\n'
+CHECKPOINT_VERSION = 1
+HEADER = struct.Struct('<8sII')
+# Выравнивание начала каждого массива в файле
+ALIGNMENT = 64
+# Расширение таблиц новых весов, из которых можно продолжить коррекцию
+WORKBOOK_SUFFIX = '.xlsx'
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class Checkpoint:
+    """Сохраненное состояние сети: веса, смещения и параметры обучения"""
+
+    def __init__(self, network: NetworkArrays, alpha: Optional[float] = None,
+                 learning_rate: Optional[float] = None, cycle: Optional[int] = None):
+        """
+        Args:
+            network: Веса и смещения сети
+            alpha: Коэффициент крутизны α
+            learning_rate: Скорость обучения η
+            cycle: Номер цикла обучения
+        """
+        self.network = network
+        self.alpha = alpha
+        self.learning_rate = learning_rate
+        self.cycle = cycle
+
+    @property
+    def topology(self) -> List[int]:
+        """Размеры слоев сети"""
+        return self.network.topology
+
+
+def save_checkpoint(path: Union[str, Path], checkpoint: Checkpoint) -> None:
+    """
+    Сохраняет контрольную точку.
+
+    Формат: заголовок HEADER, метаданные JSON (топология, α, η, номер цикла,
+    описание массивов со смещениями в файле), затем массивы весов и смещений
+    в порядке C, каждый с границы ALIGNMENT байт. Разреженные слои
+    сохраняются как массивы CSR. Файл записывается во временный и
+    заменяется целиком, поэтому прерванная запись не портит старую точку.
+
+    Args:
+        path: Путь к файлу контрольной точки
+        checkpoint: Сохраняемое состояние
+    """
+    network = checkpoint.network
+    arrays = []
+    layers_meta = []
+    for matrix, bias in zip(network.layers, network.biases):
+        if isinstance(matrix, SparseLayer):
+            names = {'indptr': matrix.indptr, 'indices': matrix.indices, 'data': matrix.data}
+            layers_meta.append({'format': 'csr', 'shape': list(matrix.shape)})
+        else:
+            names = {'weights': matrix}
+            layers_meta.append({'format': 'dense', 'shape': list(matrix.shape)})
+        names['biases'] = bias
+        layer_arrays = {}
+        for name, array in names.items():
+            layer_arrays[name] = len(arrays)
+            arrays.append(np.ascontiguousarray(array))
+        layers_meta[-1]['arrays'] = layer_arrays
+
+    def build_metadata(data_start: int) -> bytes:
+        offset = data_start
+        descriptors = []
+        for array in arrays:
+            offset = _align(offset)
+            descriptors.append({'offset': offset, 'shape': list(array.shape), 'dtype': array.dtype.str})
+            offset += array.nbytes
+        metadata = {
+            'topology': network.topology,
+            'dtype': np.dtype(network.dtype).str,
+            'alpha': checkpoint.alpha,
+            'learning_rate': checkpoint.learning_rate,
+            'cycle': checkpoint.cycle,
+            'layers': layers_meta,
+            'arrays': descriptors,
+        }
+        return json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+
+    # Смещения массивов зависят от длины метаданных, поэтому длина
+    # уточняется, пока не перестанет меняться
+    metadata = build_metadata(_align(HEADER.size))
+    while True:
+        updated = build_metadata(_align(HEADER.size + len(metadata)))
+        if len(updated) == len(metadata):
+            metadata = updated
+            break
+        metadata = updated
+    descriptors = json.loads(metadata)['arrays']
+
+    path = Path(path)
+    temp_path = path.with_name(path.name + '.tmp')
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, len(metadata)))
+        file.write(metadata)
+        for array, descriptor in zip(arrays, descriptors):
+            file.write(b'\0' * (descriptor['offset'] - file.tell()))
+            file.write(array.tobytes(order='C'))
+    os.replace(temp_path, path)
+
+
+def read_checkpoint_metadata(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Читает и проверяет заголовок и метаданные контрольной точки.
+
+    Args:
+        path: Путь к файлу контрольной точки
+
+    Returns:
+        Dict[str, Any]: Метаданные
+    """
+    with open(path, 'rb') as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"Файл {path} не является контрольной точкой сети")
+        magic, version, length = HEADER.unpack(header)
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError(f"Файл {path} не является контрольной точкой сети")
+        if version > CHECKPOINT_VERSION:
+            raise ValueError(f"Версия формата контрольной точки {version} не поддерживается "
+                             f"(поддерживается до {CHECKPOINT_VERSION})")
+        return json.loads(file.read(length).decode('utf-8'))
+
+
+def load_checkpoint(path: Union[str, Path], mmap_mode: Optional[str] = 'r') -> Checkpoint:
+    """
+    Загружает контрольную точку.
+
+    Массивы отображаются в память через np.memmap без чтения файла целиком.
+    Режим 'r' запрещает изменение массивов на месте (для коррекции весов
+    используйте NetworkArrays.copy), 'c' - изменения только в памяти,
+    None - массивы читаются в память.
+
+    Args:
+        path: Путь к файлу контрольной точки
+        mmap_mode: Режим np.memmap ('r', 'c', 'r+') или None
+
+    Returns:
+        Checkpoint: Состояние сети
+    """
+    metadata = read_checkpoint_metadata(path)
+    arrays = []
+    for descriptor in metadata['arrays']:
+        dtype = np.dtype(descriptor['dtype'])
+        shape = tuple(descriptor['shape'])
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays.append(np.zeros(shape, dtype=dtype))
+        elif mmap_mode is None:
+            with open(path, 'rb') as file:
+                file.seek(descriptor['offset'])
+                arrays.append(np.fromfile(file, dtype=dtype, count=count).reshape(shape))
+        else:
+            arrays.append(np.memmap(path, dtype=dtype, mode=mmap_mode,
+                                    offset=descriptor['offset'], shape=shape))
+
+    layers = []
+    biases = []
+    for layer_meta in metadata['layers']:
+        index = layer_meta['arrays']
+        if layer_meta['format'] == 'csr':
+            layers.append(SparseLayer(arrays[index['indptr']], arrays[index['indices']],
+                                      arrays[index['data']], layer_meta['shape']))
+        else:
+            layers.append(arrays[index['weights']])
+        biases.append(arrays[index['biases']])
+    return Checkpoint(NetworkArrays(layers, biases), metadata.get('alpha'),
+                      metadata.get('learning_rate'), metadata.get('cycle'))
+
+
+def load_resume_point(path: Union[str, Path]) -> Checkpoint:
+    """
+    Начальные веса для следующей итерации: контрольная точка или таблица
+    новых весов (.xlsx), созданная на предыдущей итерации. Таблица не хранит
+    α, η и номер цикла - они остаются незаданными.
+
+    Args:
+        path: Путь к контрольной точке или книге с таблицей новых весов
+
+    Returns:
+        Checkpoint: Состояние сети
+    """
+    if Path(path).suffix.lower() == WORKBOOK_SUFFIX:
+        return Checkpoint(load_correction_workbook(path))
+    return load_checkpoint(path)
+
+
+def resume_pipeline(pipeline, checkpoint: Checkpoint) -> None:
+    """
+    Подставляет веса из контрольной точки в конвейер обработки.
+
+    Результаты этапов parsed_weights, weights, biases и network заменяются
+    весами точки; этапы, зависящие от них (ошибки, новые веса, таблицы),
+    будут пересчитаны. Взвешенные суммы и входные сигналы по-прежнему
+    берутся из лога. Если в точке сохранены α и η, они становятся
+    параметрами конвейера. Веса точки приводятся к точности конвейера
+    (параметр precision).
+
+    Args:
+        pipeline: Конвейер (см. create_processing_pipeline)
+        checkpoint: Загруженная контрольная точка
+    """
+    weights, biases = checkpoint.network.to_dicts()
+    pipeline.set_value('parsed_weights', (checkpoint.cycle, weights))
+    pipeline.set_value('weights', weights)
+    pipeline.set_value('biases', biases)
+    pipeline.set_value('network', checkpoint.network.astype(precision_dtype(pipeline.get_param('precision'))))
+    if checkpoint.alpha is not None:
+        pipeline.set_param('alpha', checkpoint.alpha)
+    if checkpoint.learning_rate is not None:
+        pipeline.set_param('learning_rate', checkpoint.learning_rate)
+
+
+def checkpoint_from_pipeline(pipeline, stage: str = 'corrected') -> Checkpoint:
+    """
+    Контрольная точка по результату этапа конвейера.
+
+    Для этапа 'corrected' сохраняются новые веса (нейроны без рассчитанной
+    ошибки сохраняют прежние веса), для 'weights' - веса из лога.
+
+    Args:
+        pipeline: Конвейер обработки
+        stage: 'corrected' или 'weights'
+
+    Returns:
+        Checkpoint: Состояние сети
+    """
+    if pipeline.get_param('selection') is not None:
+        # Веса невыбранных нейронов не разбирались
+        raise ValueError("Контрольная точка сохраняется только для всей сети, без выбора нейронов")
+    if stage == 'corrected':
+        network = pipeline.get('corrected_network')
+    elif stage == 'weights':
+        network = pipeline.get('network')
+    else:
+        raise ValueError(f"Контрольная точка строится по этапу corrected или weights, получено {stage}")
+    cycles = pipeline.get('parsed_weights')[0]
+    if stage == 'corrected' and cycles is not None:
+        cycles += 1
+    return Checkpoint(network, pipeline.get_param('alpha'),
+                      pipeline.get_param('learning_rate'), cycles)
@@ -0,0 +1,311 @@
+import posixpath
+import re
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+import numpy as np
+
+from parsers.numeric import decode_numbers
+from utils.network import NetworkArrays
+
+# Заголовки столбцов таблицы новых весов (см. WeightCorrectionTableCreator)
+LAYER_COLUMN = '№ слоя'
+NEURON_COLUMN = '№ нейрона'
+INPUT_COLUMN = '№ выхода'
+STATE_COLUMNS = {
+    'old': ('Предыдущий весовой коэффициент wij(t)', 'Предыдущий вес смещения Tj(t)'),
+    'new': ('Новый весовой коэффициент wij(t+1)', 'Новый вес смещения Tj(t+1)'),
+}
+OUTPUT_LAYER_LABEL = 'Выход'
+INDEX_SHEET = 'Оглавление'
+# Размер блока XML листа, разбираемого за один раз
+XML_CHUNK_SIZE = 16 << 20
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Ячейка с любым содержимым: столбец, строка, атрибуты, содержимое
+CELL_PATTERN = re.compile(rb'<c r="([A-Z]+)(\d+)"([^>]*?)(?:/>|>(.*?)</c>)', re.DOTALL)
+# Атрибуты непустой ячейки (у пустой ячейки после атрибутов идет "/>")
+ATTRIBUTES = rb'((?:\s+[\w:]+="[^"]*")*)>'
+# Атрибуты числовой ячейки: любые, кроме типа строки, логического значения и ошибки
+NUMBER_ATTRIBUTES = rb'(?:\s+(?!t="[^n])[\w:]+="[^"]*")*>'
+VALUE_PATTERN = re.compile(rb'<v>([^<]*)</v>')
+TEXT_PATTERN = re.compile(rb'<t(?: [^>]*)?>([^<]*)</t>')
+ROW_END = b'</row>'
+
+
+def _column_pattern(column: bytes) -> 're.Pattern':
+    """Числовые ячейки одного столбца: номер строки и значение (в том числе кэш формулы)"""
+    return re.compile(rb'<c r="' + column + rb'(\d+)"' + NUMBER_ATTRIBUTES
+                      + rb'(?:<f[^>]*(?:/>|>[^<]*</f>))?<v>([^<]*)</v>')
+
+
+def _text_column_pattern(column: bytes) -> 're.Pattern':
+    """Непустые ячейки одного столбца: номер строки, атрибуты и содержимое"""
+    return re.compile(rb'<c r="' + column + rb'(\d+)"' + ATTRIBUTES + rb'(.*?)</c>', re.DOTALL)
+
+
+def _unescape(text: bytes) -> str:
+    return (text.decode('utf-8').replace('&lt;', '<').replace('&gt;', '>')
+            .replace('&quot;', '"').replace('&apos;', "'").replace('&amp;', '&'))
+
+
+class _Workbook:
+    """Чтение листов книги .xlsx напрямую из XML (без загрузки книги целиком)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.archive = zipfile.ZipFile(path)
+        self.sheets = self._read_sheets()
+        self.shared_strings = self._read_shared_strings()
+
+    def close(self) -> None:
+        self.archive.close()
+
+    def _read_sheets(self) -> List[Tuple[str, str]]:
+        """Имена листов и пути их XML в порядке книги"""
+        rels = ElementTree.fromstring(self.archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {}
+        for rel in rels.iter(f'{PACKAGE_REL_NS}Relationship'):
+            target = rel.get('Target')
+            targets[rel.get('Id')] = (target.lstrip('/') if target.startswith('/')
+                                      else posixpath.normpath(posixpath.join('xl', target)))
+        workbook = ElementTree.fromstring(self.archive.read('xl/workbook.xml'))
+        return [(sheet.get('name'), targets[sheet.get(f'{REL_NS}id')])
+                for sheet in workbook.iter(f'{MAIN_NS}sheet')]
+
+    def _read_shared_strings(self) -> List[str]:
+        try:
+            stream = self.archive.open('xl/sharedStrings.xml')
+        except KeyError:
+            # xlsxwriter в режиме constant_memory пишет строки в ячейки
+            return []
+        strings = []
+        with stream:
+            for _, element in ElementTree.iterparse(stream):
+                if element.tag == f'{MAIN_NS}si':
+                    strings.append(''.join(element.itertext()))
+                    element.clear()
+        return strings
+
+    def cell_text(self, attributes: bytes, content: Optional[bytes]):
+        """Значение ячейки: строка, число или None для пустой ячейки"""
+        if not content:
+            return None
+        if b't="inlineStr"' in attributes:
+            return _unescape(b''.join(TEXT_PATTERN.findall(content)))
+        value = VALUE_PATTERN.search(content)
+        if value is None:
+            return None
+        if b't="s"' in attributes:
+            return self.shared_strings[int(value.group(1))]
+        if b't="str"' in attributes:
+            return _unescape(value.group(1))
+        return float(value.group(1))
+
+    def chunks(self, sheet_path: str):
+        """XML листа блоками, каждый из которых заканчивается целой строкой таблицы"""
+        pending = b''
+        with self.archive.open(sheet_path) as stream:
+            while True:
+                data = stream.read(XML_CHUNK_SIZE)
+                if not data:
+                    break
+                data = pending + data
+                end = data.rfind(ROW_END)
+                if end < 0:
+                    pending = data
+                    continue
+                end += len(ROW_END)
+                pending = data[end:]
+                yield data[:end]
+        if pending:
+            yield pending
+
+    def read_cells(self, sheet_path: str, max_row: Optional[int] = None) -> Dict[Tuple[str, int], object]:
+        """Все непустые ячейки листа (для небольших листов и строки заголовков)"""
+        cells = {}
+        for chunk in self.chunks(sheet_path):
+            for match in CELL_PATTERN.finditer(chunk):
+                column, row, attributes, content = match.groups()
+                row = int(row)
+                if max_row is not None and row > max_row:
+                    return cells
+                value = self.cell_text(attributes, content)
+                if value is not None:
+                    cells[(column.decode('ascii'), row)] = value
+        return cells
+
+
+def _read_columns(workbook: _Workbook, sheet_path: str, text_column: str,
+                  columns: List[str]) -> Tuple[Dict[int, object], Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Читает столбцы листа за один проход по XML.
+
+    Для числовых столбцов блок XML разбирается одним регулярным выражением
+    на столбец, номера строк и значения преобразуются в массивы одним
+    вызовом decode_numbers.
+
+    Returns:
+        Tuple: Непустые ячейки text_column по номерам строк и для каждого
+        числового столбца массивы номеров строк и значений
+    """
+    text_pattern = _text_column_pattern(text_column.encode('ascii'))
+    patterns = {column: _column_pattern(column.encode('ascii')) for column in columns}
+    texts = {}
+    rows: Dict[str, List[bytes]] = {column: [] for column in columns}
+    values: Dict[str, List[bytes]] = {column: [] for column in columns}
+    for chunk in workbook.chunks(sheet_path):
+        for row, attributes, content in text_pattern.findall(chunk):
+            value = workbook.cell_text(attributes, content)
+            if value is not None:
+                texts[int(row)] = value
+        for column, pattern in patterns.items():
+            found = pattern.findall(chunk)
+            if found:
+                chunk_rows, chunk_values = zip(*found)
+                rows[column].append(b' '.join(chunk_rows))
+                values[column].append(b' '.join(chunk_values))
+    numbers = {column: (decode_numbers(b' '.join(rows[column])).astype(np.int64),
+                        decode_numbers(b' '.join(values[column])))
+               for column in columns}
+    return texts, numbers
+
+
+def _workbook_files(path: Path) -> List[Path]:
+    """Книги таблицы: по оглавлению, если таблица разделена на книги"""
+    workbook = _Workbook(path)
+    try:
+        index = [sheet_path for name, sheet_path in workbook.sheets if name == INDEX_SHEET]
+        if not index:
+            return [path]
+        cells = workbook.read_cells(index[0])
+    finally:
+        workbook.close()
+    names = [cells[key] for key in sorted(cells, key=lambda key: key[1])
+             if key[0] == 'A' and key[1] > 1]
+    return [path.parent / name for name in dict.fromkeys(names)]
+
+
+def load_correction_workbook(path: Union[str, Path], state: str = 'new') -> NetworkArrays:
+    """
+    Загружает веса и смещения из таблицы новых весов ("Таблица 10").
+
+    Книга читается напрямую из XML листов, без загрузки в openpyxl: для
+    каждого нужного столбца значения извлекаются одним регулярным выражением
+    по блоку XML и преобразуются в массивы целиком, поэтому загрузка больших
+    книг занимает секунды. Таблицы, разделенные на листы или книги
+    (ShardedTableWriter), собираются по оглавлению первой книги.
+    Синапсы, отсутствующие в таблице (nonzero_only), считаются нулевыми.
+
+    Args:
+        path: Путь к книге (первой книге, если таблица разделена на книги)
+        state: 'new' - веса wij(t+1) и смещения Tj(t+1), 'old' - wij(t) и Tj(t)
+
+    Returns:
+        NetworkArrays: Веса и смещения сети
+    """
+    if state not in STATE_COLUMNS:
+        raise ValueError(f"Неизвестный набор весов {state}, допустимы: {', '.join(STATE_COLUMNS)}")
+    weight_header, bias_header = STATE_COLUMNS[state]
+    path = Path(path)
+
+    synapse_parts = []  # (метка слоя блока, нейрон, вход, вес) по листам
+    bias_parts = []  # (метка слоя, нейрон, смещение)
+    for file in _workbook_files(path):
+        workbook = _Workbook(file)
+        try:
+            for name, sheet_path in workbook.sheets:
+                if name == INDEX_SHEET:
+                    continue
+                header = {value: column for (column, _), value in
+                          workbook.read_cells(sheet_path, max_row=1).items()}
+                needed = (LAYER_COLUMN, NEURON_COLUMN, INPUT_COLUMN, weight_header, bias_header)
+                if not all(title in header for title in needed):
+                    continue
+                layer_col, neuron_col, input_col, weight_col, bias_col = (header[t] for t in needed)
+
+                # Метки слоя - строки, они есть только в первой строке нейрона
+                labels, columns = _read_columns(workbook, sheet_path, layer_col,
+                                                [neuron_col, input_col, weight_col, bias_col])
+                block_rows, neurons = columns[neuron_col]
+                input_rows, inputs = columns[input_col]
+                weight_rows, weights = columns[weight_col]
+                bias_rows, biases = columns[bias_col]
+                if not np.array_equal(input_rows, weight_rows):
+                    raise ValueError(f"Лист {name} книги {file}: номера входов и веса в разных строках")
+
+                block_labels = [labels.get(int(row)) for row in block_rows]
+                block = np.searchsorted(block_rows, input_rows, side='right') - 1
+                if block.size and block.min() < 0:
+                    raise ValueError(f"Лист {name} книги {file}: вес до первого нейрона")
+                synapse_parts.append((block_labels, neurons, block, inputs, weights))
+                bias_block = np.searchsorted(block_rows, bias_rows)
+                if ((bias_block >= block_rows.size).any()
+                        or not np.array_equal(block_rows[bias_block], bias_rows)):
+                    raise ValueError(f"Лист {name} книги {file}: смещение не в первой строке нейрона")
+                bias_parts.append((block_labels, neurons, bias_block, biases))
+        finally:
+            workbook.close()
+    if not synapse_parts:
+        raise ValueError(f"В книге {path} не найдена таблица новых весов")
+    return _assemble(synapse_parts, bias_parts)
+
+
+def _layer_numbers(labels: List[object], output_layer: int) -> np.ndarray:
+    """Номера слоев блоков по меткам столбца "№ слоя" """
+    numbers = []
+    for label in labels:
+        if label == OUTPUT_LAYER_LABEL:
+            numbers.append(output_layer)
+        elif label is None:
+            raise ValueError("В первой строке нейрона не указан номер слоя")
+        else:
+            numbers.append(int(float(label)))
+    return np.asarray(numbers, dtype=np.int64)
+
+
+def _assemble(synapse_parts: List[Tuple], bias_parts: List[Tuple]) -> NetworkArrays:
+    """Собирает матрицы весов и векторы смещений по строкам всех листов"""
+    # Выходной слой подписан "Выход" и следует за последним нумерованным слоем
+    numbered = [int(float(label)) for labels, *_ in synapse_parts for label in labels
+                if label is not None and label != OUTPUT_LAYER_LABEL]
+    output_layer = max(numbered, default=0) + 1
+
+    layers = np.concatenate([_layer_numbers(labels, output_layer)[block]
+                             for labels, _, block, _, _ in synapse_parts])
+    neurons = np.concatenate([block_neurons[block] for _, block_neurons, block, _, _ in synapse_parts])
+    inputs = np.concatenate([part[3] for part in synapse_parts])
+    weights = np.concatenate([part[4] for part in synapse_parts])
+    bias_layers = np.concatenate([_layer_numbers(labels, output_layer)[block]
+                                  for labels, _, block, _ in bias_parts])
+    bias_neurons = np.concatenate([block_neurons[block] for _, block_neurons, block, _ in bias_parts])
+    bias_values = np.concatenate([part[3] for part in bias_parts])
+
+    layer_numbers = np.unique(layers).tolist()
+    if layer_numbers != list(range(1, len(layer_numbers) + 1)):
+        raise ValueError(f"Слои сети должны нумероваться с 1 подряд, получено {layer_numbers}")
+    matrices = []
+    bias_vectors = []
+    previous_neurons = 0
+    for layer in layer_numbers:
+        mask = layers == layer
+        layer_neurons = neurons[mask].astype(np.int64)
+        layer_inputs = inputs[mask].astype(np.int64)
+        n_neurons = int(layer_neurons.max())
+        # Ширина слоя - наибольший номер входа, но не меньше числа нейронов
+        # предыдущего слоя: нулевые синапсы в таблицу могли не попасть
+        n_inputs = max(int(layer_inputs.max()), previous_neurons)
+        matrix = np.zeros((n_neurons, n_inputs))
+        matrix[layer_neurons - 1, layer_inputs - 1] = weights[mask]
+        bias = np.ones(n_neurons)
+        bias_mask = bias_layers == layer
+        bias[bias_neurons[bias_mask].astype(np.int64) - 1] = bias_values[bias_mask]
+        matrices.append(matrix)
+        bias_vectors.append(bias)
+        previous_neurons = n_neurons
+    return NetworkArrays(matrices, bias_vectors)
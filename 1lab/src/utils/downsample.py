@@ -0,0 +1,184 @@
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from utils.sparse import SparseLayer
+
+# Наибольшее число ячеек уровня, с которого строится пирамида разреженной
+# матрицы: более подробные уровни не создаются
+MAX_BASE_CELLS = 1 << 24
+
+
+def _halve(array: np.ndarray, ufunc, axis: int) -> np.ndarray:
+    """
+    Свертка пар соседних строк (axis=0) или столбцов (axis=1); при нечетном
+    числе последняя строка (столбец) переходит на уровень без изменений.
+    Поэлементная операция над срезами через один в разы быстрее reduceat.
+    """
+    array = np.moveaxis(array, axis, 0)
+    pairs = array.shape[0] // 2
+    halved = ufunc(array[0:2 * pairs:2], array[1:2 * pairs:2])
+    if array.shape[0] % 2:
+        halved = np.concatenate([halved, array[-1:]])
+    return np.moveaxis(halved, 0, axis)
+
+
+def _group_reduce(array: np.ndarray, starts: np.ndarray, ufunc, axis: int) -> np.ndarray:
+    """
+    Свертка групп строк (столбцов) [starts[i], starts[i+1]) при небольшом
+    размере групп: по одной поэлементной операции на каждый элемент группы.
+    """
+    ends = np.append(starts[1:], array.shape[axis])
+    result = np.take(array, starts, axis=axis)
+    for offset in range(1, int((ends - starts).max())):
+        result = ufunc(result, np.take(array, np.minimum(starts + offset, ends - 1), axis=axis))
+    return result
+
+
+def _sparse_base(layer: SparseLayer, row_shift: int,
+                 col_shift: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Минимумы и максимумы по блокам 2^row_shift × 2^col_shift разреженной
+    матрицы без построения плотной: отсутствующие синапсы - нули, и ноль
+    входит в блок, если в нем есть хотя бы одна пустая ячейка.
+    """
+    n_rows, n_cols = layer.shape
+    shape = (-(-n_rows >> row_shift), -(-n_cols >> col_shift))
+    block_rows = layer.rows >> row_shift
+    block_cols = layer.indices >> col_shift
+    mins = np.full(shape, np.inf)
+    maxs = np.full(shape, -np.inf)
+    counts = np.zeros(shape, dtype=np.int64)
+    np.fmin.at(mins, (block_rows, block_cols), layer.data)
+    np.fmax.at(maxs, (block_rows, block_cols), layer.data)
+    np.add.at(counts, (block_rows, block_cols), 1)
+    # Число ячеек блоков (последние блоки по краям неполные)
+    heights = np.minimum(n_rows - (np.arange(shape[0]) << row_shift), 1 << row_shift)
+    widths = np.minimum(n_cols - (np.arange(shape[1]) << col_shift), 1 << col_shift)
+    has_zero = counts < np.outer(heights, widths)
+    np.minimum(mins, 0.0, out=mins, where=has_zero)
+    np.maximum(maxs, 0.0, out=maxs, where=has_zero)
+    return mins, maxs
+
+
+class MinMaxPyramid:
+    """
+    Пирамида минимумов и максимумов матрицы для вывода с уровнем детализации.
+
+    Уровень (kr, kc) хранит минимум и максимум каждого блока
+    2^kr строк × 2^kc столбцов; уровни строятся по запросу из соседнего
+    более подробного уровня и кэшируются. При выводе области берется
+    наиболее грубый уровень, у которого в области не меньше ячеек, чем
+    пикселей, и остаток (не больше нескольких ячеек на пиксель)
+    сворачивается до размера вывода, - время вывода зависит от размера
+    окна, а не матрицы. Экстремумы при
+    свертке не теряются (прореживание min/max); NaN пропускаются.
+    """
+
+    def __init__(self, matrix: Union[np.ndarray, SparseLayer]):
+        """
+        Args:
+            matrix: Плотная матрица (вектор выводится как матрица из одной строки)
+                    или разреженный слой
+        """
+        self.shape = tuple(matrix.shape) if np.ndim(matrix) != 1 else (1, len(matrix))
+        self._levels: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+        if isinstance(matrix, SparseLayer):
+            self._matrix = matrix
+            shift = 0
+            while (-(-self.shape[0] >> shift)) * (-(-self.shape[1] >> shift)) > MAX_BASE_CELLS:
+                shift += 1
+            self.base = (shift, shift)
+            self._levels[self.base] = _sparse_base(matrix, shift, shift)
+        else:
+            values = np.asarray(matrix, dtype=np.float64).reshape(self.shape)
+            self._matrix = values
+            self.base = (0, 0)
+            self._levels[self.base] = (values, values)
+        # Диапазон значений без NaN (NaN - нет данных, например ошибка не рассчитана)
+        mins, maxs = self._levels[self.base]
+        mins, maxs = mins[~np.isnan(mins)], maxs[~np.isnan(maxs)]
+        self.value_range = (float(mins.min()), float(maxs.max())) if mins.size else (np.nan, np.nan)
+
+    def level(self, kr: int, kc: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Минимумы и максимумы блоков 2^kr × 2^kc (не подробнее базового уровня)"""
+        kr, kc = max(kr, self.base[0]), max(kc, self.base[1])
+        if (kr, kc) not in self._levels:
+            # Уровень строится из соседнего по более свернутой оси: цепочки
+            # проходят через диагональные уровни (k, k), общие для всех масштабов
+            if kr > kc:
+                mins, maxs = self.level(kr - 1, kc)
+                axis = 0
+            else:
+                mins, maxs = self.level(kr, kc - 1)
+                axis = 1
+            self._levels[(kr, kc)] = (_halve(mins, np.fmin, axis), _halve(maxs, np.fmax, axis))
+        return self._levels[(kr, kc)]
+
+    def value(self, row: int, col: int) -> float:
+        """Значение ячейки матрицы"""
+        if isinstance(self._matrix, SparseLayer):
+            return float(self._matrix.row(row)[col])
+        return float(self._matrix[row, col])
+
+    def render(self, rows: Tuple[int, int], cols: Tuple[int, int],
+               height: int, width: int) -> Tuple[np.ndarray, np.ndarray, Tuple[int, int, int, int]]:
+        """
+        Минимумы и максимумы области для вывода.
+
+        Args:
+            rows: Строки области [начало, конец)
+            cols: Столбцы области [начало, конец)
+            height: Высота вывода в пикселях
+            width: Ширина вывода в пикселях
+
+        Returns:
+            Tuple: Минимумы и максимумы - массивы не больше (height, width), по
+            одному значению на пиксель или на ячейку, если ячеек меньше, - и
+            покрытая ими область (строка, конец, столбец, конец): на грубом
+            уровне она шире запрошенной на неполные блоки по краям
+        """
+        row0, row1 = rows
+        col0, col1 = cols
+        kr = _coarsest_level(row1 - row0, height)
+        kc = _coarsest_level(col1 - col0, width)
+        mins, maxs = self.level(kr, kc)
+        kr, kc = max(kr, self.base[0]), max(kc, self.base[1])
+        # Область на выбранном уровне (с захватом неполных блоков по краям)
+        r0, r1 = row0 >> kr, -(-row1 >> kr)
+        c0, c1 = col0 >> kc, -(-col1 >> kc)
+        mins, maxs = mins[r0:r1, c0:c1], maxs[r0:r1, c0:c1]
+        row_starts = _pixel_starts(mins.shape[0], height)
+        col_starts = _pixel_starts(mins.shape[1], width)
+        # На выбранном уровне в пикселе не больше нескольких ячеек
+        if row_starts is not None:
+            mins = _group_reduce(mins, row_starts, np.fmin, 0)
+            maxs = _group_reduce(maxs, row_starts, np.fmax, 0)
+        if col_starts is not None:
+            mins = _group_reduce(mins, col_starts, np.fmin, 1)
+            maxs = _group_reduce(maxs, col_starts, np.fmax, 1)
+        covered = (r0 << kr, min(r1 << kr, self.shape[0]), c0 << kc, min(c1 << kc, self.shape[1]))
+        return mins, maxs, covered
+
+
+def _coarsest_level(cells: int, pixels: int) -> int:
+    """Наибольшее k, при котором в 2^k раз меньше ячеек все еще не меньше пикселей"""
+    k = 0
+    while (cells >> (k + 1)) >= max(pixels, 1):
+        k += 1
+    return k
+
+
+def _pixel_starts(cells: int, pixels: int):
+    """Начала групп ячеек для каждого пикселя или None, если ячеек не больше пикселей"""
+    if cells <= pixels or cells == 0:
+        return None
+    return (np.arange(pixels) * cells) // pixels
+
+
+def extremes(mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+    """
+    Значение пикселя тепловой карты: из минимума и максимума блока - больший
+    по модулю, чтобы отдельные выбросы не исчезали при уменьшении масштаба.
+    """
+    return np.where(np.abs(maxs) >= np.abs(mins), maxs, mins)
@@ -0,0 +1,224 @@
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.sparse import SparseLayer
+
+# Объем буферов слоев при размере пакета по умолчанию: число образов,
+# проходящих через сеть за один шаг, подбирается по ширине слоев
+DEFAULT_BUFFER_SIZE = 64 << 20
+MAX_BATCH_SIZE = 65536
+MIN_BATCH_SIZE = 256
+
+
+def default_batch_size(network) -> int:
+    """Размер пакета, при котором буферы всех слоев занимают около DEFAULT_BUFFER_SIZE"""
+    row_size = sum(network.topology[1:]) * network.dtype.itemsize
+    return int(min(max(DEFAULT_BUFFER_SIZE // max(row_size, 1), MIN_BATCH_SIZE), MAX_BATCH_SIZE))
+
+
+class BatchPredictor:
+    """
+    Прямой проход сети по пакетам образов с заранее выделенными буферами.
+
+    Для каждого слоя выделяется буфер (batch_size, число нейронов);
+    взвешенные суммы и функция активации вычисляются в нем на месте,
+    поэтому проход по пакету не создает новых массивов (кроме
+    разреженных слоев, умножение которых возвращает новый массив).
+    """
+
+    def __init__(self, network, alpha: float, batch_size: Optional[int] = None):
+        """
+        Args:
+            network: Веса сети (NetworkArrays)
+            alpha: Коэффициент крутизны α
+            batch_size: Наибольший размер пакета (None - default_batch_size)
+        """
+        if batch_size is None:
+            batch_size = default_batch_size(network)
+        if batch_size < 1:
+            raise ValueError('Размер пакета должен быть положительным')
+        self.network = network
+        self.alpha = alpha
+        self.batch_size = batch_size
+        self.dtype = network.dtype
+        self._buffers = [np.empty((batch_size, layer.shape[0]), dtype=self.dtype)
+                         for layer in network.layers]
+
+    @property
+    def n_inputs(self) -> int:
+        return self.network.topology[0]
+
+    @property
+    def n_outputs(self) -> int:
+        return self.network.topology[-1]
+
+    def predict(self, inputs: np.ndarray) -> np.ndarray:
+        """
+        Выходы сети для пакета образов.
+
+        Args:
+            inputs: Входные векторы (B, n_in), B не больше batch_size
+
+        Returns:
+            np.ndarray: Выходы (B, n_out) - представление внутреннего буфера,
+            действительное до следующего вызова
+        """
+        count = inputs.shape[0]
+        if count > self.batch_size:
+            raise ValueError(f'Пакет из {count} образов больше буфера ({self.batch_size})')
+        signal = inputs
+        for layer, bias, buffer in zip(self.network.layers, self.network.biases, self._buffers):
+            s = buffer[:count]
+            if isinstance(layer, SparseLayer):
+                s[...] = layer.dot(signal)
+            else:
+                np.matmul(signal, layer.T, out=s)
+            s += bias
+            # f(S) = 2/(1+exp(-αS)) - 1 на месте; exp переполняется при f(S) = -1
+            with np.errstate(over='ignore'):
+                np.multiply(s, -self.alpha, out=s)
+                np.exp(s, out=s)
+            s += 1
+            np.divide(2, s, out=s)
+            s -= 1
+            signal = s
+        return signal
+
+
+def _csv_dialect(path: Path) -> Tuple[str, bool]:
+    """Разделитель столбцов .csv и признак десятичных запятых (как в load_patterns)"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                return (';', True) if ';' in line else (',', False)
+    return ',', False
+
+
+def count_patterns(path: Union[str, Path]) -> int:
+    """Число образов в файле .npy или .csv (непустых строк) без разбора значений"""
+    path = Path(path)
+    if path.suffix.lower() == '.npy':
+        return np.load(path, mmap_mode='r').shape[0]
+    with open(path, 'rb') as f:
+        return sum(1 for line in f if line.strip())
+
+
+def iter_pattern_batches(path: Union[str, Path], n_inputs: int,
+                         batch_size: int = MAX_BATCH_SIZE) -> Iterator[np.ndarray]:
+    """
+    Читает входные образы пакетами, не загружая файл целиком.
+
+    .npy отображается в память; .csv читается по batch_size строк
+    (разделитель "," или ";" с десятичными запятыми). Первые n_inputs
+    столбцов - входы, остальные (например, целевые значения) пропускаются.
+
+    Args:
+        path: Файл образов .npy или .csv
+        n_inputs: Число входов сети
+        batch_size: Число строк в пакете
+
+    Yields:
+        np.ndarray: Пакет входных векторов (B, n_inputs)
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.npy':
+        data = np.load(path, mmap_mode='r')
+        if data.ndim != 2 or data.shape[1] < n_inputs:
+            raise ValueError(f'Ожидается таблица образов не менее чем с {n_inputs} столбцами')
+        for start in range(0, data.shape[0], batch_size):
+            yield np.asarray(data[start:start + batch_size, :n_inputs], dtype=np.float64)
+        return
+    delimiter, decimal_comma = _csv_dialect(path)
+    reader = pd.read_csv(path, sep=delimiter, decimal=',' if decimal_comma else '.', header=None,
+                         usecols=range(n_inputs), dtype=np.float64, chunksize=batch_size,
+                         engine='c')
+    with reader:
+        for chunk in reader:
+            yield chunk.to_numpy()
+
+
+class _OutputWriter:
+    """Последовательная запись выходов сети в .npy (отображение в память) или .csv"""
+
+    def __init__(self, path: Path, n_rows: Optional[int], n_outputs: int,
+                 delimiter: str = ',', decimal_comma: bool = False, dtype=np.float64):
+        self.path = path
+        self.rows = 0
+        self.delimiter = delimiter
+        self.decimal_comma = decimal_comma
+        if path.suffix.lower() == '.npy':
+            self.array = np.lib.format.open_memmap(path, mode='w+', dtype=dtype,
+                                                   shape=(n_rows, n_outputs))
+            self.file = None
+        else:
+            self.array = None
+            self.file = open(path, 'w', encoding='utf-8', newline='\n')
+
+    def write(self, outputs: np.ndarray) -> None:
+        count = outputs.shape[0]
+        if self.array is not None:
+            self.array[self.rows:self.rows + count] = outputs
+        else:
+            # repr - кратчайшая запись, восстанавливающая то же число
+            if outputs.shape[1] == 1:
+                text = '\n'.join(map(repr, outputs[:, 0].tolist()))
+            else:
+                text = '\n'.join(self.delimiter.join(map(repr, row)) for row in outputs.tolist())
+            if self.decimal_comma:
+                text = text.replace('.', ',')
+            self.file.write(text + '\n')
+        self.rows += count
+
+    def close(self) -> None:
+        if self.file is None:
+            self.array.flush()
+            self.array = None
+        else:
+            self.file.close()
+
+
+def run_inference(network, alpha: float, patterns: Union[str, Path], output: Union[str, Path],
+                  batch_size: Optional[int] = None,
+                  log_func: Callable[[str], None] = None) -> int:
+    """
+    Рассчитывает выходы сети для всех образов файла и записывает их по мере расчета.
+
+    Образы читаются, проходят через сеть и записываются пакетами по
+    batch_size строк, поэтому объем памяти не зависит от размера файла.
+    Выход .npy - массив (N, n_out) того же типа, что веса сети (float32 -
+    вдвое меньше файл); выход .csv - по строке на образ, с тем же
+    разделителем и десятичным знаком, что во входном .csv.
+
+    Args:
+        network: Веса сети (NetworkArrays)
+        alpha: Коэффициент крутизны α
+        patterns: Файл входных образов .npy или .csv
+        output: Выходной файл .npy или .csv
+        batch_size: Размер пакета (None - по ширине слоев, см. default_batch_size)
+        log_func: Функция для вывода сообщений о ходе расчета
+
+    Returns:
+        int: Число обработанных образов
+    """
+    patterns, output = Path(patterns), Path(output)
+    predictor = BatchPredictor(network, alpha, batch_size)
+    n_rows = count_patterns(patterns) if output.suffix.lower() == '.npy' else None
+    dialect = _csv_dialect(patterns) if patterns.suffix.lower() != '.npy' else (',', False)
+    writer = _OutputWriter(output, n_rows, predictor.n_outputs, *dialect, predictor.dtype)
+    started = time.perf_counter()
+    try:
+        for batch in iter_pattern_batches(patterns, predictor.n_inputs, predictor.batch_size):
+            writer.write(predictor.predict(np.asarray(batch, dtype=predictor.dtype)))
+            if log_func:
+                elapsed = time.perf_counter() - started
+                log_func(f'Обработано образов: {writer.rows} '
+                         f'({writer.rows / max(elapsed, 1e-9) * 60 / 1e6:.1f} млн/мин)')
+    finally:
+        writer.close()
+    if n_rows is not None and writer.rows != n_rows:
+        raise ValueError(f'Прочитано {writer.rows} образов из {n_rows} строк файла')
+    return writer.rows
@@ -0,0 +1,184 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.sparse import SPARSITY_THRESHOLD, Layer, SparseLayer, layer_params, layer_row
+
+
+class NetworkArrays:
+    """
+    Веса и смещения многослойной сети в виде массивов numpy.
+
+    layers[k] - матрица весов слоя k+1 размером (число нейронов, число входов),
+    плотная (np.ndarray) или разреженная (SparseLayer),
+    biases[k] - вектор смещений T_j нейронов слоя k+1.
+    Нейрон (layer, neuron) из словарей парсеров соответствует строке
+    neuron-1 матрицы layers[layer-1].
+    """
+
+    def __init__(self, layers: List[Layer], biases: List[np.ndarray]):
+        if len(layers) != len(biases):
+            raise ValueError("Количество матриц весов и векторов смещений не совпадает")
+        self.layers = layers
+        self.biases = biases
+
+    @classmethod
+    def from_dicts(cls, weights: Dict[Tuple[int, int], List[float]],
+                   biases: Optional[Dict[Tuple[int, int], float]] = None,
+                   dtype=np.float64,
+                   sparse: Union[bool, str] = False,
+                   sparsity_threshold: float = SPARSITY_THRESHOLD) -> 'NetworkArrays':
+        """
+        Строит массивы из словарей весов и смещений.
+
+        Отсутствующие нейроны и веса заполняются нулями, отсутствующие
+        смещения - значением 1.0 (как в расчете новых весов).
+
+        Args:
+            weights: Словарь весов нейронов
+            biases: Словарь смещений нейронов
+            dtype: Тип элементов массивов
+            sparse: True - все слои в формате CSR, 'auto' - слои, доля нулевых
+                    весов в которых не меньше sparsity_threshold
+            sparsity_threshold: Порог доли нулевых весов для режима 'auto'
+
+        Returns:
+            NetworkArrays: Веса сети по слоям
+        """
+        biases = biases or {}
+        layer_numbers = sorted({layer for layer, _ in weights})
+        if layer_numbers != list(range(1, len(layer_numbers) + 1)):
+            raise ValueError(f"Слои сети должны нумероваться с 1 подряд, получено {layer_numbers}")
+
+        layers = []
+        bias_vectors = []
+        for layer in layer_numbers:
+            keys = [key for key in weights if key[0] == layer]
+            n_neurons = max(neuron for _, neuron in keys)
+            n_inputs = max(len(weights[key]) for key in keys)
+            bias = np.ones(n_neurons, dtype=dtype)
+            if sparse == 'auto':
+                # Учитываются только разобранные нейроны: не выбранные при
+                # разборе нейроны имеют пустые списки весов и не считаются нулями
+                parsed = [key for key in keys if len(weights[key])]
+                nonzero = sum(np.count_nonzero(weights[key]) for key in parsed)
+                size = len(parsed) * n_inputs
+                use_sparse = size > 0 and 1.0 - nonzero / size >= sparsity_threshold
+            else:
+                use_sparse = bool(sparse)
+            if use_sparse:
+                # Матрица собирается из списков без промежуточной плотной копии
+                matrix = SparseLayer.from_rows({neuron - 1: weights[(layer, neuron)] for _, neuron in keys},
+                                               n_neurons, n_inputs, dtype)
+            else:
+                matrix = np.zeros((n_neurons, n_inputs), dtype=dtype)
+                for _, neuron in keys:
+                    values = weights[(layer, neuron)]
+                    matrix[neuron - 1, :len(values)] = values
+            for neuron in range(1, n_neurons + 1):
+                if (layer, neuron) in biases:
+                    bias[neuron - 1] = biases[(layer, neuron)]
+            layers.append(matrix)
+            bias_vectors.append(bias)
+        return cls(layers, bias_vectors)
+
+    def to_dicts(self, keys: Optional[Iterable[Tuple[int, int]]] = None
+                 ) -> Tuple[Dict[Tuple[int, int], List[float]], Dict[Tuple[int, int], float]]:
+        """
+        Преобразует массивы обратно в словари весов и смещений.
+
+        Словари позиционные, как у парсеров: список весов нейрона содержит и
+        нулевые синапсы. Поэтому для разреженной сети лучше передавать keys -
+        строки CSR разворачиваются только для нужных нейронов.
+
+        Args:
+            keys: Нейроны (layer, neuron), которые нужно преобразовать
+                  (None - все; отсутствующие в сети пропускаются)
+
+        Returns:
+            Tuple[Dict, Dict]: Словарь весов и словарь смещений
+        """
+        if keys is None:
+            keys = [(layer, neuron) for layer, bias in enumerate(self.biases, 1)
+                    for neuron in range(1, len(bias) + 1)]
+        weights = {}
+        biases = {}
+        for layer, neuron in keys:
+            if not 1 <= layer <= len(self.layers) or not 1 <= neuron <= len(self.biases[layer - 1]):
+                continue
+            weights[(layer, neuron)] = layer_row(self.layers[layer - 1], neuron - 1).tolist()
+            biases[(layer, neuron)] = self.biases[layer - 1][neuron - 1].item()
+        return weights, biases
+
+    @property
+    def topology(self) -> List[int]:
+        """Размеры слоев: [число входов, нейронов слоя 1, ..., нейронов выходного слоя]"""
+        if not self.layers:
+            return []
+        return [self.layers[0].shape[1]] + [matrix.shape[0] for matrix in self.layers]
+
+    @property
+    def dtype(self):
+        """Тип элементов массивов"""
+        return self.layers[0].dtype if self.layers else np.dtype(np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        """Объем значений весов и смещений в байтах (без индексов разреженных слоев)"""
+        return sum(layer_params(m).nbytes for m in self.layers) + sum(b.nbytes for b in self.biases)
+
+    @property
+    def is_sparse(self) -> bool:
+        """Хранится ли хотя бы один слой в разреженном виде"""
+        return any(isinstance(m, SparseLayer) for m in self.layers)
+
+    def copy(self) -> 'NetworkArrays':
+        """Возвращает независимую копию массивов"""
+        return NetworkArrays([m.with_data(m.data.copy()) if isinstance(m, SparseLayer) else np.array(m)
+                              for m in self.layers],
+                             [np.array(b) for b in self.biases])
+
+    def to_dense(self) -> 'NetworkArrays':
+        """Сеть с плотными матрицами всех слоев (без копирования, если разреженных слоев нет)"""
+        if not self.is_sparse:
+            return self
+        return NetworkArrays([m.toarray() if isinstance(m, SparseLayer) else m for m in self.layers],
+                             self.biases)
+
+    def to_sparse(self) -> 'NetworkArrays':
+        """Сеть с разреженными матрицами всех слоев (нулевые синапсы удалены)"""
+        return NetworkArrays([m if isinstance(m, SparseLayer) else SparseLayer.from_dense(m)
+                              for m in self.layers], self.biases)
+
+    def astype(self, dtype) -> 'NetworkArrays':
+        """Копия массивов с элементами типа dtype (без копирования, если тип совпадает)"""
+        dtype = np.dtype(dtype)
+        if dtype == self.dtype:
+            return self
+        return NetworkArrays([m.astype(dtype) for m in self.layers],
+                             [np.asarray(b).astype(dtype) for b in self.biases])
+
+
+def sums_to_arrays(weighted_sums: Dict[Tuple[int, int], float],
+                   topology: List[int],
+                   dtype=np.float64) -> List[np.ndarray]:
+    """
+    Преобразует словарь взвешенных сумм в векторы S по слоям.
+
+    Отсутствующие суммы заполняются нулями (как в calculate_errors).
+
+    Args:
+        weighted_sums: Словарь взвешенных сумм
+        topology: Размеры слоев сети (см. NetworkArrays.topology)
+        dtype: Тип элементов массивов
+
+    Returns:
+        List[np.ndarray]: Векторы взвешенных сумм слоев 1..L
+    """
+    result = []
+    for layer, size in enumerate(topology[1:], 1):
+        vector = np.zeros(size, dtype=dtype)
+        for neuron in range(1, size + 1):
+            vector[neuron - 1] = weighted_sums.get((layer, neuron), 0.0)
+        result.append(vector)
+    return result
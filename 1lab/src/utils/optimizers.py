@@ -0,0 +1,143 @@
+from typing import Dict, List, Type
+
+import numpy as np
+
+
+class Optimizer:
+    """
+    Правило коррекции весов.
+
+    Состояние (скорости, моменты) и буферы промежуточных результатов
+    выделяются один раз при создании по форме параметров; step изменяет
+    массивы параметров на месте.
+    """
+
+    def __init__(self, params: List[np.ndarray], learning_rate: float):
+        """
+        Args:
+            params: Массивы корректируемых параметров (веса и смещения слоев)
+            learning_rate: Скорость обучения η
+        """
+        self.learning_rate = learning_rate
+        self.iterations = 0
+        self._buffers = [np.zeros_like(p) for p in params]
+
+    def step(self, params: List[np.ndarray], grads: List[np.ndarray]) -> None:
+        """
+        Выполняет один шаг коррекции.
+
+        Args:
+            params: Массивы параметров (изменяются на месте)
+            grads: Градиенты γ_j * y_j той же формы
+        """
+        self.iterations += 1
+        for i, (param, grad) in enumerate(zip(params, grads)):
+            self._update(i, param, grad)
+
+    def _update(self, i: int, param: np.ndarray, grad: np.ndarray) -> None:
+        raise NotImplementedError
+
+
+class SGD(Optimizer):
+    """ω(t+1) = ω(t) - η * g"""
+
+    def _update(self, i, param, grad):
+        buffer = self._buffers[i]
+        np.multiply(grad, self.learning_rate, out=buffer)
+        param -= buffer
+
+
+class Momentum(Optimizer):
+    """v = μv + g, ω(t+1) = ω(t) - η * v"""
+
+    def __init__(self, params, learning_rate, momentum: float = 0.9):
+        super().__init__(params, learning_rate)
+        self.momentum = momentum
+        self._velocity = [np.zeros_like(p) for p in params]
+
+    def _update(self, i, param, grad):
+        velocity, buffer = self._velocity[i], self._buffers[i]
+        velocity *= self.momentum
+        velocity += grad
+        np.multiply(velocity, self.learning_rate, out=buffer)
+        param -= buffer
+
+
+class Nesterov(Momentum):
+    """v = μv + g, ω(t+1) = ω(t) - η * (g + μv)"""
+
+    def _update(self, i, param, grad):
+        velocity, buffer = self._velocity[i], self._buffers[i]
+        velocity *= self.momentum
+        velocity += grad
+        np.multiply(velocity, self.momentum, out=buffer)
+        buffer += grad
+        buffer *= self.learning_rate
+        param -= buffer
+
+
+class Adam(Optimizer):
+    """
+    m = β1*m + (1-β1)*g, v = β2*v + (1-β2)*g²,
+    ω(t+1) = ω(t) - η * m̂ / (sqrt(v̂) + ε)
+    """
+
+    def __init__(self, params, learning_rate, beta1: float = 0.9, beta2: float = 0.999,
+                 epsilon: float = 1e-8):
+        super().__init__(params, learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self._m = [np.zeros_like(p) for p in params]
+        self._v = [np.zeros_like(p) for p in params]
+        self._denominators = [np.zeros_like(p) for p in params]
+
+    def _update(self, i, param, grad):
+        m, v, buffer, denominator = self._m[i], self._v[i], self._buffers[i], self._denominators[i]
+        m *= self.beta1
+        np.multiply(grad, 1 - self.beta1, out=buffer)
+        m += buffer
+        v *= self.beta2
+        np.multiply(grad, grad, out=buffer)
+        buffer *= 1 - self.beta2
+        v += buffer
+        # m̂ = m / (1 - β1^t), v̂ = v / (1 - β2^t)
+        np.multiply(v, 1 / (1 - self.beta2 ** self.iterations), out=denominator)
+        np.sqrt(denominator, out=denominator)
+        denominator += self.epsilon
+        np.multiply(m, self.learning_rate / (1 - self.beta1 ** self.iterations), out=buffer)
+        buffer /= denominator
+        param -= buffer
+
+
+OPTIMIZERS: Dict[str, Type[Optimizer]] = {
+    'sgd': SGD,
+    'momentum': Momentum,
+    'nesterov': Nesterov,
+    'adam': Adam,
+}
+
+OPTIMIZER_NAMES = {
+    'sgd': 'Градиентный спуск (SGD)',
+    'momentum': 'Метод моментов',
+    'nesterov': 'Момент Нестерова',
+    'adam': 'Adam',
+}
+
+
+def create_optimizer(name: str, params: List[np.ndarray], learning_rate: float, **kwargs) -> Optimizer:
+    """
+    Создает оптимизатор по имени.
+
+    Args:
+        name: Имя правила коррекции (ключ OPTIMIZERS)
+        params: Массивы корректируемых параметров
+        learning_rate: Скорость обучения η
+        **kwargs: Параметры правила (momentum, beta1, beta2, epsilon)
+
+    Returns:
+        Optimizer: Оптимизатор
+    """
+    if name not in OPTIMIZERS:
+        raise ValueError(f"Неизвестное правило коррекции {name}, допустимы: {', '.join(OPTIMIZERS)}")
+    return OPTIMIZERS[name](params, learning_rate, **kwargs)
@@ -0,0 +1,188 @@
+import multiprocessing
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.optimizers import create_optimizer
+from utils.planner import choose_processes
+from utils.shared_arrays import SharedArrays, attached_network, share_network
+from utils.training import compute_gradients, network_params, train
+
+# Минимальный размер части мини-пакета на процесс: при меньших пакетах
+# обмен с процессами дороже самого расчета
+MIN_SHARD_SIZE = 64
+
+
+def _param_count(network) -> int:
+    return sum(param.size for param in network_params(network))
+
+
+def _worker_main(index: int, processes: int, connection, alpha: float, descriptor) -> None:
+    """Процесс обучения: подключение к разделяемой памяти и цикл команд"""
+    with SharedArrays.attach(descriptor) as shared:
+        _worker_loop(index, processes, connection, alpha, attached_network(shared),
+                     *(shared[key] for key in ('grads', 'losses', 'inputs', 'targets', 'order')))
+
+
+def _worker_loop(index: int, processes: int, connection, alpha: float, network,
+                 grads: np.ndarray, losses: np.ndarray,
+                 inputs: np.ndarray, targets: np.ndarray, order: np.ndarray) -> None:
+    """
+    По команде основного процесса считает градиенты (или ошибку) на своей
+    части образов и записывает сумму по части в свою строку буферов.
+    Ответ - True или текст ошибки.
+    """
+    while True:
+        command, start, stop = connection.recv()
+        if command == 'stop':
+            return
+        if command == 'grad':
+            rows = np.array_split(order[start:stop], processes)[index]
+        else:
+            rows = np.array_split(np.arange(start, stop), processes)[index]
+        try:
+            if rows.size == 0:
+                grads[index] = 0
+                losses[index] = 0
+            else:
+                shard_grads, loss = compute_gradients(network, inputs[rows], targets[rows], alpha)
+                losses[index] = loss * rows.size
+            if command == 'grad' and rows.size:
+                offset = 0
+                for grad in shard_grads:
+                    # Сумма по части пакета: среднее по пакету - после сложения частей
+                    np.multiply(grad.ravel(), rows.size, out=grads[index, offset:offset + grad.size])
+                    offset += grad.size
+        except Exception as e:
+            connection.send(f'{type(e).__name__}: {e}')
+            continue
+        connection.send(True)
+
+
+def train_parallel(network, inputs: np.ndarray, targets: np.ndarray, alpha: float,
+                   optimizer: str = 'sgd', learning_rate: float = 0.1,
+                   batch_size: int = 32, epochs: int = 1, seed: Optional[int] = 0,
+                   processes: Optional[int] = None,
+                   log_func: Callable[[str], None] = None,
+                   **optimizer_kwargs) -> Tuple[object, List[float]]:
+    """
+    Обучение мини-пакетами с разделением каждого пакета между процессами.
+
+    Образы, веса сети и буфер градиентов находятся в одном блоке
+    разделяемой памяти (utils.shared_arrays): процессам передается только
+    его описание, а не веса. Каждый процесс выполняет прямой и обратный проход на своей части
+    пакета и записывает сумму градиентов в свою строку буфера; основной
+    процесс складывает строки в порядке номеров процессов и выполняет
+    один шаг коррекции, который сразу виден всем процессам.
+
+    Перемешивание образов такое же, как в train. При заданном числе
+    процессов результат детерминирован; от train он отличается только
+    порядком сложения (относительная разница порядка 1e-12).
+
+    Args:
+        network: Начальные веса (NetworkArrays), не изменяются
+        inputs: Входные образы (N, n_in)
+        targets: Целевые значения (N, n_out) или (N,) для одного выхода
+        alpha: Коэффициент крутизны α
+        optimizer: Правило коррекции (sgd, momentum, nesterov, adam)
+        learning_rate: Скорость обучения η
+        batch_size: Размер мини-пакета
+        epochs: Число эпох
+        seed: Зерно перемешивания образов (None - без перемешивания)
+        processes: Число процессов (None - выбор utils.planner.choose_processes по
+                   ядрам и памяти, но не больше, чем частей по MIN_SHARD_SIZE
+                   образов в пакете; 1 - обучение train без процессов)
+        log_func: Функция для вывода сообщений
+        **optimizer_kwargs: Параметры правила коррекции
+
+    Returns:
+        Tuple[NetworkArrays, List[float]]: Обученные веса и ошибка после каждой эпохи
+    """
+    if processes is None:
+        # Процессу нужны буферы градиентов и слоев для своей части пакета
+        task_memory = (_param_count(network) * 2 + batch_size * sum(network.topology)) \
+            * network.dtype.itemsize
+        processes, reason = choose_processes(batch_size, 2 * MIN_SHARD_SIZE,
+                                             batch_size // MIN_SHARD_SIZE, task_memory)
+        if log_func:
+            log_func(f'Процессов обучения: {processes} ({reason})')
+    processes = max(1, min(processes, batch_size))
+    if processes == 1:
+        return train(network, inputs, targets, alpha, optimizer, learning_rate, batch_size,
+                     epochs, seed, log_func, **optimizer_kwargs)
+
+    dtype = network.dtype
+    inputs = np.asarray(inputs, dtype=dtype)
+    targets = np.asarray(targets, dtype=dtype).reshape(inputs.shape[0], -1)
+    n_params = _param_count(network)
+    n_samples = inputs.shape[0]
+
+    shared = None
+    workers = []
+    connections = []
+    try:
+        # Обучаемая сеть - копия начальной в блоке: шаги коррекции основного
+        # процесса на месте сразу видны всем процессам
+        shared = share_network(network, {'grads': ((processes, n_params), dtype),
+                                         'losses': ((processes,), np.float64),
+                                         'inputs': inputs, 'targets': targets,
+                                         'order': np.arange(n_samples)})
+        grads, losses, order = shared['grads'], shared['losses'], shared['order']
+        trained = attached_network(shared)
+
+        context = multiprocessing.get_context()
+        for index in range(processes):
+            parent, child = context.Pipe()
+            worker = context.Process(target=_worker_main, daemon=True,
+                                     args=(index, processes, child, alpha, shared.descriptor))
+            worker.start()
+            child.close()
+            workers.append(worker)
+            connections.append(parent)
+
+        def run(command: str, start: int, stop: int) -> None:
+            for connection in connections:
+                connection.send((command, start, stop))
+            replies = [connection.recv() for connection in connections]
+            errors = [reply for reply in replies if reply is not True]
+            if errors:
+                raise RuntimeError(f'Ошибка в процессе обучения: {errors[0]}')
+
+        # Градиенты шага - представления суммы строк буфера в формах параметров
+        step_params = network_params(trained)
+        total = np.empty(n_params, dtype=dtype)
+        step_grads = []
+        offset = 0
+        for param in step_params:
+            step_grads.append(total[offset:offset + param.size].reshape(param.shape))
+            offset += param.size
+        opt = create_optimizer(optimizer, step_params, learning_rate, **optimizer_kwargs)
+        rng = np.random.default_rng(seed) if seed is not None else None
+
+        history = []
+        for epoch in range(1, epochs + 1):
+            if rng is not None:
+                rng.shuffle(order)
+            for start in range(0, n_samples, batch_size):
+                stop = min(start + batch_size, n_samples)
+                run('grad', start, stop)
+                np.sum(grads, axis=0, out=total)
+                total /= stop - start
+                opt.step(step_params, step_grads)
+            run('loss', 0, n_samples)
+            history.append(float(losses.sum()) / n_samples)
+            if log_func:
+                log_func(f"Эпоха {epoch}: ошибка {history[-1]:.8f}")
+        result = trained.copy()
+        del grads, losses, order, trained, step_params, step_grads
+        return result, history
+    finally:
+        for connection in connections:
+            try:
+                connection.send(('stop', 0, 0))
+            except OSError:
+                pass
+        for worker in workers:
+            worker.join()
+        if shared is not None:
+            shared.close()
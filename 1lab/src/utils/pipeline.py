@@ -0,0 +1,311 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from parsers.signal_parser import parse_input_signals
+from parsers.structured import StructuredLog, read_log_input
+from parsers.sum_parser import parse_weighted_sums
+from parsers.weight_parser import parse_neural_network_weights
+from utils.calculations import (build_neuron_inputs, calculate_errors,
+                                calculate_new_weights)
+from utils.network import NetworkArrays
+from utils.planner import plan_parsing
+from utils.precision import (DEFAULT_PRECISION, correction_precision_report,
+                             errors_in_precision, precision_dtype)
+from utils.selection import NeuronSelection
+from utils.training import optimizer_correction
+from utils.vectorized import correct_network
+from utils.weight_diff import diff_networks
+
+
+class Stage:
+    """Описание этапа конвейера"""
+
+    def __init__(self, name: str, func: Callable[..., Any],
+                 deps: Tuple[str, ...] = (), params: Tuple[str, ...] = ()):
+        """
+        Args:
+            name: Имя этапа
+            func: Функция этапа, принимает результаты deps и значения params
+                  (в этом порядке) как именованные аргументы
+            deps: Этапы, от результатов которых зависит этап
+            params: Параметры, от значений которых зависит этап
+        """
+        self.name = name
+        self.func = func
+        self.deps = deps
+        self.params = params
+
+
+class Pipeline:
+    """
+    Конвейер обработки с мемоизацией этапов.
+
+    Результат каждого этапа хранится до тех пор, пока не изменится один из
+    его параметров или один из этапов, от которых он зависит. Изменение
+    параметра сбрасывает только зависящие от него этапы (и их потомков),
+    остальные результаты используются повторно.
+    """
+
+    def __init__(self, log_func: Callable[[str], None] = None):
+        self.log_func = log_func
+        self._stages: Dict[str, Stage] = {}
+        self._dependents: Dict[str, List[str]] = {}
+        self._params: Dict[str, Any] = {}
+        self._cache: Dict[str, Any] = {}
+
+    def add_stage(self, name: str, func: Callable[..., Any],
+                  deps: Tuple[str, ...] = (), params: Tuple[str, ...] = ()) -> None:
+        """
+        Регистрирует этап конвейера.
+
+        Args:
+            name: Имя этапа
+            func: Функция этапа
+            deps: Этапы, от которых зависит этап
+            params: Параметры, от которых зависит этап
+        """
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Этап {name} зависит от незарегистрированного этапа {dep}")
+        self._stages[name] = Stage(name, func, deps, params)
+        self._dependents[name] = []
+        for dep in deps:
+            self._dependents[dep].append(name)
+
+    def set_param(self, name: str, value: Any) -> None:
+        """
+        Устанавливает значение параметра.
+
+        Если значение не изменилось, кэш не сбрасывается.
+        """
+        if name in self._params and self._params[name] == value:
+            return
+        self._params[name] = value
+        for stage in self._stages.values():
+            if name in stage.params:
+                self.invalidate(stage.name)
+
+    def set_params(self, **params: Any) -> None:
+        """Устанавливает значения нескольких параметров"""
+        for name, value in params.items():
+            self.set_param(name, value)
+
+    def get_param(self, name: str, default: Any = None) -> Any:
+        """Возвращает текущее значение параметра"""
+        return self._params.get(name, default)
+
+    def set_value(self, name: str, value: Any) -> None:
+        """
+        Подставляет готовый результат этапа (например, полученный извне).
+
+        Зависящие от этапа результаты сбрасываются.
+        """
+        self.invalidate(name)
+        self._cache[name] = value
+
+    def invalidate(self, name: str) -> None:
+        """Сбрасывает результат этапа и всех зависящих от него этапов"""
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            self._cache.pop(current, None)
+            pending.extend(self._dependents.get(current, []))
+
+    def is_cached(self, name: str) -> bool:
+        """Проверяет, есть ли сохраненный результат этапа"""
+        return name in self._cache
+
+    def get(self, name: str) -> Any:
+        """
+        Возвращает результат этапа, вычисляя недостающие этапы.
+
+        Args:
+            name: Имя этапа
+
+        Returns:
+            Any: Результат этапа
+        """
+        if name in self._cache:
+            return self._cache[name]
+        stage = self._stages[name]
+        kwargs = {dep: self.get(dep) for dep in stage.deps}
+        for param in stage.params:
+            if param not in self._params:
+                raise KeyError(f"Не задан параметр {param} для этапа {name}")
+            kwargs[param] = self._params[param]
+        if self.log_func:
+            self.log_func(f'Этап "{name}": вычисление...')
+        self._cache[name] = stage.func(**kwargs)
+        return self._cache[name]
+
+
+def create_processing_pipeline(log_func: Callable[[str], None] = None) -> Pipeline:
+    """
+    Создает конвейер файл → разбор лога → прямой проход → ошибки → новые веса.
+
+    Параметры конвейера:
+        input_file: Сигнатура входного файла (см. parsers.log_reader.file_signature)
+        alpha: Коэффициент крутизны α
+        target: Целевое значение t
+        learning_rate: Скорость обучения η
+        optimizer: Правило коррекции весов (ключ utils.optimizers.OPTIMIZERS)
+        top_k: Число синапсов с наибольшим изменением в отчете weight_diff
+        selection: Выбор нейронов (NeuronSelection) или None - вся сеть.
+                   По умолчанию None; при выборе разбираются и рассчитываются
+                   только нужные для него данные
+        parsing: Режим разбора текстового лога: 'memory' (текст целиком),
+                 'streaming' (потоково, без хранения текста) или None -
+                 по размеру файла и свободной памяти (utils.planner).
+                 По умолчанию None
+        precision: Точность расчета: 'float64' или 'float32' (веса сети, ошибки γ
+                   и коррекция в float32, см. utils.precision). По умолчанию float64
+
+    Этапы таблиц регистрируются вызывающей стороной, так как зависят от
+    выбранного формата вывода.
+
+    Args:
+        log_func: Функция для вывода сообщений и трассировки расчетов
+
+    Returns:
+        Pipeline: Конвейер обработки
+    """
+    pipeline = Pipeline(log_func)
+
+    def trace() -> Optional[Callable[[str], None]]:
+        return pipeline.log_func
+
+    # Содержимое - текст лога или структурированный дамп (StructuredLog),
+    # который возвращает те же результаты разбора без регулярных выражений.
+    # При потоковом разборе текст не хранится: результаты IncrementalLogParser
+    # возвращаются как StructuredLog
+    def content(input_file, parsing):
+        if parsing is None:
+            parsing = plan_parsing(input_file[0])[0]
+        return read_log_input(input_file[0], streaming=parsing == 'streaming')
+
+    pipeline.add_stage('content', content, params=('input_file', 'parsing'))
+    def neuron_filter(selection: Optional[NeuronSelection], attribute: str):
+        return getattr(selection, attribute) if selection is not None else None
+
+    def parsed_weights(content, selection):
+        if isinstance(content, StructuredLog):
+            return content.parse_weights(neuron_filter(selection, 'needs_weights'))
+        return parse_neural_network_weights(content, neuron_filter(selection, 'needs_weights'))
+
+    def weighted_sums(content, selection):
+        if isinstance(content, StructuredLog):
+            return content.parse_sums(neuron_filter(selection, 'needs_sum'))
+        return parse_weighted_sums(content, neuron_filter(selection, 'needs_sum'))
+
+    def input_signals(content):
+        if isinstance(content, StructuredLog):
+            return content.parse_signals()
+        return parse_input_signals(content)
+
+    pipeline.add_stage('parsed_weights', parsed_weights, deps=('content',), params=('selection',))
+    pipeline.add_stage('weights', lambda parsed_weights: parsed_weights[1],
+                       deps=('parsed_weights',))
+    pipeline.add_stage('weighted_sums', weighted_sums, deps=('content',), params=('selection',))
+    pipeline.add_stage('input_signals', input_signals, deps=('content',))
+    pipeline.add_stage('biases', lambda weights: {key: 1.0 for key in weights},
+                       deps=('weights',))
+    pipeline.add_stage('neuron_inputs',
+                       lambda input_signals, weighted_sums, weights, alpha:
+                           build_neuron_inputs(input_signals, weighted_sums, weights, alpha),
+                       deps=('input_signals', 'weighted_sums', 'weights'),
+                       params=('alpha',))
+    def errors(weighted_sums, weights, alpha, target, selection, precision):
+        result = calculate_errors(weighted_sums, weights, alpha, target, trace(), selection)
+        dtype = precision_dtype(precision)
+        if dtype != np.float64:
+            # Трассировка показывает расчет float64, в результат идут γ пониженной точности
+            result = errors_in_precision(result, weighted_sums, weights, alpha, target, dtype)
+        return result
+
+    pipeline.add_stage('errors', errors, deps=('weighted_sums', 'weights'),
+                       params=('alpha', 'target', 'selection', 'precision'))
+
+    def table_selection(weighted_sums, weights, alpha, target, selection, precision):
+        # Нейроны таблиц: при top_k - оставленные расчетом ошибок. Зависимости
+        # те же, что у этапа errors, но ошибки рассчитываются только при top_k
+        if selection is None or selection.top_k is None:
+            return selection
+        return selection.resolve(pipeline.get('errors'))
+
+    pipeline.add_stage('table_selection', table_selection,
+                       deps=('weighted_sums', 'weights'),
+                       params=('alpha', 'target', 'selection', 'precision'))
+    # Для прореженной сети (prune) нулевые синапсы считаются удаленными: слои
+    # с долей нулевых весов выше порога хранятся в разреженном виде, и эти
+    # синапсы не корректируются ни в одном слое. Без prune нулевые веса
+    # корректируются, как и остальные, поэтому сеть плотная
+    pipeline.add_stage('network',
+                       lambda weights, biases, precision, prune:
+                           NetworkArrays.from_dicts(weights, biases, precision_dtype(precision),
+                                                    sparse='auto' if prune else False),
+                       deps=('weights', 'biases'), params=('precision', 'prune'))
+
+    def corrected(network, weights, biases, errors, input_signals, weighted_sums,
+                  alpha, learning_rate, optimizer, prune):
+        # Результат не зависит от способа хранения слоев: при prune нулевые
+        # синапсы удалены во всех слоях, без prune - корректируются во всех
+        # (разреженной может быть и сеть из контрольной точки)
+        network = network.to_sparse() if prune else network.to_dense()
+        if optimizer != 'sgd':
+            # Один шаг правила из начального состояния (нулевые моменты)
+            if trace():
+                trace()(f'Коррекция весов правилом {optimizer}, '
+                        'без трассировки отдельных синапсов')
+            result = optimizer_correction(network, errors, input_signals, weighted_sums,
+                                          alpha, optimizer, learning_rate)
+        elif not network.is_sparse and network.dtype == np.float64:
+            neuron_inputs = pipeline.get('neuron_inputs')
+            return calculate_new_weights(weights, biases, errors, neuron_inputs, learning_rate, trace())
+        else:
+            if trace():
+                trace()(f'Коррекция весов {network.dtype} по массивам сети'
+                        + (', только по ненулевым синапсам' if network.is_sparse else '')
+                        + ', без трассировки отдельных синапсов')
+            result = correct_network(network, errors, input_signals, weighted_sums,
+                                     alpha, learning_rate)
+        # Как и calculate_new_weights, возвращаем только нейроны с рассчитанной
+        # ошибкой: строки разреженных слоев разворачиваются только для них
+        return result.to_dicts(errors)
+
+    pipeline.add_stage('corrected', corrected,
+                       deps=('network', 'weights', 'biases', 'errors', 'input_signals', 'weighted_sums'),
+                       params=('alpha', 'learning_rate', 'optimizer', 'prune'))
+
+    def corrected_network(weights, biases, corrected, precision, prune):
+        # Нейроны без рассчитанной ошибки сохраняют прежние веса
+        new_weights, new_biases = corrected
+        return NetworkArrays.from_dicts({**weights, **new_weights}, {**biases, **new_biases},
+                                        precision_dtype(precision), sparse='auto' if prune else False)
+
+    pipeline.add_stage('corrected_network', corrected_network,
+                       deps=('weights', 'biases', 'corrected'), params=('precision', 'prune'))
+
+    def precision_report(weights, biases, weighted_sums, input_signals,
+                         alpha, target, learning_rate, optimizer, selection, precision, prune):
+        # Отчет нужен только при пониженной точности: эталон - расчет float64
+        if precision_dtype(precision) == np.float64:
+            return None
+        return correction_precision_report(weights, biases, weighted_sums, input_signals, alpha,
+                                           target, learning_rate, optimizer, selection, precision,
+                                           prune)
+
+    pipeline.add_stage('precision_report', precision_report,
+                       deps=('weights', 'biases', 'weighted_sums', 'input_signals'),
+                       params=('alpha', 'target', 'learning_rate', 'optimizer', 'selection',
+                               'precision', 'prune'))
+    pipeline.add_stage('weight_diff',
+                       lambda network, corrected_network, top_k:
+                           diff_networks(network, corrected_network, top_k),
+                       deps=('network', 'corrected_network'),
+                       params=('top_k',))
+    pipeline.set_param('selection', None)
+    pipeline.set_param('parsing', None)
+    pipeline.set_param('precision', DEFAULT_PRECISION)
+    pipeline.set_param('prune', False)
+    return pipeline
@@ -0,0 +1,360 @@
+"""
+Планировщик выполнения: выбор режима этапов по размеру задачи и ресурсам.
+
+Этапы, для которых есть несколько способов выполнения:
+    разбор лога  - в памяти (регулярные выражения по всему тексту, быстрее)
+                   или потоковый (IncrementalLogParser по блокам, текст не
+                   хранится, памяти нужно в несколько раз меньше);
+    вычисления   - в одном процессе или в пуле процессов (обучение
+                   мини-пакетами, перебор параметров);
+    таблицы      - с объединением ячеек блоков или без него (объединения
+                   листа хранятся в памяти до конца листа).
+
+Решение принимается по объему текста лога (для сжатого - по оценке
+размера после распаковки), размеру сети из обзора начала файла,
+доступной памяти и числу ядер. Небольшие задачи всегда выполняются в
+памяти и в одном процессе - без затрат на запуск процессов и обзор файла.
+Любой выбор можно задать явно (параметры командной строки или переменные
+окружения KPS_PARSING, KPS_PROCESSES, KPS_TABLES).
+"""
+import os
+import struct
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from excel_generator.sharded_writer import MERGE_ROWS
+from parsers.log_reader import detect_compression
+from parsers.structured import log_format
+
+PARSING_MODES = ('memory', 'streaming')
+TABLE_MODES = ('merged', 'flat')
+# Переменные окружения, переопределяющие выбор планировщика
+PARSING_ENV = 'KPS_PARSING'
+PROCESSES_ENV = 'KPS_PROCESSES'
+TABLES_ENV = 'KPS_TABLES'
+
+# Доля доступной памяти, которую может занять обработка
+MEMORY_FRACTION = 0.5
+# Объем текста, до которого лог разбирается в памяти без оценок и обзора
+SMALL_INPUT = 16 << 20
+# Пиковый объем памяти разбора в памяти на байт текста: строка (2 байта на
+# символ из-за кириллицы), копии при чтении и результаты разбора (измерено
+# на логах 12-24 МБ: 7-7.5 байта)
+TEXT_MEMORY_FACTOR = 8
+# Объем результатов разбора на вес (число float в списке)
+WEIGHT_MEMORY = 32
+# Наименьшая длина строки веса в логе ("w[1,2] = 0,5"): по ней оценивается
+# наибольшее число весов, если размер сети неизвестен
+MIN_WEIGHT_LINE = 16
+# Предел текста для разбора в памяти, если доступная память неизвестна
+DEFAULT_IN_MEMORY_LIMIT = 512 << 20
+# Оценка степени сжатия логов сверху (на логах симулятора: gzip 3.4,
+# bz2 4.2, xz 4.6), чтобы объем текста не был занижен
+COMPRESSION_RATIOS = {'gzip': 5, 'bz2': 6, 'xz': 6, 'zstd': 5}
+# Память процесса пула без данных задачи (интерпретатор, numpy)
+PROCESS_MEMORY = 64 << 20
+
+
+def format_size(size: float) -> str:
+    """Объем в байтах для вывода (Б, КБ, МБ, ГБ)"""
+    for unit in ('Б', 'КБ', 'МБ'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} ГБ'
+
+
+def _cgroup_memory() -> Optional[int]:
+    """Свободная память по ограничению cgroup v2 (в контейнере) или None"""
+    try:
+        with open('/sys/fs/cgroup/memory.max') as f:
+            limit = f.read().strip()
+        with open('/sys/fs/cgroup/memory.current') as f:
+            current = int(f.read())
+    except (OSError, ValueError):
+        return None
+    if limit == 'max':
+        return None
+    return max(int(limit) - current, 0)
+
+
+def available_memory() -> Optional[int]:
+    """Доступная память в байтах (MemAvailable с учетом cgroup) или None, если неизвестна"""
+    memory = None
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    memory = int(line.split()[1]) * 1024
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+    if memory is None and hasattr(os, 'sysconf'):
+        try:
+            memory = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            memory = None
+    limit = _cgroup_memory()
+    if limit is not None:
+        memory = limit if memory is None else min(memory, limit)
+    return memory
+
+
+def available_cores() -> int:
+    """Число ядер, на которых может выполняться процесс"""
+    if hasattr(os, 'sched_getaffinity'):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+
+class Resources:
+    """Ресурсы машины, доступные обработке"""
+
+    def __init__(self, cores: int, memory: Optional[int]):
+        """
+        Args:
+            cores: Число ядер
+            memory: Доступная память в байтах (None - неизвестна)
+        """
+        self.cores = cores
+        self.memory = memory
+
+    @classmethod
+    def detect(cls) -> 'Resources':
+        return cls(available_cores(), available_memory())
+
+    @property
+    def budget(self) -> Optional[int]:
+        """Объем памяти, который может занять обработка"""
+        return None if self.memory is None else int(self.memory * MEMORY_FRACTION)
+
+    def describe(self) -> str:
+        memory = format_size(self.memory) if self.memory is not None else 'неизвестно'
+        return f'ядер {self.cores}, доступно памяти {memory}'
+
+
+def text_size(path: Union[str, Path]) -> Tuple[int, Optional[str]]:
+    """
+    Оценка объема текста лога после распаковки.
+
+    Для gzip используется размер из конца файла (по модулю 2^32), для
+    остальных форматов сжатия - оценка сверху по COMPRESSION_RATIOS.
+
+    Returns:
+        Tuple[int, Optional[str]]: Объем текста в байтах и формат сжатия
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        compression = detect_compression(f.read(8))
+        if compression is None:
+            return size, None
+        estimate = size * COMPRESSION_RATIOS[compression]
+        if compression == 'gzip' and size >= 18:
+            f.seek(-4, os.SEEK_END)
+            stored = struct.unpack('<I', f.read(4))[0]
+            # Размер хранится по модулю 2^32: добавляем столько 2^32,
+            # чтобы результат был ближе всего к оценке по степени сжатия
+            wraps = max(round((estimate - stored) / (1 << 32)), 0)
+            estimate = max(stored + wraps * (1 << 32), size)
+    return estimate, compression
+
+
+def estimate_weights(preview, text_bytes: int) -> int:
+    """
+    Оценка числа весов сети: по размерам слоев из обзора лога (LogPreview)
+    и ширине первых нейронов, но не больше, чем строк весов может быть в
+    тексте. Без обзора или по одному началу сжатого файла (размеры слоев
+    занижены) возвращается это наибольшее число.
+    """
+    upper = text_bytes // MIN_WEIGHT_LINE
+    if preview is None or not preview.layers or (preview.compression and not preview.complete):
+        return upper
+    widths = {key[0]: len(weights) for key, weights in preview.first_neurons}
+    total = 0
+    previous = None
+    for layer, count in sorted(preview.layers.items()):
+        width = widths.get(layer) or previous or len(preview.input_signals) or 1
+        total += count * width
+        previous = count
+    return min(total, upper)
+
+
+def plan_parsing(path: Union[str, Path], override: Optional[str] = None,
+                 resources: Optional[Resources] = None, preview=None) -> Tuple[str, str]:
+    """
+    Выбирает режим разбора входного файла.
+
+    Args:
+        path: Входной файл
+        override: Заданный режим (PARSING_MODES) или None - выбор по размеру
+        resources: Ресурсы машины (по умолчанию - Resources.detect())
+        preview: Обзор лога (LogPreview), если уже построен
+
+    Returns:
+        Tuple[str, str]: Режим ('memory' или 'streaming') и причина выбора
+    """
+    override = override or os.environ.get(PARSING_ENV) or None
+    if override is not None:
+        if override not in PARSING_MODES:
+            raise ValueError(f"Неизвестный режим разбора {override}, допустимы: {', '.join(PARSING_MODES)}")
+        return override, 'задан явно'
+    if log_format(path) != 'text':
+        return 'memory', 'структурированный дамп загружается целиком без разбора текста'
+    size, compression = text_size(path)
+    packed = f', сжат {compression}' if compression else ''
+    if size <= SMALL_INPUT:
+        return 'memory', f'текст {format_size(size)}{packed}'
+    resources = resources or Resources.detect()
+    in_memory = size * TEXT_MEMORY_FACTOR
+    budget = resources.budget if resources.budget is not None else DEFAULT_IN_MEMORY_LIMIT * TEXT_MEMORY_FACTOR
+    if in_memory <= budget:
+        return 'memory', (f'текст ~{format_size(size)}{packed}, пик ~{format_size(in_memory)} '
+                          f'при допустимых {format_size(budget)}')
+    if preview is None:
+        from parsers.preview import preview_log
+        preview = preview_log(path)
+    streaming = estimate_weights(preview, size) * WEIGHT_MEMORY
+    reason = (f'текст ~{format_size(size)}{packed}: в памяти потребовалось бы '
+              f'~{format_size(in_memory)} при допустимых {format_size(budget)}, '
+              f'потоково ~{format_size(streaming)}')
+    if streaming > budget:
+        reason += ' - памяти может не хватить и для потокового разбора'
+    return 'streaming', reason
+
+
+def env_processes() -> Optional[int]:
+    """
+    Число процессов из переменной окружения KPS_PROCESSES.
+
+    Returns:
+        Optional[int]: Заданное число процессов или None (переменная не
+                       задана или равна 0 - выбор планировщика)
+    """
+    value = os.environ.get(PROCESSES_ENV, '').strip()
+    if not value:
+        return None
+    try:
+        processes = int(value)
+    except ValueError:
+        processes = -1
+    if processes < 0:
+        raise ValueError(f'Некорректное значение {PROCESSES_ENV}={value}: '
+                         f'ожидается целое число процессов не меньше 0 (0 - выбор автоматически)')
+    return processes or None
+
+
+def choose_processes(work: float, min_work: float, max_tasks: int,
+                     task_memory: int = 0, override: Optional[int] = None,
+                     resources: Optional[Resources] = None) -> Tuple[int, str]:
+    """
+    Выбирает число процессов для вычислений.
+
+    Пул имеет смысл, если объем работы не меньше min_work (иначе запуск
+    процессов и обмен с ними дороже расчета); процессов не больше ядер,
+    частей задачи и числа, для которого хватает памяти.
+
+    Args:
+        work: Объем работы (в единицах, в которых задан min_work)
+        min_work: Наименьший объем работы для пула процессов
+        max_tasks: Наибольшее число частей, на которые делится задача
+        task_memory: Память одного процесса под данные задачи (байт)
+        override: Заданное число процессов (0 или None - выбор; также KPS_PROCESSES)
+        resources: Ресурсы машины (по умолчанию - Resources.detect())
+
+    Returns:
+        Tuple[int, str]: Число процессов и причина выбора
+    """
+    override = override or env_processes()
+    if override:
+        return max(1, min(override, max_tasks)), 'задано явно'
+    if work < min_work or max_tasks < 2:
+        return 1, 'небольшая задача - без запуска процессов'
+    resources = resources or Resources.detect()
+    if resources.cores < 2:
+        return 1, 'доступно одно ядро'
+    processes = min(resources.cores, max_tasks)
+    if resources.budget is not None:
+        processes = min(processes, max(resources.budget // (PROCESS_MEMORY + task_memory), 1))
+    if processes < 2:
+        return 1, 'памяти не хватает для нескольких процессов'
+    return processes, resources.describe()
+
+
+def plan_tables(override: Optional[str] = None) -> Tuple[Optional[bool], str]:
+    """
+    Режим записи таблиц: с объединением ячеек блоков, без него или None -
+    по числу строк таблицы (см. ShardedTableWriter).
+
+    Returns:
+        Tuple[Optional[bool], str]: Объединять ли ячейки и причина выбора
+    """
+    override = override or os.environ.get(TABLES_ENV) or None
+    if override is None:
+        return None, f'объединение ячеек - если в таблице не больше {MERGE_ROWS} строк'
+    if override not in TABLE_MODES:
+        raise ValueError(f"Неизвестный режим таблиц {override}, допустимы: {', '.join(TABLE_MODES)}")
+    return override == 'merged', 'задан явно'
+
+
+class ExecutionPlan:
+    """
+    План выполнения задачи: режимы этапов и причины их выбора.
+
+    Разбор и таблицы планируются по входному файлу сразу; число процессов,
+    если не задано, выбирается этапом вычислений по их объему
+    (choose_processes).
+    """
+
+    def __init__(self, parsing: str, merge_cells: Optional[bool],
+                 processes: Optional[int], notes: List[str]):
+        """
+        Args:
+            parsing: Режим разбора (PARSING_MODES)
+            merge_cells: Объединять ли ячейки блоков таблиц (None - по числу строк)
+            processes: Заданное число процессов (None - выбор по объему вычислений)
+            notes: Строки описания решений
+        """
+        self.parsing = parsing
+        self.merge_cells = merge_cells
+        self.processes = processes
+        self.notes = notes
+
+    def describe(self) -> List[str]:
+        """Строки описания плана для вывода в лог"""
+        return ['План выполнения:'] + [f'  {note}' for note in self.notes]
+
+
+def plan_execution(path: Union[str, Path], parsing: Optional[str] = None,
+                   processes: Optional[int] = None, tables: Optional[str] = None,
+                   preview=None, resources: Optional[Resources] = None) -> ExecutionPlan:
+    """
+    Составляет план обработки входного файла.
+
+    Args:
+        path: Входной файл (лог или структурированный дамп)
+        parsing: Заданный режим разбора (PARSING_MODES) или None - выбор
+        processes: Заданное число процессов или None (0) - выбор
+        tables: Заданный режим таблиц (TABLE_MODES) или None - по числу строк
+        preview: Обзор лога (LogPreview), если уже построен
+        resources: Ресурсы машины (по умолчанию определяются при необходимости)
+
+    Returns:
+        ExecutionPlan: План выполнения
+    """
+    mode, parsing_reason = plan_parsing(path, parsing, resources, preview)
+    merge_cells, tables_reason = plan_tables(tables)
+    notes = [f"Разбор: {'в памяти' if mode == 'memory' else 'потоковый'} ({parsing_reason})"]
+    if merge_cells is None:
+        notes.append(f'Таблицы: {tables_reason}')
+    else:
+        notes.append(f"Таблицы: {'с объединением' if merge_cells else 'без объединения'} "
+                     f"ячеек ({tables_reason})")
+    processes = processes or env_processes()
+    resources = resources or Resources.detect()
+    if processes:
+        notes.append(f'Вычисления: процессов {processes} (задано явно)')
+    elif resources.cores < 2:
+        notes.append('Вычисления: в одном процессе (доступно одно ядро)')
+    else:
+        notes.append(f'Вычисления: пул процессов - при большом объеме ({resources.describe()})')
+    return ExecutionPlan(mode, merge_cells, processes or None, notes)
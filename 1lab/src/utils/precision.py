@@ -0,0 +1,201 @@
+"""
+Расчет в пониженной точности (float32) и отчет о его погрешности.
+
+В режиме float32 веса сети хранятся в массивах float32 (вдвое меньше
+памяти и объема контрольных точек), ошибки γ, коррекция весов, обучение
+и прямой проход выполняются в float32. Чтобы потеря точности была видна,
+результат сравнивается с эталонным расчетом в float64 по тем же данным.
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.calculations import calculate_errors
+from utils.network import NetworkArrays
+from utils.planner import format_size
+from utils.selection import NeuronSelection
+from utils.sparse import layer_params
+from utils.training import optimizer_correction
+from utils.vectorized import bipolar_derivative, bipolar_sigmoid
+
+# Точность расчета: название -> тип элементов массивов
+PRECISIONS = {'float64': np.float64, 'float32': np.float32}
+DEFAULT_PRECISION = 'float64'
+
+
+def precision_dtype(precision: Optional[str]) -> np.dtype:
+    """Тип элементов массивов для точности расчета (None - DEFAULT_PRECISION)"""
+    precision = precision or DEFAULT_PRECISION
+    if precision not in PRECISIONS:
+        raise ValueError(f"Неизвестная точность {precision}, допустимы: {', '.join(PRECISIONS)}")
+    return np.dtype(PRECISIONS[precision])
+
+
+def errors_in_precision(errors: Dict[Tuple[int, int], Tuple[float, float, float]],
+                        weighted_sums: Dict[Tuple[int, int], float],
+                        weights: Dict[Tuple[int, int], List[float]],
+                        alpha: float, target: float,
+                        dtype) -> Dict[Tuple[int, int], Tuple[float, float, float]]:
+    """
+    Пересчитывает ошибки calculate_errors в заданной точности.
+
+    Формулы и набор нейронов те же (γ выхода = 2*(y-t)*F'(S),
+    γ скрытого нейрона = γ выхода * w * F'(S)), но взвешенные суммы, веса
+    и все промежуточные значения имеют тип dtype.
+
+    Args:
+        errors: Результат calculate_errors (задает нейроны)
+        weighted_sums: Словарь взвешенных сумм
+        weights: Словарь весов
+        alpha: Коэффициент крутизны α
+        target: Целевое значение t
+        dtype: Тип расчета (например, np.float32)
+
+    Returns:
+        Dict: Ошибки в формате calculate_errors
+    """
+    cast = np.dtype(dtype).type
+    alpha, target = cast(alpha), cast(target)
+    output_s = cast(weighted_sums.get((2, 1), 0.0))
+    output_error = 2 * (bipolar_sigmoid(output_s, alpha) - target) * bipolar_derivative(output_s, alpha)
+
+    keys = list(errors)
+    sums = np.array([weighted_sums.get(key, 0.0) for key in keys], dtype=dtype)
+    derivatives = bipolar_derivative(sums, alpha)
+    output_weights = weights.get((2, 1), [])
+    # Для выходного нейрона множитель γ_выход * w заменяется на 2*(y-t)
+    factors = np.array([output_weights[neuron - 1] if layer == 1 and neuron <= len(output_weights)
+                        else 0.0 for layer, neuron in keys], dtype=dtype)
+    gammas = output_error * factors * derivatives
+    for index, key in enumerate(keys):
+        if key == (2, 1):
+            gammas[index] = output_error
+    return {key: (float(s), float(d), float(g))
+            for key, s, d, g in zip(keys, sums.tolist(), derivatives.tolist(), gammas.tolist())}
+
+
+def _difference(reference: np.ndarray, reduced: np.ndarray) -> Tuple[float, float]:
+    """
+    Наибольшее отклонение и оно же относительно наибольшего |значения|
+    эталона (по норме, чтобы близкие к нулю значения не завышали оценку).
+    """
+    if reference.size == 0:
+        return 0.0, 0.0
+    deviation = float(np.max(np.abs(reduced.astype(np.float64) - reference)))
+    scale = float(np.max(np.abs(reference)))
+    return deviation, deviation / scale if scale else deviation
+
+
+def _network_values(network: NetworkArrays) -> Tuple[np.ndarray, np.ndarray]:
+    """Все веса и все смещения сети одним вектором каждые"""
+    weights = [np.ravel(layer_params(m)) for m in network.layers]
+    biases = [np.ravel(b) for b in network.biases]
+    return (np.concatenate(weights) if weights else np.zeros(0),
+            np.concatenate(biases) if biases else np.zeros(0))
+
+
+class PrecisionReport:
+    """Отклонения расчета в пониженной точности от эталонного расчета float64"""
+
+    def __init__(self, precision: str, rows: List[Tuple[str, float, float]],
+                 memory: Tuple[int, int]):
+        """
+        Args:
+            precision: Точность расчета (ключ PRECISIONS)
+            rows: Величина, наибольшее отклонение, относительное отклонение
+            memory: Объем весов сети в байтах: эталон и расчет в пониженной точности
+        """
+        self.precision = precision
+        self.rows = rows
+        self.memory = memory
+
+    def describe(self) -> List[str]:
+        """Строки отчета для вывода в лог"""
+        lines = [f'Точность {self.precision} относительно расчета float64:']
+        for name, deviation, relative in self.rows:
+            digits = f', верных знаков ~{-math.log10(relative):.0f}' if relative > 0 else ''
+            lines.append(f'  {name}: наибольшее отклонение {deviation:.3g} '
+                         f'(относительное {relative:.3g}{digits})')
+        reference, reduced = self.memory
+        lines.append(f'  Память весов: {format_size(reduced)} вместо {format_size(reference)}')
+        return lines
+
+
+def network_rows(reference: NetworkArrays, reduced: NetworkArrays,
+                 label: str = '') -> List[Tuple[str, float, float]]:
+    """Строки отчета для весов и смещений двух сетей одной структуры"""
+    reference_weights, reference_biases = _network_values(reference)
+    reduced_weights, reduced_biases = _network_values(reduced)
+    return [(f'Веса{label}',) + _difference(reference_weights, reduced_weights),
+            (f'Смещения{label}',) + _difference(reference_biases, reduced_biases)]
+
+
+def correction_precision_report(weights: Dict[Tuple[int, int], List[float]],
+                                biases: Dict[Tuple[int, int], float],
+                                weighted_sums: Dict[Tuple[int, int], float],
+                                input_signals: List[float],
+                                alpha: float, target: float, learning_rate: float,
+                                optimizer: str = 'sgd',
+                                selection: Optional[NeuronSelection] = None,
+                                precision: str = 'float32',
+                                prune: bool = False) -> PrecisionReport:
+    """
+    Отчет о погрешности коррекции весов по образу из лога в пониженной точности.
+
+    Ошибки γ и новые веса рассчитываются дважды - в float64 и в precision -
+    по одним и тем же весам, суммам и сигналам из лога.
+
+    Args:
+        weights: Словарь весов
+        biases: Словарь смещений
+        weighted_sums: Словарь взвешенных сумм
+        input_signals: Входные сигналы сети
+        alpha: Коэффициент крутизны α
+        target: Целевое значение t
+        learning_rate: Скорость обучения η
+        optimizer: Правило коррекции
+        selection: Выбор нейронов (как у этапа errors)
+        precision: Проверяемая точность
+        prune: Прореженная сеть - нулевые синапсы не корректируются (как у конвейера)
+
+    Returns:
+        PrecisionReport: Отклонения γ и новых весов
+    """
+    dtype = precision_dtype(precision)
+    reference_errors = calculate_errors(weighted_sums, weights, alpha, target, selection=selection)
+    reduced_errors = errors_in_precision(reference_errors, weighted_sums, weights, alpha, target, dtype)
+    keys = list(reference_errors)
+    rows = [('γ',) + _difference(np.array([reference_errors[key][2] for key in keys]),
+                                 np.array([reduced_errors[key][2] for key in keys]))]
+
+    reference = NetworkArrays.from_dicts(weights, biases, sparse='auto' if prune else False)
+    reduced = reference.astype(dtype)
+    reference_new = optimizer_correction(reference, reference_errors, input_signals, weighted_sums,
+                                         alpha, optimizer, learning_rate)
+    reduced_new = optimizer_correction(reduced, reduced_errors, input_signals, weighted_sums,
+                                       alpha, optimizer, learning_rate)
+    rows += network_rows(reference_new, reduced_new, ' после коррекции')
+    return PrecisionReport(precision, rows, (reference.nbytes, reduced.nbytes))
+
+
+def training_precision_report(reference: NetworkArrays, reduced: NetworkArrays,
+                              reference_history: List[float], reduced_history: List[float],
+                              precision: str = 'float32') -> PrecisionReport:
+    """
+    Отчет о погрешности обучения в пониженной точности.
+
+    Args:
+        reference: Веса после обучения в float64
+        reduced: Веса после того же обучения в precision
+        reference_history: Ошибка после каждой эпохи в float64
+        reduced_history: Ошибка после каждой эпохи в precision
+        precision: Проверяемая точность
+
+    Returns:
+        PrecisionReport: Отклонения весов и ошибки по эпохам
+    """
+    rows = network_rows(reference, reduced, ' после обучения')
+    rows.append(('Ошибка по эпохам',) + _difference(np.asarray(reference_history, dtype=np.float64),
+                                                    np.asarray(reduced_history, dtype=np.float64)))
+    return PrecisionReport(precision, rows, (reference.nbytes, reduced.nbytes))
@@ -0,0 +1,311 @@
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+# Реестр по умолчанию; путь можно переопределить переменной окружения KPS_REGISTRY
+DEFAULT_REGISTRY_PATH = Path.home() / '.kps' / 'runs.sqlite'
+REGISTRY_ENV = 'KPS_REGISTRY'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    log_path TEXT NOT NULL,
+    log_name TEXT NOT NULL,
+    log_mtime_ns INTEGER NOT NULL,
+    log_size INTEGER NOT NULL,
+    processed_at TEXT NOT NULL,
+    alpha REAL NOT NULL,
+    target REAL NOT NULL,
+    learning_rate REAL NOT NULL,
+    optimizer TEXT NOT NULL,
+    selection TEXT NOT NULL DEFAULT '',
+    precision TEXT NOT NULL DEFAULT 'float64',
+    cycles INTEGER,
+    output_s REAL,
+    output_error REAL,
+    UNIQUE (log_path, log_mtime_ns, log_size, alpha, target, learning_rate, optimizer, selection,
+            precision)
+);
+CREATE INDEX IF NOT EXISTS runs_processed_at ON runs (processed_at);
+CREATE INDEX IF NOT EXISTS runs_output_error ON runs (output_error);
+CREATE INDEX IF NOT EXISTS runs_log_name ON runs (log_name);
+
+CREATE TABLE IF NOT EXISTS neurons (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    layer INTEGER NOT NULL,
+    neuron INTEGER NOT NULL,
+    s REAL,
+    derivative REAL,
+    error REAL,
+    old_bias REAL,
+    new_bias REAL,
+    PRIMARY KEY (run_id, layer, neuron)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS neurons_by_neuron ON neurons (layer, neuron, run_id);
+CREATE INDEX IF NOT EXISTS neurons_error ON neurons (error);
+
+CREATE TABLE IF NOT EXISTS weights (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    layer INTEGER NOT NULL,
+    neuron INTEGER NOT NULL,
+    synapse INTEGER NOT NULL,
+    old_weight REAL NOT NULL,
+    new_weight REAL NOT NULL,
+    PRIMARY KEY (run_id, layer, neuron, synapse)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS weights_by_synapse ON weights (layer, neuron, synapse, run_id);
+'''
+
+# Перенос таблицы runs из реестров без столбца precision: ключ UNIQUE
+# через ALTER TABLE не меняется, поэтому таблица пересоздается
+# (прежние запуски считались в float64)
+MIGRATE_PRECISION = '''
+CREATE TABLE runs_migrated (
+    id INTEGER PRIMARY KEY,
+    log_path TEXT NOT NULL,
+    log_name TEXT NOT NULL,
+    log_mtime_ns INTEGER NOT NULL,
+    log_size INTEGER NOT NULL,
+    processed_at TEXT NOT NULL,
+    alpha REAL NOT NULL,
+    target REAL NOT NULL,
+    learning_rate REAL NOT NULL,
+    optimizer TEXT NOT NULL,
+    selection TEXT NOT NULL DEFAULT '',
+    precision TEXT NOT NULL DEFAULT 'float64',
+    cycles INTEGER,
+    output_s REAL,
+    output_error REAL,
+    UNIQUE (log_path, log_mtime_ns, log_size, alpha, target, learning_rate, optimizer, selection,
+            precision)
+);
+INSERT INTO runs_migrated (id, log_path, log_name, log_mtime_ns, log_size, processed_at, alpha,
+                           target, learning_rate, optimizer, selection, cycles, output_s,
+                           output_error)
+    SELECT id, log_path, log_name, log_mtime_ns, log_size, processed_at, alpha, target,
+           learning_rate, optimizer, selection, cycles, output_s, output_error FROM runs;
+DROP TABLE runs;
+ALTER TABLE runs_migrated RENAME TO runs;
+'''
+
+
+def default_registry_path() -> Path:
+    """Путь реестра: переменная окружения KPS_REGISTRY или DEFAULT_REGISTRY_PATH"""
+    return Path(os.environ.get(REGISTRY_ENV) or DEFAULT_REGISTRY_PATH)
+
+
+class RunRegistry:
+    """
+    Реестр обработанных логов в SQLite.
+
+    Для каждого запуска хранятся метаданные лога, α, t, η, правило
+    коррекции, точность расчета, число циклов обучения, а по нейронам -
+    S, F'(S), γ, смещения и веса синапсов до и после коррекции. Запуск
+    записывается одной транзакцией; повторная обработка того же файла
+    с теми же параметрами заменяет прежнюю запись.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None):
+        """
+        Args:
+            path: Файл базы данных (по умолчанию - default_registry_path())
+        """
+        self.path = Path(path) if path is not None else default_registry_path()
+        if str(self.path) != ':memory:':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self._migrate()
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def _migrate(self) -> None:
+        """Добавляет столбец precision в реестр прежней версии (до включения внешних ключей)"""
+        columns = {row[1] for row in self.connection.execute('PRAGMA table_info(runs)')}
+        if columns and 'precision' not in columns:
+            # При включенных внешних ключах DROP TABLE runs удалил бы нейроны и веса
+            self.connection.executescript(f'BEGIN;{MIGRATE_PRECISION}COMMIT;')
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'RunRegistry':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def record_pipeline(self, pipeline) -> int:
+        """
+        Записывает результаты конвейера: ошибки, новые веса и параметры.
+
+        Args:
+            pipeline: Конвейер обработки с заданными input_file, alpha,
+                      target, learning_rate, optimizer и precision
+
+        Returns:
+            int: Номер запуска в реестре
+        """
+        log_path, mtime_ns, size = pipeline.get_param('input_file')
+        selection = pipeline.get_param('selection')
+        cycles = pipeline.get('parsed_weights')[0]
+        new_weights, new_biases = pipeline.get('corrected')
+        return self.record_run(
+            (log_path, mtime_ns, size),
+            pipeline.get_param('alpha'), pipeline.get_param('target'),
+            pipeline.get_param('learning_rate'), pipeline.get_param('optimizer'),
+            cycles, pipeline.get('errors'), pipeline.get('weights'), pipeline.get('biases'),
+            new_weights, new_biases, str(selection) if selection is not None else '',
+            pipeline.get_param('precision'))
+
+    def record_run(self, signature: Tuple[str, int, int], alpha: float, target: float,
+                   learning_rate: float, optimizer: str, cycles: Optional[int],
+                   errors, old_weights, old_biases, new_weights, new_biases,
+                   selection: str = '', precision: str = 'float64') -> int:
+        """
+        Записывает запуск одной транзакцией.
+
+        Нейроны без рассчитанной ошибки записываются с прежними весами
+        (как в corrected_network). Строки нейронов и весов передаются в
+        executemany генераторами, без промежуточных списков.
+
+        Args:
+            signature: Сигнатура лога (путь, время изменения, размер)
+            alpha, target, learning_rate, optimizer: Параметры расчета
+            cycles: Число циклов обучения из лога
+            errors: Результат calculate_errors
+            old_weights, old_biases: Веса и смещения из лога
+            new_weights, new_biases: Результат коррекции
+            selection: Текстовая запись выбора нейронов ('' - вся сеть)
+            precision: Точность расчета ('float64' или 'float32')
+
+        Returns:
+            int: Номер запуска
+        """
+        log_path, mtime_ns, size = signature
+        # Ошибка выходного нейрона - для отбора запусков без чтения таблицы neurons
+        output_layer = max((layer for layer, _ in old_weights), default=None)
+        output = errors.get((output_layer, 1))
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM runs WHERE log_path = ? AND log_mtime_ns = ? AND log_size = ? AND alpha = ? '
+                'AND target = ? AND learning_rate = ? AND optimizer = ? AND selection = ? AND precision = ?',
+                (str(log_path), mtime_ns, size, alpha, target, learning_rate, optimizer, selection,
+                 precision))
+            run_id = self.connection.execute(
+                'INSERT INTO runs (log_path, log_name, log_mtime_ns, log_size, processed_at, alpha, '
+                'target, learning_rate, optimizer, selection, precision, cycles, output_s, output_error) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (str(log_path), Path(log_path).name, mtime_ns, size,
+                 datetime.now().isoformat(timespec='seconds'), alpha, target, learning_rate,
+                 optimizer, selection, precision, cycles,
+                 output[0] if output else None, output[2] if output else None)).lastrowid
+
+            # Нейроны, веса которых не разбирались (при выборе нейронов), не записываются
+            keys = sorted({key for key, values in old_weights.items() if values} | set(errors))
+            self.connection.executemany(
+                'INSERT INTO neurons VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                ((run_id, layer, neuron) + tuple(errors.get((layer, neuron), (None, None, None)))
+                 + (old_biases.get((layer, neuron)),
+                    new_biases.get((layer, neuron), old_biases.get((layer, neuron))))
+                 for layer, neuron in keys))
+            self.connection.executemany('INSERT INTO weights VALUES (?, ?, ?, ?, ?, ?)',
+                                        self._weight_rows(run_id, keys, old_weights, new_weights))
+        return run_id
+
+    @staticmethod
+    def _weight_rows(run_id: int, keys: List[Tuple[int, int]], old_weights,
+                     new_weights) -> Iterator[Tuple]:
+        """Строки таблицы weights: синапсы нумеруются с 1"""
+        for key in keys:
+            old = old_weights.get(key, [])
+            new = new_weights.get(key, old)
+            for synapse, (before, after) in enumerate(zip(old, new), 1):
+                yield run_id, key[0], key[1], synapse, before, after
+
+    def query(self, sql: str, params: Tuple = ()) -> pd.DataFrame:
+        """Произвольный запрос к реестру"""
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def runs(self, min_output_error: Optional[float] = None, since: Optional[str] = None,
+             name: Optional[str] = None) -> pd.DataFrame:
+        """
+        Запуски реестра.
+
+        Args:
+            min_output_error: Только запуски с |γ| выходного нейрона не меньше заданного
+            since: Только запуски, обработанные не раньше даты (ISO, например 2024-05-01)
+            name: Шаблон имени лога (LIKE, например 'run_%')
+
+        Returns:
+            pd.DataFrame: Запуски по времени обработки
+        """
+        conditions, params = [], []
+        if min_output_error is not None:
+            # Условие по столбцу с индексом, а не по ABS(...)
+            conditions.append('(output_error >= ? OR output_error <= ?)')
+            params += [min_output_error, -min_output_error]
+        if since is not None:
+            conditions.append('processed_at >= ?')
+            params.append(since)
+        if name is not None:
+            conditions.append('log_name LIKE ?')
+            params.append(name)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self.query(
+            'SELECT id, log_name, processed_at, alpha, target, learning_rate, optimizer, selection, '
+            f'precision, cycles, output_s, output_error FROM runs {where} ORDER BY processed_at, id', tuple(params))
+
+    def neuron_history(self, layer: int, neuron: int, since: Optional[str] = None) -> pd.DataFrame:
+        """
+        S, F'(S), γ и смещения нейрона по всем запускам.
+
+        Args:
+            layer: Номер слоя
+            neuron: Номер нейрона
+            since: Только запуски, обработанные не раньше даты
+
+        Returns:
+            pd.DataFrame: По строке на запуск
+        """
+        return self.query(
+            'SELECT r.id AS run_id, r.log_name, r.processed_at, n.s, n.derivative, n.error, '
+            'n.old_bias, n.new_bias FROM neurons n JOIN runs r ON r.id = n.run_id '
+            'WHERE n.layer = ? AND n.neuron = ? AND r.processed_at >= ? '
+            'ORDER BY r.processed_at, r.id', (layer, neuron, since or ''))
+
+    def weight_history(self, layer: int, neuron: int, synapse: Optional[int] = None,
+                       since: Optional[str] = None) -> pd.DataFrame:
+        """
+        Веса синапсов нейрона до и после коррекции по всем запускам.
+
+        Args:
+            layer: Номер слоя
+            neuron: Номер нейрона
+            synapse: Номер синапса (с 1) или None - все синапсы
+            since: Только запуски, обработанные не раньше даты
+
+        Returns:
+            pd.DataFrame: По строке на запуск и синапс
+        """
+        condition, params = '', [layer, neuron]
+        if synapse is not None:
+            condition = 'AND w.synapse = ? '
+            params.append(synapse)
+        params.append(since or '')
+        return self.query(
+            'SELECT r.id AS run_id, r.log_name, r.processed_at, w.synapse, w.old_weight, '
+            'w.new_weight, w.new_weight - w.old_weight AS delta '
+            'FROM weights w JOIN runs r ON r.id = w.run_id '
+            f'WHERE w.layer = ? AND w.neuron = ? {condition}AND r.processed_at >= ? '
+            'ORDER BY r.processed_at, r.id, w.synapse', tuple(params))
+
+    def delete_run(self, run_id: int) -> None:
+        """Удаляет запуск вместе с его нейронами и весами"""
+        with self.connection:
+            self.connection.execute('DELETE FROM runs WHERE id = ?', (run_id,))
@@ -0,0 +1,186 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Элемент выбора: номер "600" или диапазон "500-520"
+RANGE_PATTERN = re.compile(r'^(\d+)(?:\s*-\s*(\d+))?$')
+TOP_PATTERN = re.compile(r'^top\s*=\s*(\d+)$', re.IGNORECASE)
+
+
+class NeuronSelection:
+    """
+    Выбор нейронов для частичного разбора, расчета и таблиц.
+
+    Для каждого выбранного слоя задается список диапазонов номеров нейронов
+    (None - весь слой); без словаря слоев выбраны все нейроны сети.
+    top_k оставляет из выбранных нейронов k с наибольшим |γ|.
+
+    Текстовая запись (см. parse): "1:500-520,600; 2; top=20" - нейроны
+    500-520 и 600 слоя 1, весь слой 2, из них 20 с наибольшей ошибкой.
+    """
+
+    def __init__(self, layers: Optional[Dict[int, Optional[List[Tuple[int, int]]]]] = None,
+                 top_k: Optional[int] = None):
+        """
+        Args:
+            layers: Слой → список диапазонов (первый, последний) или None
+            top_k: Число нейронов с наибольшим |γ| или None
+        """
+        if top_k is not None and top_k < 1:
+            raise ValueError(f"Число нейронов top должно быть положительным, получено {top_k}")
+        self.layers = None
+        if layers is not None:
+            self.layers = {layer: _merge(ranges) if ranges is not None else None
+                           for layer, ranges in layers.items()}
+        self.top_k = top_k
+
+    @classmethod
+    def parse(cls, text: str) -> Optional['NeuronSelection']:
+        """
+        Разбирает текстовую запись выбора.
+
+        Части разделяются ";": "слой:номера" (номера и диапазоны через
+        запятую), "слой" (весь слой), "top=k". Пустая строка - выбора нет.
+
+        Args:
+            text: Текстовая запись
+
+        Returns:
+            Optional[NeuronSelection]: Выбор или None для пустой строки
+        """
+        layers = {}
+        top_k = None
+        for part in (part.strip() for part in text.split(';')):
+            if not part:
+                continue
+            top = TOP_PATTERN.match(part)
+            if top:
+                top_k = int(top.group(1))
+                continue
+            layer_text, _, items = part.partition(':')
+            if not layer_text.strip().isdigit() or int(layer_text) < 1:
+                raise ValueError(f"Некорректный номер слоя в выборе нейронов: {part}")
+            layer = int(layer_text)
+            if not items.strip():
+                layers[layer] = None
+                continue
+            ranges = []
+            for item in (item.strip() for item in items.split(',')):
+                match = RANGE_PATTERN.match(item)
+                if not match:
+                    raise ValueError(f"Некорректный номер или диапазон нейронов: {item}")
+                first = int(match.group(1))
+                last = int(match.group(2) or first)
+                if first < 1 or last < first:
+                    raise ValueError(f"Некорректный диапазон нейронов: {item}")
+                ranges.append((first, last))
+            if layer not in layers or layers[layer] is not None:
+                layers[layer] = (layers.get(layer) or []) + ranges
+        if not layers and top_k is None:
+            return None
+        return cls(layers or None, top_k)
+
+    def __str__(self) -> str:
+        parts = []
+        for layer, ranges in sorted((self.layers or {}).items()):
+            if ranges is None:
+                parts.append(str(layer))
+            else:
+                items = (str(first) if first == last else f'{first}-{last}' for first, last in ranges)
+                parts.append(f"{layer}:{','.join(items)}")
+        if self.top_k is not None:
+            parts.append(f'top={self.top_k}')
+        return '; '.join(parts)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, NeuronSelection) and self.layers == other.layers
+                and self.top_k == other.top_k)
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    @property
+    def min_layer(self) -> int:
+        """Первый слой, в котором выбраны нейроны"""
+        return min(self.layers) if self.layers else 1
+
+    def contains(self, key: Tuple[int, int]) -> bool:
+        """Входит ли нейрон (слой, номер) в выбор"""
+        if self.layers is None:
+            return True
+        layer, neuron = key
+        if layer not in self.layers:
+            return False
+        ranges = self.layers[layer]
+        return ranges is None or any(first <= neuron <= last for first, last in ranges)
+
+    def neurons(self, layer: int, count: int) -> List[int]:
+        """
+        Выбранные номера нейронов слоя.
+
+        Args:
+            layer: Номер слоя
+            count: Число нейронов в слое
+
+        Returns:
+            List[int]: Номера нейронов по возрастанию (не больше count)
+        """
+        if self.layers is None or self.layers.get(layer, ()) is None:
+            return list(range(1, count + 1))
+        result = []
+        for first, last in self.layers.get(layer, []):
+            result.extend(range(first, min(last, count) + 1))
+        return result
+
+    def needs_weights(self, key: Tuple[int, int]) -> bool:
+        """
+        Нужны ли веса нейрона: выбранные нейроны и все нейроны слоев после
+        первого выбранного (ошибки скрытых нейронов рассчитываются через
+        веса и ошибки следующего слоя).
+        """
+        return key[0] > self.min_layer or self.contains(key)
+
+    def needs_sum(self, key: Tuple[int, int]) -> bool:
+        """
+        Нужна ли взвешенная сумма нейрона: кроме нужных для весов, это
+        суммы слоя, выходы которого являются входами выбранного слоя.
+        """
+        return (self.needs_weights(key) or self.layers is None
+                or self.layers.get(key[0] + 1, ()) != ())
+
+    def select_top(self, errors: Dict[Tuple[int, int], Tuple[float, float, float]]
+                   ) -> Dict[Tuple[int, int], Tuple[float, float, float]]:
+        """
+        Оставляет выбранные нейроны, а при top_k - k из них с наибольшим |γ|.
+
+        Args:
+            errors: Результат calculate_errors
+
+        Returns:
+            Dict: Ошибки выбранных нейронов в исходном порядке
+        """
+        chosen = [key for key in errors if self.contains(key)]
+        if self.top_k is not None:
+            top = set(sorted(chosen, key=lambda key: -abs(errors[key][2]))[:self.top_k])
+            chosen = [key for key in chosen if key in top]
+        return {key: errors[key] for key in chosen}
+
+    def resolve(self, keys: Iterable[Tuple[int, int]]) -> 'NeuronSelection':
+        """
+        Явный выбор из заданных нейронов (без top_k) - например, нейронов,
+        оставленных select_top, для таблиц весов и коррекции.
+        """
+        layers = {}
+        for layer, neuron in keys:
+            layers.setdefault(layer, []).append((neuron, neuron))
+        return NeuronSelection(layers)
+
+
+def _merge(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Сортирует диапазоны и объединяет пересекающиеся и смежные"""
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
@@ -0,0 +1,197 @@
+"""
+Передача массивов numpy между процессами через разделяемую память.
+
+Владелец создает блок SharedArrays с набором именованных массивов и
+передает другим процессам его описание (descriptor): имя блока, для
+каждого массива - смещение, форму и тип, и небольшие метаданные
+(например, структуру сети). Описание занимает сотни байт независимо от
+объема данных, поэтому передача сети между процессами не требует
+сериализации весов. Получатель подключается к блоку (SharedArrays.attach)
+и работает с представлениями массивов без копирования; изменения видны
+всем процессам.
+
+Блок удаляется владельцем при close() или выходе из with - и при
+завершении работы, и при прерывании (исключении); если владелец не закрыл
+блок, он удаляется при сборке объекта или завершении интерпретатора.
+Подключившиеся процессы только закрывают свое отображение.
+"""
+import weakref
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.network import NetworkArrays
+from utils.sparse import SparseLayer
+
+# Выравнивание начала каждого массива в блоке
+ALIGNMENT = 64
+
+# Массив для размещения в блоке: готовый массив (копируется в блок) или
+# форма и тип нового массива (заполнен нулями)
+ArraySpec = Union[np.ndarray, Tuple[Tuple[int, ...], Any]]
+
+
+def _release(memory: shared_memory.SharedMemory, owner: bool) -> None:
+    """Закрывает отображение блока; владелец удаляет блок"""
+    try:
+        memory.close()
+    except BufferError:
+        # Остались представления буфера (например, в трассировке исключения):
+        # отображение освободится вместе с ними
+        pass
+    if owner:
+        try:
+            memory.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedArrays:
+    """Набор именованных массивов numpy в одном блоке разделяемой памяти"""
+
+    def __init__(self, memory: shared_memory.SharedMemory,
+                 layout: Dict[str, Tuple[int, Tuple[int, ...], str]],
+                 meta: Optional[Dict[str, Any]], owner: bool):
+        """
+        Создается через create или attach.
+
+        Args:
+            memory: Блок разделяемой памяти
+            layout: Имя массива -> (смещение, форма, тип numpy в виде строки)
+            meta: Метаданные, передаваемые вместе с описанием
+            owner: Удаляет ли объект блок при закрытии
+        """
+        self.memory = memory
+        self.layout = layout
+        self.meta = meta or {}
+        self.owner = owner
+        self.arrays: Dict[str, np.ndarray] = {
+            key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf, offset=offset)
+            for key, (offset, shape, dtype) in layout.items()
+        }
+        self._finalizer = weakref.finalize(self, _release, memory, owner)
+
+    @classmethod
+    def create(cls, arrays: Dict[str, ArraySpec],
+               meta: Optional[Dict[str, Any]] = None) -> 'SharedArrays':
+        """
+        Создает блок и размещает в нем массивы.
+
+        Args:
+            arrays: Имя -> массив (копируется) или (форма, тип) нового массива
+            meta: Метаданные описания (должны сериализоваться pickle)
+
+        Returns:
+            SharedArrays: Блок, владельцем которого является вызывающий процесс
+        """
+        layout = {}
+        offset = 0
+        for key, spec in arrays.items():
+            if isinstance(spec, np.ndarray):
+                shape, dtype = spec.shape, spec.dtype
+            else:
+                shape, dtype = spec
+                dtype = np.dtype(dtype)
+            shape = tuple(int(n) for n in shape)
+            layout[key] = (offset, shape, dtype.str)
+            size = int(np.prod(shape)) * dtype.itemsize
+            offset += (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        shared = cls(memory, layout, meta, owner=True)
+        for key, spec in arrays.items():
+            if isinstance(spec, np.ndarray):
+                shared.arrays[key][...] = spec
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor: Tuple[str, Dict[str, Tuple[int, Tuple[int, ...], str]],
+                                      Dict[str, Any]]) -> 'SharedArrays':
+        """Подключается к блоку по описанию (см. descriptor) без копирования данных"""
+        name, layout, meta = descriptor
+        return cls(shared_memory.SharedMemory(name=name), layout, meta, owner=False)
+
+    @property
+    def descriptor(self) -> Tuple[str, Dict[str, Tuple[int, Tuple[int, ...], str]], Dict[str, Any]]:
+        """Описание блока для передачи в другие процессы: имя, размещение массивов, метаданные"""
+        return self.memory.name, self.layout, self.meta
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.arrays[key]
+
+    def close(self) -> None:
+        """
+        Закрывает блок (повторный вызов ничего не делает). Представления
+        массивов, полученные из блока, после закрытия использовать нельзя.
+        """
+        self.arrays = {}
+        self._finalizer()
+
+    def __enter__(self) -> 'SharedArrays':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def network_arrays(network: NetworkArrays, prefix: str = 'network'
+                   ) -> Tuple[Dict[str, np.ndarray], List[Tuple[str, Tuple[int, int]]]]:
+    """
+    Массивы сети для размещения в блоке и ее структура для метаданных.
+
+    Args:
+        network: Веса сети
+        prefix: Префикс имен массивов (в блоке может быть несколько сетей)
+
+    Returns:
+        Tuple: Имя -> массив и список (вид слоя 'dense'/'sparse', форма)
+    """
+    arrays = {}
+    structure = []
+    for index, (layer, bias) in enumerate(zip(network.layers, network.biases)):
+        name = f'{prefix}.{index}'
+        if isinstance(layer, SparseLayer):
+            arrays[f'{name}.data'] = layer.data
+            arrays[f'{name}.indptr'] = layer.indptr
+            arrays[f'{name}.indices'] = layer.indices
+            structure.append(('sparse', layer.shape))
+        else:
+            arrays[f'{name}.weights'] = np.asarray(layer)
+            structure.append(('dense', tuple(layer.shape)))
+        arrays[f'{name}.bias'] = np.asarray(bias)
+    return arrays, structure
+
+
+def share_network(network: NetworkArrays, arrays: Optional[Dict[str, ArraySpec]] = None,
+                  meta: Optional[Dict[str, Any]] = None) -> SharedArrays:
+    """
+    Размещает сеть (и дополнительные массивы) в новом блоке.
+
+    Args:
+        network: Веса сети
+        arrays: Дополнительные массивы блока (см. SharedArrays.create)
+        meta: Дополнительные метаданные
+
+    Returns:
+        SharedArrays: Блок; сеть из него - attached_network
+    """
+    layout, structure = network_arrays(network)
+    return SharedArrays.create({**layout, **(arrays or {})}, {**(meta or {}), 'network': structure})
+
+
+def attached_network(shared: SharedArrays, prefix: str = 'network') -> NetworkArrays:
+    """
+    Сеть, массивы которой - представления блока (без копирования): коррекция
+    ее весов на месте видна всем процессам, подключенным к блоку.
+    """
+    layers = []
+    biases = []
+    for index, (kind, shape) in enumerate(shared.meta[prefix]):
+        name = f'{prefix}.{index}'
+        if kind == 'sparse':
+            layers.append(SparseLayer(shared[f'{name}.indptr'], shared[f'{name}.indices'],
+                                      shared[f'{name}.data'], shape))
+        else:
+            layers.append(shared[f'{name}.weights'])
+        biases.append(shared[f'{name}.bias'])
+    return NetworkArrays(layers, biases)
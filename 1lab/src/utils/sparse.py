@@ -0,0 +1,192 @@
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+# Доля нулевых весов, начиная с которой слой хранится в разреженном виде
+SPARSITY_THRESHOLD = 0.5
+
+
+class SparseLayer:
+    """
+    Матрица весов слоя в формате CSR.
+
+    Хранятся только ненулевые синапсы: data[k] - вес синапса от входа
+    indices[k] к нейрону, строки которого заданы указателями indptr.
+    Нулевые (удаленные при прореживании) синапсы не участвуют в расчете
+    и не восстанавливаются при коррекции весов.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, shape: Sequence[int]):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data)
+        self.shape = (int(shape[0]), int(shape[1]))
+        # Номер строки каждого ненулевого элемента
+        self.rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        # Порядок обхода по столбцам для умножения на транспонированную матрицу
+        self._col_order = np.argsort(self.indices, kind='stable')
+        self._col_ptr = np.concatenate(([0], np.cumsum(np.bincount(self.indices, minlength=self.shape[1]))))
+
+    @classmethod
+    def from_dense(cls, matrix: np.ndarray) -> 'SparseLayer':
+        """Строит разреженную матрицу из плотной"""
+        matrix = np.asarray(matrix)
+        rows, cols = np.nonzero(matrix)
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=matrix.shape[0]))))
+        return cls(indptr, cols, matrix[rows, cols], matrix.shape)
+
+    @classmethod
+    def from_rows(cls, rows: Dict[int, List[float]], n_rows: int, n_cols: int,
+                  dtype=np.float64) -> 'SparseLayer':
+        """
+        Строит разреженную матрицу из списков весов нейронов, минуя плотную матрицу.
+
+        Args:
+            rows: Веса нейронов слоя, ключ - номер строки (с 0)
+            n_rows: Число нейронов слоя
+            n_cols: Число входов слоя
+            dtype: Тип элементов
+
+        Returns:
+            SparseLayer: Разреженная матрица весов
+        """
+        counts = np.zeros(n_rows, dtype=np.int64)
+        indices = []
+        data = []
+        for row in range(n_rows):
+            values = np.asarray(rows.get(row, ()), dtype=dtype)
+            nonzero = np.flatnonzero(values)
+            counts[row] = nonzero.size
+            indices.append(nonzero)
+            data.append(values[nonzero])
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        return cls(indptr,
+                   np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+                   np.concatenate(data) if data else np.zeros(0, dtype=dtype),
+                   (n_rows, n_cols))
+
+    @property
+    def nnz(self) -> int:
+        """Число ненулевых синапсов"""
+        return int(self.data.size)
+
+    @property
+    def dtype(self):
+        """Тип элементов"""
+        return self.data.dtype
+
+    def with_data(self, data: np.ndarray) -> 'SparseLayer':
+        """Матрица с той же структурой и новыми значениями синапсов"""
+        layer = SparseLayer.__new__(SparseLayer)
+        layer.__dict__.update(self.__dict__)
+        layer.data = data
+        return layer
+
+    def astype(self, dtype) -> 'SparseLayer':
+        """Матрица с элементами другого типа"""
+        return self.with_data(self.data.astype(dtype))
+
+    def toarray(self) -> np.ndarray:
+        """Плотная матрица (только для вывода небольших слоев)"""
+        matrix = np.zeros(self.shape, dtype=self.data.dtype)
+        matrix[self.rows, self.indices] = self.data
+        return matrix
+
+    def row(self, i: int) -> np.ndarray:
+        """Плотная строка весов нейрона i (с 0)"""
+        values = np.zeros(self.shape[1], dtype=self.data.dtype)
+        start, end = self.indptr[i], self.indptr[i + 1]
+        values[self.indices[start:end]] = self.data[start:end]
+        return values
+
+    def dot(self, x: np.ndarray) -> np.ndarray:
+        """W·x для вектора (n_in,) или пакета (B, n_in)"""
+        return _segment_sum(x[..., self.indices] * self.data, self.indptr)
+
+    def tdot(self, g: np.ndarray) -> np.ndarray:
+        """Wᵀ·g для вектора (n_out,) или пакета (B, n_out)"""
+        products = g[..., self.rows] * self.data
+        return _segment_sum(products[..., self._col_order], self._col_ptr)
+
+    def outer_gradient(self, gamma: np.ndarray, inputs: np.ndarray) -> np.ndarray:
+        """
+        Градиент γ_j * y_i только по существующим синапсам.
+
+        Для пакета (B, n_out) и (B, n_in) градиенты суммируются по пакету.
+        """
+        products = gamma[..., self.rows] * inputs[..., self.indices]
+        return products if products.ndim == 1 else products.sum(axis=0)
+
+
+def _segment_sum(values: np.ndarray, pointers: np.ndarray) -> np.ndarray:
+    """Суммы последнего измерения values по отрезкам [pointers[k], pointers[k+1])"""
+    n_segments = pointers.size - 1
+    result = np.zeros(values.shape[:-1] + (n_segments,), dtype=values.dtype)
+    if values.shape[-1] == 0:
+        return result
+    starts = pointers[:-1]
+    non_empty = starts < pointers[1:]
+    # Между началами непустых отрезков лежат только пустые, поэтому reduceat
+    # по ним дает ровно суммы непустых отрезков (последний - до конца values)
+    result[..., non_empty] = np.add.reduceat(values, starts[non_empty], axis=-1)
+    return result
+
+
+Layer = Union[np.ndarray, SparseLayer]
+
+
+def density(layer: Layer) -> float:
+    """Доля ненулевых синапсов слоя"""
+    size = layer.shape[0] * layer.shape[1]
+    if size == 0:
+        return 1.0
+    nnz = layer.nnz if isinstance(layer, SparseLayer) else np.count_nonzero(layer)
+    return nnz / size
+
+
+def as_layer(matrix: np.ndarray, threshold: float = SPARSITY_THRESHOLD) -> Layer:
+    """Возвращает разреженную матрицу, если доля нулей не меньше threshold"""
+    if 1.0 - density(matrix) >= threshold:
+        return SparseLayer.from_dense(matrix)
+    return matrix
+
+
+def layer_dot(layer: Layer, x: np.ndarray) -> np.ndarray:
+    """W·x для плотного или разреженного слоя"""
+    if isinstance(layer, SparseLayer):
+        return layer.dot(x)
+    return x @ layer.T
+
+
+def layer_tdot(layer: Layer, g: np.ndarray) -> np.ndarray:
+    """Wᵀ·g для плотного или разреженного слоя"""
+    if isinstance(layer, SparseLayer):
+        return layer.tdot(g)
+    return g @ layer
+
+
+def layer_gradient(layer: Layer, gamma: np.ndarray, inputs: np.ndarray) -> np.ndarray:
+    """
+    Градиент γ_j * y_i в формате слоя: матрица для плотного слоя,
+    вектор значений по ненулевым синапсам для разреженного.
+    """
+    if isinstance(layer, SparseLayer):
+        return layer.outer_gradient(gamma, inputs)
+    if gamma.ndim == 1:
+        return np.outer(gamma, inputs)
+    return gamma.T @ inputs
+
+
+def layer_params(layer: Layer) -> np.ndarray:
+    """Массив обучаемых значений слоя (матрица или значения ненулевых синапсов)"""
+    return layer.data if isinstance(layer, SparseLayer) else layer
+
+
+def with_params(layer: Layer, params: np.ndarray) -> Layer:
+    """Слой той же структуры с новыми обучаемыми значениями"""
+    return layer.with_data(params) if isinstance(layer, SparseLayer) else params
+
+
+def layer_row(layer: Layer, i: int) -> np.ndarray:
+    """Плотная строка весов нейрона i (с 0)"""
+    return layer.row(i) if isinstance(layer, SparseLayer) else np.asarray(layer[i])
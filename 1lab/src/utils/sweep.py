@@ -0,0 +1,237 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.network import NetworkArrays, sums_to_arrays
+from utils.planner import choose_processes
+from utils.shared_arrays import SharedArrays
+from utils.vectorized import bipolar_derivative, bipolar_sigmoid
+
+# Число элементов массивов приращений, начиная с которого сетка делится между процессами
+PARALLEL_THRESHOLD = 5_000_000
+
+SUMMARY_FIELDS = (
+    'output_error',
+    'hidden_error_max_abs',
+    'hidden_error_mean_abs',
+    'delta_norm',
+    'delta_max_abs',
+    'output_bias_delta',
+)
+
+
+def parse_grid(text: str) -> List[float]:
+    """
+    Разбирает сетку значений параметра.
+
+    Поддерживаются списки через ';' или пробел ("0,5; 1; 2") и диапазоны
+    вида "начало:конец:шаг" (конец включается). Допускается десятичная запятая.
+
+    Args:
+        text: Текстовое описание сетки
+
+    Returns:
+        List[float]: Значения параметра
+    """
+    values = []
+    for part in re.split(r'[;\s]+', text.strip()):
+        if not part:
+            continue
+        if ':' in part:
+            bounds = [float(x.replace(',', '.')) for x in part.split(':')]
+            if len(bounds) != 3 or bounds[2] <= 0:
+                raise ValueError(f"Некорректный диапазон: {part}")
+            start, stop, step = bounds
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            values.extend((start + step * np.arange(max(count, 0))).tolist())
+        else:
+            values.append(float(part.replace(',', '.')))
+    if not values:
+        raise ValueError("Сетка значений пуста")
+    return values
+
+
+def _sweep_block(hidden_sums: np.ndarray, output_sum: float,
+                 hidden_weights: np.ndarray, output_weights: np.ndarray,
+                 inputs: np.ndarray, alphas: np.ndarray,
+                 learning_rates: np.ndarray, targets: np.ndarray,
+                 keep_deltas: bool) -> Dict[str, np.ndarray]:
+    """
+    Расчет ошибок и приращений весов для блока сетки одним broadcast-выражением.
+
+    Оси результата: (α, η, t[, нейрон[, вход]]).
+    """
+    alpha = alphas[:, None, None]
+    eta = learning_rates[None, :, None]
+    target = targets[None, None, :]
+
+    # Выходной нейрон: γ = 2*(y - t)*F'(S)
+    output_derivative = bipolar_derivative(output_sum, alpha)
+    output_y = bipolar_sigmoid(output_sum, alpha)
+    output_error = 2 * (output_y - target) * output_derivative                 # (A, 1, T)
+
+    # Скрытый слой: γ_i = γ_выход * w_i * F'(S_i)
+    hidden_derivative = bipolar_derivative(hidden_sums, alpha[..., None])      # (A, 1, 1, H)
+    hidden_error = output_error[..., None] * output_weights * hidden_derivative  # (A, 1, T, H)
+    hidden_out = bipolar_sigmoid(hidden_sums, alpha[..., None])                # (A, 1, 1, H)
+
+    # Приращения: Δω = η * γ_j * y_j, ΔT = η * γ_j
+    output_delta = eta[..., None] * output_error[..., None] * hidden_out       # (A, E, T, H)
+    output_bias_delta = np.broadcast_to(eta * output_error,
+                                        (len(alphas), len(learning_rates), len(targets)))
+    hidden_error_max = np.abs(hidden_error).max(axis=-1, initial=0.0)         # (A, 1, T)
+
+    # Приращения скрытого слоя η*γ_h*x_i образуют внешнее произведение, поэтому
+    # сумма квадратов и наибольший модуль считаются без массива (A, E, T, H, I):
+    # Σ(η*γ_h*x_i)² = η² * Σγ_h² * Σx_i², max|η*γ_h*x_i| = |η| * max|γ_h| * max|x_i|
+    hidden_squared = eta ** 2 * (hidden_error ** 2).sum(axis=-1) * np.sum(inputs ** 2)
+    hidden_max = np.abs(eta) * hidden_error_max * np.abs(inputs).max(initial=0.0)
+    squared = hidden_squared + (output_delta ** 2).sum(axis=-1)
+    delta_max = np.maximum(hidden_max, np.abs(output_delta).max(axis=-1, initial=0.0))
+    grid_shape = output_bias_delta.shape
+
+    result = {
+        'output_error': np.broadcast_to(output_error, grid_shape).copy(),
+        'hidden_error_max_abs': np.broadcast_to(hidden_error_max, grid_shape).copy(),
+        'hidden_error_mean_abs': np.broadcast_to(
+            np.abs(hidden_error).mean(axis=-1) if hidden_error.shape[-1] else 0.0,
+            grid_shape).copy(),
+        'delta_norm': np.sqrt(squared),
+        'delta_max_abs': delta_max,
+        'output_bias_delta': output_bias_delta.copy(),
+    }
+    if keep_deltas:
+        result['hidden_delta'] = eta[..., None, None] * hidden_error[..., None] * inputs  # (A, E, T, H, I)
+        result['hidden_bias_delta'] = np.broadcast_to(
+            eta[..., None] * hidden_error, grid_shape + hidden_error.shape[-1:]).copy()
+        result['output_delta'] = output_delta
+    return result
+
+
+def _sweep_shared(descriptor, start: int, stop: int, output_sum: float,
+                  learning_rates: np.ndarray, targets: np.ndarray, keep_deltas: bool) -> None:
+    """
+    Расчет в процессе пула для значений α[start:stop]: исходные массивы
+    читаются из блока разделяемой памяти, результат записывается в него же.
+    """
+    with SharedArrays.attach(descriptor) as shared:
+        part = _sweep_block(shared['hidden_sums'], output_sum, shared['hidden_weights'],
+                            shared['output_weights'], shared['inputs'], shared['alphas'][start:stop],
+                            learning_rates, targets, keep_deltas)
+        for key, values in part.items():
+            shared[key][start:stop] = values
+
+
+def sweep_hyperparameters(weights: Dict[Tuple[int, int], List[float]],
+                          weighted_sums: Dict[Tuple[int, int], float],
+                          input_signals: List[float],
+                          alphas: Sequence[float],
+                          learning_rates: Sequence[float],
+                          targets: Sequence[float],
+                          keep_deltas: bool = False,
+                          processes: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Рассчитывает ошибки и приращения весов для всех сочетаний α, η и t.
+
+    Расчет эквивалентен вызову calculate_errors и calculate_new_weights для
+    каждой комбинации, но выполняется одним векторным выражением по сетке.
+    При большом объеме сетка делится по α между процессами; исходные массивы
+    и результат находятся в разделяемой памяти (utils.shared_arrays), процессам
+    передается только ее описание.
+
+    Args:
+        weights: Словарь весов двухслойной сети с одним выходным нейроном
+        weighted_sums: Словарь взвешенных сумм
+        input_signals: Входные сигналы сети
+        alphas: Значения коэффициента крутизны α
+        learning_rates: Значения скорости обучения η
+        targets: Целевые значения t
+        keep_deltas: Сохранять ли полные массивы приращений весов
+        processes: Число процессов (None - выбор utils.planner.choose_processes:
+                   пул при сетке от PARALLEL_THRESHOLD значений; 1 - без процессов)
+
+    Returns:
+        Dict[str, np.ndarray]: Массивы формы (α, η, t) для полей SUMMARY_FIELDS,
+        а при keep_deltas также hidden_delta, hidden_bias_delta и output_delta
+    """
+    network = NetworkArrays.from_dicts(weights)
+    if len(network.layers) != 2 or network.layers[1].shape[0] != 1:
+        raise ValueError("Перебор параметров поддерживает двухслойную сеть с одним выходным нейроном")
+    output_weights = network.layers[1][0]
+    n_hidden = output_weights.shape[0]
+    # Как и в calculate_errors, скрытых нейронов столько, сколько весов у выходного
+    hidden_weights = np.zeros((n_hidden, network.layers[0].shape[1]))
+    rows = min(n_hidden, network.layers[0].shape[0])
+    hidden_weights[:rows] = network.layers[0][:rows]
+    hidden_sums, output_sums = sums_to_arrays(weighted_sums, [0, n_hidden, 1])
+    inputs = np.zeros(hidden_weights.shape[1])
+    n_signals = min(len(input_signals), inputs.shape[0])
+    inputs[:n_signals] = input_signals[:n_signals]
+
+    alphas = np.asarray(alphas, dtype=np.float64)
+    learning_rates = np.asarray(learning_rates, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    args = (hidden_sums, float(output_sums[0]), hidden_weights, output_weights, inputs)
+
+    size = alphas.size * learning_rates.size * targets.size * (hidden_weights.size + n_hidden)
+    if processes is None:
+        # Процесс рассчитывает сетку для своей части значений α
+        processes = choose_processes(size, PARALLEL_THRESHOLD, alphas.size,
+                                     size * 8 // alphas.size)[0]
+    processes = max(1, min(processes, alphas.size))
+
+    if processes == 1:
+        return _sweep_block(*args, alphas, learning_rates, targets, keep_deltas)
+
+    grid_shape = (alphas.size, learning_rates.size, targets.size)
+    outputs = {key: (grid_shape, np.float64) for key in SUMMARY_FIELDS}
+    if keep_deltas:
+        outputs['hidden_delta'] = (grid_shape + hidden_weights.shape, np.float64)
+        outputs['hidden_bias_delta'] = (grid_shape + (n_hidden,), np.float64)
+        outputs['output_delta'] = (grid_shape + (n_hidden,), np.float64)
+    bounds = np.cumsum([0] + [len(chunk) for chunk in np.array_split(alphas, processes)])
+    with SharedArrays.create({'hidden_sums': hidden_sums, 'hidden_weights': hidden_weights,
+                              'output_weights': output_weights, 'inputs': inputs,
+                              'alphas': alphas, **outputs}) as shared:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_sweep_shared, shared.descriptor, int(start), int(stop),
+                                       float(output_sums[0]), learning_rates, targets, keep_deltas)
+                       for start, stop in zip(bounds[:-1], bounds[1:])]
+            for future in futures:
+                future.result()
+        return {key: shared[key].copy() for key in outputs}
+
+
+def sweep_to_dataframe(result: Dict[str, np.ndarray],
+                       alphas: Sequence[float],
+                       learning_rates: Sequence[float],
+                       targets: Sequence[float]) -> pd.DataFrame:
+    """
+    Преобразует результат перебора в сводную таблицу (одна строка на комбинацию).
+
+    Args:
+        result: Результат sweep_hyperparameters
+        alphas: Значения α
+        learning_rates: Значения η
+        targets: Значения t
+
+    Returns:
+        pd.DataFrame: Сводка по комбинациям параметров
+    """
+    grid = np.meshgrid(np.asarray(alphas, dtype=np.float64),
+                       np.asarray(learning_rates, dtype=np.float64),
+                       np.asarray(targets, dtype=np.float64), indexing='ij')
+    return pd.DataFrame({
+        'α': grid[0].ravel(),
+        'η': grid[1].ravel(),
+        't': grid[2].ravel(),
+        'γ выхода': result['output_error'].ravel(),
+        'max |γ| скрытого слоя': result['hidden_error_max_abs'].ravel(),
+        'Среднее |γ| скрытого слоя': result['hidden_error_mean_abs'].ravel(),
+        '||Δw||': result['delta_norm'].ravel(),
+        'max |Δw|': result['delta_max_abs'].ravel(),
+        'ΔT выхода': result['output_bias_delta'].ravel(),
+    })
@@ -0,0 +1,129 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.optimizers import Optimizer, create_optimizer
+from utils.sparse import layer_gradient, layer_params
+from utils.vectorized import (backward_errors, forward_pass, layer_inputs,
+                              parsed_gradients)
+
+
+def network_params(network) -> List[np.ndarray]:
+    """
+    Массивы обучаемых параметров сети: веса слоев (для разреженных слоев -
+    значения ненулевых синапсов), затем смещения. Массивы не копируются,
+    поэтому коррекция на месте изменяет саму сеть.
+    """
+    return [layer_params(layer) for layer in network.layers] + list(network.biases)
+
+
+def compute_gradients(network, inputs: np.ndarray, targets: np.ndarray,
+                      alpha: float) -> Tuple[List[np.ndarray], float]:
+    """
+    Средние по пакету градиенты γ_j * y_j для всех параметров сети.
+
+    Args:
+        network: Веса сети (NetworkArrays)
+        inputs: Пакет входных векторов (B, n_in)
+        targets: Целевые значения выходного слоя (B, n_out)
+        alpha: Коэффициент крутизны α
+
+    Returns:
+        Tuple[List[np.ndarray], float]: Градиенты в порядке network_params
+        и средняя ошибка Σ(y - t)² по пакету
+    """
+    sums, outputs = forward_pass(network, inputs, alpha)
+    _, gammas = backward_errors(network, sums, alpha, targets)
+    signals = layer_inputs(inputs, sums, alpha)
+    batch = inputs.shape[0]
+    weight_grads = [layer_gradient(layer, gamma, signal) / batch
+                    for layer, gamma, signal in zip(network.layers, gammas, signals)]
+    bias_grads = [gamma.sum(axis=0) / batch for gamma in gammas]
+    loss = float(((outputs[-1] - targets) ** 2).sum(axis=-1).mean())
+    return weight_grads + bias_grads, loss
+
+
+def evaluate_loss(network, inputs: np.ndarray, targets: np.ndarray, alpha: float) -> float:
+    """Средняя ошибка Σ(y - t)² на наборе образов"""
+    _, outputs = forward_pass(network, inputs, alpha)
+    return float(((outputs[-1] - targets) ** 2).sum(axis=-1).mean())
+
+
+def train(network, inputs: np.ndarray, targets: np.ndarray, alpha: float,
+          optimizer: str = 'sgd', learning_rate: float = 0.1,
+          batch_size: int = 32, epochs: int = 1, seed: Optional[int] = 0,
+          log_func: Callable[[str], None] = None,
+          **optimizer_kwargs) -> Tuple[object, List[float]]:
+    """
+    Обучение сети мини-пакетами.
+
+    Args:
+        network: Начальные веса (NetworkArrays), не изменяются
+        inputs: Входные образы (N, n_in)
+        targets: Целевые значения (N, n_out) или (N,) для одного выхода
+        alpha: Коэффициент крутизны α
+        optimizer: Правило коррекции (sgd, momentum, nesterov, adam)
+        learning_rate: Скорость обучения η
+        batch_size: Размер мини-пакета
+        epochs: Число эпох
+        seed: Зерно перемешивания образов (None - без перемешивания)
+        log_func: Функция для вывода сообщений
+        **optimizer_kwargs: Параметры правила коррекции
+
+    Returns:
+        Tuple[NetworkArrays, List[float]]: Обученные веса и ошибка после каждой эпохи
+    """
+    network = network.copy()
+    inputs = np.asarray(inputs, dtype=network.dtype)
+    targets = np.asarray(targets, dtype=network.dtype).reshape(inputs.shape[0], -1)
+    params = network_params(network)
+    opt = create_optimizer(optimizer, params, learning_rate, **optimizer_kwargs)
+    rng = np.random.default_rng(seed) if seed is not None else None
+    order = np.arange(inputs.shape[0])
+
+    history = []
+    for epoch in range(1, epochs + 1):
+        if rng is not None:
+            rng.shuffle(order)
+        for start in range(0, order.size, batch_size):
+            batch = order[start:start + batch_size]
+            grads, _ = compute_gradients(network, inputs[batch], targets[batch], alpha)
+            opt.step(params, grads)
+        history.append(evaluate_loss(network, inputs, targets, alpha))
+        if log_func:
+            log_func(f"Эпоха {epoch}: ошибка {history[-1]:.8f}")
+    return network, history
+
+
+def optimizer_correction(network, errors: Dict[Tuple[int, int], Tuple[float, float, float]],
+                         input_signals: List[float],
+                         weighted_sums: Dict[Tuple[int, int], float],
+                         alpha: float, optimizer: str, learning_rate: float,
+                         state: Optional[Optimizer] = None, **optimizer_kwargs):
+    """
+    Один шаг коррекции весов по образу из лога выбранным правилом.
+
+    Для правила sgd результат совпадает с calculate_new_weights. Если
+    передан state, состояние правила (моменты) сохраняется между шагами.
+
+    Args:
+        network: Веса сети (NetworkArrays), не изменяются
+        errors: Результат calculate_errors
+        input_signals: Входные сигналы сети
+        weighted_sums: Словарь взвешенных сумм
+        alpha: Коэффициент крутизны α
+        optimizer: Правило коррекции
+        learning_rate: Скорость обучения η
+        state: Ранее созданный оптимизатор для продолжения коррекции
+
+    Returns:
+        NetworkArrays: Новые веса сети
+    """
+    network = network.copy()
+    gammas, signals = parsed_gradients(network, errors, input_signals, weighted_sums, alpha)
+    grads = [layer_gradient(layer, gamma, signal)
+             for layer, gamma, signal in zip(network.layers, gammas, signals)] + gammas
+    params = network_params(network)
+    opt = state or create_optimizer(optimizer, params, learning_rate, **optimizer_kwargs)
+    opt.step(params, grads)
+    return network
@@ -0,0 +1,173 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from utils.network import sums_to_arrays
+from utils.sparse import layer_dot, layer_gradient, layer_params, layer_tdot, with_params
+
+
+def bipolar_sigmoid(s, alpha):
+    """
+    Векторная биполярная сигмоида f(S) = 2/(1+exp(-αS)) - 1.
+
+    Аргументы поддерживают broadcasting numpy.
+    """
+    return 2 / (1 + np.exp(-alpha * s)) - 1
+
+
+def bipolar_derivative(s, alpha):
+    """
+    Векторная производная биполярной сигмоиды F'(S) = (α/4) * [1 - f(S)^2].
+
+    Аргументы поддерживают broadcasting numpy.
+    """
+    f_s = bipolar_sigmoid(s, alpha)
+    return (alpha / 4) * (1 - f_s ** 2)
+
+
+def forward_pass(network, inputs: np.ndarray, alpha: float) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """
+    Прямой проход сети: S = W·y + T, y = f(S).
+
+    Смещение T_j - вес постоянного входа +1 (так оно и корректируется:
+    T_j(t+1) = T_j(t) - η * γ_j).
+
+    Args:
+        network: Веса сети (NetworkArrays), слои плотные или разреженные
+        inputs: Входной вектор (n_in,) или пакет (B, n_in)
+        alpha: Коэффициент крутизны α
+
+    Returns:
+        Tuple[List, List]: Взвешенные суммы и выходы нейронов по слоям
+    """
+    sums = []
+    outputs = []
+    signal = inputs
+    for layer, bias in zip(network.layers, network.biases):
+        s = layer_dot(layer, signal) + bias
+        signal = bipolar_sigmoid(s, alpha)
+        sums.append(s)
+        outputs.append(signal)
+    return sums, outputs
+
+
+def backward_errors(network, sums: List[np.ndarray], alpha: float,
+                    target) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """
+    Обратный проход: ошибки γ всех слоев по взвешенным суммам.
+
+    Выходной слой: γ = 2*(y - t)*F'(S), скрытые слои: γ_i = (Σ_k γ_k * w_ki) * F'(S_i) -
+    те же формулы, что в calculate_errors, для произвольного числа слоев.
+
+    Args:
+        network: Веса сети (NetworkArrays)
+        sums: Взвешенные суммы слоев (векторы или пакеты)
+        alpha: Коэффициент крутизны α
+        target: Целевые значения выходного слоя
+
+    Returns:
+        Tuple[List, List]: Производные F'(S) и ошибки γ по слоям
+    """
+    derivatives = [bipolar_derivative(s, alpha) for s in sums]
+    gammas = [None] * len(sums)
+    output_y = bipolar_sigmoid(sums[-1], alpha)
+    gammas[-1] = 2 * (output_y - target) * derivatives[-1]
+    for k in range(len(sums) - 2, -1, -1):
+        gammas[k] = layer_tdot(network.layers[k + 1], gammas[k + 1]) * derivatives[k]
+    return derivatives, gammas
+
+
+def layer_inputs(inputs: np.ndarray, sums: List[np.ndarray], alpha: float) -> List[np.ndarray]:
+    """
+    Входные сигналы y каждого слоя: входы сети для первого слоя,
+    f(S) предыдущего слоя для остальных (как в build_neuron_inputs).
+    """
+    return [inputs] + [bipolar_sigmoid(s, alpha) for s in sums[:-1]]
+
+
+def update_weights(network, gammas: List[np.ndarray], inputs: List[np.ndarray], learning_rate: float):
+    """
+    Коррекция весов и смещений по формулам
+       ω_ij(t+1) = ω_ij(t) - η * γ_j * y_j,
+       T_j(t+1)   = T_j(t) - η * γ_j.
+
+    Для пакетов градиенты суммируются. Разреженные слои корректируются
+    только по существующим синапсам.
+
+    Args:
+        network: Веса сети (NetworkArrays)
+        gammas: Ошибки γ по слоям
+        inputs: Входные сигналы слоев (см. layer_inputs)
+        learning_rate: Скорость обучения η
+
+    Returns:
+        NetworkArrays: Новые веса сети
+    """
+    layers = []
+    biases = []
+    for layer, bias, gamma, signal in zip(network.layers, network.biases, gammas, inputs):
+        gradient = layer_gradient(layer, gamma, signal)
+        layers.append(with_params(layer, layer_params(layer) - learning_rate * gradient))
+        bias_gradient = gamma if gamma.ndim == 1 else gamma.sum(axis=0)
+        biases.append(bias - learning_rate * bias_gradient)
+    return type(network)(layers, biases)
+
+
+def parsed_gradients(network, errors: Dict[Tuple[int, int], Tuple[float, float, float]],
+                     input_signals: List[float],
+                     weighted_sums: Dict[Tuple[int, int], float],
+                     alpha: float) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """
+    Ошибки γ и входные сигналы слоев для образа из лога симулятора.
+
+    Ошибки γ берутся из результата calculate_errors, входные сигналы слоев
+    строятся так же, как в build_neuron_inputs.
+
+    Args:
+        network: Веса сети (NetworkArrays)
+        errors: Результат calculate_errors
+        input_signals: Входные сигналы сети
+        weighted_sums: Словарь взвешенных сумм
+        alpha: Коэффициент крутизны α
+
+    Returns:
+        Tuple[List, List]: Ошибки γ и входные сигналы по слоям
+    """
+    topology = network.topology
+    dtype = network.dtype
+    gammas = []
+    for layer, size in enumerate(topology[1:], 1):
+        gamma = np.zeros(size, dtype=dtype)
+        for neuron in range(1, size + 1):
+            if (layer, neuron) in errors:
+                gamma[neuron - 1] = errors[(layer, neuron)][2]
+        gammas.append(gamma)
+    inputs = np.zeros(topology[0], dtype=dtype)
+    n_signals = min(len(input_signals), topology[0])
+    inputs[:n_signals] = input_signals[:n_signals]
+    sums = sums_to_arrays(weighted_sums, topology, dtype)
+    return gammas, layer_inputs(inputs, sums, alpha)
+
+
+def correct_network(network, errors: Dict[Tuple[int, int], Tuple[float, float, float]],
+                    input_signals: List[float],
+                    weighted_sums: Dict[Tuple[int, int], float],
+                    alpha: float, learning_rate: float):
+    """
+    Векторный аналог calculate_new_weights для весов в виде NetworkArrays.
+
+    Разреженные слои не преобразуются в плотные.
+
+    Args:
+        network: Веса сети (NetworkArrays)
+        errors: Результат calculate_errors
+        input_signals: Входные сигналы сети
+        weighted_sums: Словарь взвешенных сумм
+        alpha: Коэффициент крутизны α
+        learning_rate: Скорость обучения η
+
+    Returns:
+        NetworkArrays: Новые веса сети
+    """
+    gammas, inputs = parsed_gradients(network, errors, input_signals, weighted_sums, alpha)
+    return update_weights(network, gammas, inputs, learning_rate)
@@ -0,0 +1,131 @@
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.sparse import SparseLayer
+
+# Число синапсов с наибольшим изменением в отчете по умолчанию
+DEFAULT_TOP_K = 20
+# Знаменатель относительного изменения для нулевых весов
+RELATIVE_EPSILON = 1e-12
+
+
+def _layer_values(before, after) -> Tuple[np.ndarray, np.ndarray, Callable[[np.ndarray], Tuple]]:
+    """
+    Плоские массивы весов слоя до и после изменения.
+
+    Разреженные слои одной структуры сравниваются по ненулевым синапсам,
+    в остальных случаях слои сравниваются как плотные матрицы.
+
+    Returns:
+        Tuple: Веса до, веса после и функция, возвращающая номера нейронов
+        и входов (с 0) для индексов плоских массивов
+    """
+    if (isinstance(before, SparseLayer) and isinstance(after, SparseLayer)
+            and np.array_equal(before.indptr, after.indptr)
+            and np.array_equal(before.indices, after.indices)):
+        return (np.asarray(before.data), np.asarray(after.data),
+                lambda index: (before.rows[index], before.indices[index]))
+    before = before.toarray() if isinstance(before, SparseLayer) else np.asarray(before)
+    after = after.toarray() if isinstance(after, SparseLayer) else np.asarray(after)
+    return before.ravel(), after.ravel(), lambda index: np.unravel_index(index, before.shape)
+
+
+def diff_networks(before, after, top_k: int = DEFAULT_TOP_K,
+                  by: str = 'absolute') -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Сравнивает два набора весов одной топологии.
+
+    Для каждого слоя считаются нормы весов и изменений, число изменившихся
+    синапсов и изменения смещений; отбираются top_k синапсов с наибольшим
+    изменением по всей сети (argpartition в каждом слое, без полной сортировки).
+    Для разреженных слоев одной структуры учитываются только ненулевые синапсы.
+
+    Args:
+        before: Веса до изменения (NetworkArrays)
+        after: Веса после изменения (NetworkArrays)
+        top_k: Число синапсов с наибольшим изменением
+        by: 'absolute' - отбор по |Δw|, 'relative' - по |Δw| / |w(t)|
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Сводка по слоям и наибольшие изменения
+    """
+    if before.topology != after.topology:
+        raise ValueError(f"Топологии сетей не совпадают: {before.topology} и {after.topology}")
+    if by not in ('absolute', 'relative'):
+        raise ValueError(f"Неизвестный критерий отбора {by}, допустимы: absolute, relative")
+
+    summary_rows = []
+    candidates: List[pd.DataFrame] = []
+    totals = np.zeros(4)
+    for layer, (old_layer, new_layer, old_bias, new_bias) in enumerate(
+            zip(before.layers, after.layers, before.biases, after.biases), 1):
+        old, new, positions = _layer_values(old_layer, new_layer)
+        delta = new - old
+        abs_delta = np.abs(delta)
+        bias_delta = np.abs(np.asarray(new_bias) - np.asarray(old_bias))
+        old_sq, new_sq, delta_sq = float(old @ old), float(new @ new), float(delta @ delta)
+        totals += (old_sq, new_sq, delta_sq, float(bias_delta @ bias_delta))
+        summary_rows.append({
+            'Слой': str(layer),
+            'Синапсов': old.size,
+            'Изменено': int(np.count_nonzero(delta)),
+            '||W(t)||': np.sqrt(old_sq),
+            '||W(t+1)||': np.sqrt(new_sq),
+            '||ΔW||': np.sqrt(delta_sq),
+            '||ΔW|| / ||W(t)||': np.sqrt(delta_sq) / max(np.sqrt(old_sq), RELATIVE_EPSILON),
+            'max |Δw|': float(abs_delta.max()) if abs_delta.size else 0.0,
+            'Среднее |Δw|': float(abs_delta.mean()) if abs_delta.size else 0.0,
+            '||ΔT||': float(np.sqrt(bias_delta @ bias_delta)),
+            'max |ΔT|': float(bias_delta.max()) if bias_delta.size else 0.0,
+        })
+
+        if top_k <= 0 or not delta.size:
+            continue
+        if by == 'absolute':
+            score = abs_delta
+        else:
+            score = abs_delta / np.maximum(np.abs(old), RELATIVE_EPSILON)
+        k = min(top_k, score.size)
+        index = np.argpartition(score, score.size - k)[score.size - k:]
+        rows, cols = positions(index)
+        relative = abs_delta[index] / np.maximum(np.abs(old[index]), RELATIVE_EPSILON)
+        candidates.append(pd.DataFrame({
+            'Слой': layer,
+            'Нейрон': rows + 1,
+            'Вход': cols + 1,
+            'wij(t)': old[index],
+            'wij(t+1)': new[index],
+            'Δw': delta[index],
+            '|Δw|': abs_delta[index],
+            '|Δw| / |wij(t)|': relative,
+            '_score': score[index],
+        }))
+
+    old_norm, new_norm, delta_norm, bias_norm = np.sqrt(totals)
+    summary_rows.append({
+        'Слой': 'Вся сеть',
+        'Синапсов': sum(row['Синапсов'] for row in summary_rows),
+        'Изменено': sum(row['Изменено'] for row in summary_rows),
+        '||W(t)||': old_norm,
+        '||W(t+1)||': new_norm,
+        '||ΔW||': delta_norm,
+        '||ΔW|| / ||W(t)||': delta_norm / max(old_norm, RELATIVE_EPSILON),
+        'max |Δw|': max(row['max |Δw|'] for row in summary_rows),
+        'Среднее |Δw|': (sum(row['Среднее |Δw|'] * row['Синапсов'] for row in summary_rows)
+                         / max(sum(row['Синапсов'] for row in summary_rows), 1)),
+        '||ΔT||': bias_norm,
+        'max |ΔT|': max(row['max |ΔT|'] for row in summary_rows),
+    })
+    summary = pd.DataFrame(summary_rows)
+
+    if candidates:
+        top = pd.concat(candidates, ignore_index=True)
+        top = top.sort_values(['_score', 'Слой', 'Нейрон', 'Вход'],
+                              ascending=[False, True, True, True], kind='stable')
+        top = top.head(top_k).drop(columns='_score').reset_index(drop=True)
+    else:
+        top = pd.DataFrame(columns=['Слой', 'Нейрон', 'Вход', 'wij(t)', 'wij(t+1)',
+                                    'Δw', '|Δw|', '|Δw| / |wij(t)|'])
+    return summary, top
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Модули программы импортируются так же, как при запуске из src
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
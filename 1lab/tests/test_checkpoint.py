@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from utils.checkpoint import (ALIGNMENT, Checkpoint, load_checkpoint, read_checkpoint_metadata,
+                              save_checkpoint)
+from utils.network import NetworkArrays
+from utils.sparse import SparseLayer
+
+
+def make_network(dtype) -> NetworkArrays:
+    """Сеть 3-4-2-1: плотный скрытый слой, разреженный второй, плотный выходной"""
+    rng = np.random.default_rng(0)
+    hidden = rng.normal(size=(4, 3)).astype(dtype)
+    second = rng.normal(size=(2, 4)).astype(dtype)
+    second[:, 1:3] = 0
+    output = rng.normal(size=(1, 2)).astype(dtype)
+    biases = [rng.normal(size=n).astype(dtype) for n in (4, 2, 1)]
+    return NetworkArrays([hidden, SparseLayer.from_dense(second), output], biases)
+
+
+def dense(layer) -> np.ndarray:
+    return layer.toarray() if isinstance(layer, SparseLayer) else np.asarray(layer)
+
+
+@pytest.mark.parametrize('mmap_mode', ['r', None])
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_round_trip(tmp_path, dtype, mmap_mode):
+    """Веса, смещения, тип элементов и параметры обучения сохраняются без изменений"""
+    network = make_network(dtype)
+    path = tmp_path / 'net.kpsnet'
+    save_checkpoint(path, Checkpoint(network, alpha=1.5, learning_rate=0.1, cycle=7))
+    loaded = load_checkpoint(path, mmap_mode=mmap_mode)
+
+    assert (loaded.alpha, loaded.learning_rate, loaded.cycle) == (1.5, 0.1, 7)
+    assert loaded.topology == network.topology == [3, 4, 2, 1]
+    assert loaded.network.dtype == np.dtype(dtype)
+    assert isinstance(loaded.network.layers[1], SparseLayer)
+    for before, after in zip(network.layers, loaded.network.layers):
+        assert dense(after).dtype == np.dtype(dtype)
+        np.testing.assert_array_equal(dense(after), dense(before))
+    for before, after in zip(network.biases, loaded.network.biases):
+        np.testing.assert_array_equal(after, before)
+    assert isinstance(loaded.network.layers[0], np.memmap) == (mmap_mode is not None)
+
+
+def test_arrays_are_aligned(tmp_path):
+    path = tmp_path / 'net.kpsnet'
+    save_checkpoint(path, Checkpoint(make_network(np.float32)))
+    offsets = [descriptor['offset'] for descriptor in read_checkpoint_metadata(path)['arrays']]
+    assert all(offset % ALIGNMENT == 0 for offset in offsets)
+
+
+def test_mmap_modes_protect_file(tmp_path):
+    """'r' запрещает запись в массивы, 'c' меняет только копию в памяти"""
+    network = make_network(np.float64)
+    path = tmp_path / 'net.kpsnet'
+    save_checkpoint(path, Checkpoint(network))
+
+    with pytest.raises(ValueError):
+        load_checkpoint(path, mmap_mode='r').network.layers[0][0, 0] = 0
+    load_checkpoint(path, mmap_mode='c').network.layers[0][0, 0] = 42
+    np.testing.assert_array_equal(load_checkpoint(path).network.layers[0], network.layers[0])
+
+
+def test_not_a_checkpoint(tmp_path):
+    path = tmp_path / 'bad.kpsnet'
+    path.write_bytes(b'not a network checkpoint')
+    with pytest.raises(ValueError, match='не является контрольной точкой'):
+        load_checkpoint(path)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from utils.correction_workbook import load_correction_workbook
+from utils.network import NetworkArrays
+
+
+@pytest.fixture
+def table_creator(tmp_path, monkeypatch):
+    """WeightCorrectionTableCreator; модуль при импорте создает каталог logs в текущем каталоге"""
+    monkeypatch.chdir(tmp_path)
+    from excel_generator.weight_correction_table_creator import WeightCorrectionTableCreator
+    return WeightCorrectionTableCreator
+
+
+def make_weights(topology=(3, 4, 2, 1), seed=0):
+    """Старые и новые веса сети и новые смещения в виде словарей по (слой, нейрон)"""
+    rng = np.random.default_rng(seed)
+    old_weights, new_weights, new_biases = {}, {}, {}
+    for layer, (n_inputs, n_neurons) in enumerate(zip(topology, topology[1:]), 1):
+        for neuron in range(1, n_neurons + 1):
+            old = rng.normal(size=n_inputs)
+            old[rng.random(n_inputs) < 0.3] = 0
+            old_weights[(layer, neuron)] = old.tolist()
+            new_weights[(layer, neuron)] = (old + rng.normal(scale=0.1, size=n_inputs)).tolist()
+            new_biases[(layer, neuron)] = float(rng.normal())
+    return old_weights, new_weights, new_biases
+
+
+def assert_network_equal(loaded: NetworkArrays, expected: NetworkArrays):
+    assert loaded.topology == expected.topology
+    for after, before in zip(loaded.layers, expected.layers):
+        np.testing.assert_allclose(np.asarray(after), np.asarray(before), rtol=1e-12)
+    for after, before in zip(loaded.biases, expected.biases):
+        np.testing.assert_allclose(after, before, rtol=1e-12)
+
+
+@pytest.mark.parametrize('split, row_budget', [('sheets', None), ('sheets', 7), ('workbooks', 7)])
+def test_old_and_new_weights_round_trip(tmp_path, table_creator, split, row_budget):
+    """Старые и новые веса читаются из таблицы, в том числе разделенной на листы и книги"""
+    old_weights, new_weights, new_biases = make_weights()
+    files = table_creator(old_weights, new_weights, new_biases, row_budget=row_budget,
+                          split=split).create_table(str(tmp_path / 'weights.xlsx'))
+    if split == 'workbooks':
+        assert len(files) > 1
+
+    old_biases = {key: 1.0 for key in old_weights}
+    assert_network_equal(load_correction_workbook(files[0], 'old'),
+                         NetworkArrays.from_dicts(old_weights, old_biases))
+    assert_network_equal(load_correction_workbook(files[0]),
+                         NetworkArrays.from_dicts(new_weights, new_biases))
+
+
+def test_nonzero_only_table(tmp_path, table_creator):
+    """Синапсы, не выведенные в таблицу (nonzero_only), загружаются нулевыми"""
+    old_weights, new_weights, new_biases = make_weights(seed=1)
+    files = table_creator(old_weights, new_weights, new_biases,
+                          nonzero_only=True).create_table(str(tmp_path / 'weights.xlsx'))
+    old_biases = {key: 1.0 for key in old_weights}
+    assert_network_equal(load_correction_workbook(files[0], 'old'),
+                         NetworkArrays.from_dicts(old_weights, old_biases))
+
+
+def test_unknown_state(tmp_path):
+    with pytest.raises(ValueError, match='Неизвестный набор весов'):
+        load_correction_workbook(tmp_path / 'weights.xlsx', 'middle')
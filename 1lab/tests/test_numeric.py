@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from parsers.numeric import decode_numbers
+
+VALUES = ['-0,735', '1,5e-3', '-2,0E+02', '3', '0,0']
+EXPECTED = [-0.735, 1.5e-3, -200.0, 3.0, 0.0]
+
+
+@pytest.mark.parametrize('spans', [VALUES, ' '.join(VALUES), '\n'.join(VALUES).encode('ascii')],
+                         ids=['list', 'str', 'bytes'])
+def test_decimal_comma_and_exponent(spans):
+    """Десятичная запятая и экспонента разбираются во всех видах входа"""
+    values = decode_numbers(spans)
+    assert values.dtype == float
+    np.testing.assert_array_equal(values, EXPECTED)
+
+
+def test_empty_input():
+    assert decode_numbers([]).size == 0
+    assert decode_numbers('').size == 0
+
+
+@pytest.mark.parametrize('spans', [['1,5', 'abc', '2'], '1,5 abc 2', b'1,5 abc 2'],
+                         ids=['list', 'str', 'bytes'])
+def test_invalid_value_is_reported(spans):
+    """Некорректное значение разбирается по одному и указывается в ошибке"""
+    with pytest.raises(ValueError, match='abc'):
+        decode_numbers(spans)
+
+
+def test_span_count_mismatch_falls_back():
+    """Значение с пробелом дает лишнее число - разбор по одному находит его"""
+    with pytest.raises(ValueError, match='1.5 2'):
+        decode_numbers(['0,5', '1,5 2'])
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from utils.calculations import calculate_errors
+from utils.network import NetworkArrays
+from utils.pipeline import create_processing_pipeline
+from utils.selection import NeuronSelection
+from utils.sparse import SPARSITY_THRESHOLD, SparseLayer
+
+
+def sparse_log(zero_share: float = 0.7, n_inputs: int = 3, n_hidden: int = 10, seed: int = 0):
+    """Веса, смещения, суммы и входы сети, скрытый слой которой выше порога разреженности"""
+    rng = np.random.default_rng(seed)
+    hidden = rng.normal(size=(n_hidden, n_inputs)) * (rng.uniform(size=(n_hidden, n_inputs)) >= zero_share)
+    # Нейрон 1 с нулевыми синапсами - на нем видно, корректируются ли нули
+    hidden[0] = [0.5] + [0.0] * (n_inputs - 1)
+    output = rng.normal(size=n_hidden)
+    weights = {(1, neuron): hidden[neuron - 1].tolist() for neuron in range(1, n_hidden + 1)}
+    weights[(2, 1)] = output.tolist()
+    biases = {key: 1.0 for key in weights}
+    signals = rng.uniform(-1, 1, size=n_inputs).tolist()
+    sums = {(1, neuron): float(hidden[neuron - 1] @ signals) for neuron in range(1, n_hidden + 1)}
+    sums[(2, 1)] = float(np.tanh(hidden @ signals) @ output)
+    return weights, biases, sums, signals
+
+
+def make_pipeline(weights, biases, sums, signals, **params):
+    pipeline = create_processing_pipeline()
+    pipeline.set_value('parsed_weights', (1, weights))
+    pipeline.set_value('weights', weights)
+    pipeline.set_value('biases', biases)
+    pipeline.set_value('weighted_sums', sums)
+    pipeline.set_value('input_signals', signals)
+    pipeline.set_params(**{'alpha': 1.0, 'target': 0.5, 'learning_rate': 0.3, 'optimizer': 'sgd',
+                           'top_k': 5, **params})
+    return pipeline
+
+
+@pytest.mark.parametrize('optimizer', ['sgd', 'adam'])
+@pytest.mark.parametrize('precision', ['float64', 'float32'])
+def test_corrected_does_not_depend_on_storage(optimizer, precision):
+    """Разреженное хранение сети не меняет новые веса без prune"""
+    data = sparse_log()
+    dense = make_pipeline(*data, optimizer=optimizer, precision=precision)
+    sparse = make_pipeline(*data, optimizer=optimizer, precision=precision)
+    weights, biases = data[:2]
+    dtype = np.float32 if precision == 'float32' else np.float64
+    sparse.set_value('network', NetworkArrays.from_dicts(weights, biases, dtype, sparse='auto'))
+    assert isinstance(sparse.get('network').layers[0], SparseLayer)
+
+    expected = dense.get('corrected')
+    result = sparse.get('corrected')
+    assert result[1] == expected[1]
+    for key, values in expected[0].items():
+        np.testing.assert_allclose(result[0][key], values, rtol=1e-6 if precision == 'float32' else 1e-12)
+    # Нулевые синапсы корректируются
+    assert expected[0][(1, 1)][1] != 0.0
+
+
+def test_prune_freezes_zero_synapses():
+    """С prune нулевые синапсы слоя выше порога не корректируются"""
+    data = sparse_log()
+    weights = data[0]
+    hidden = np.array([weights[(1, neuron)] for neuron in range(1, 11)])
+    assert np.mean(hidden == 0) >= SPARSITY_THRESHOLD
+    pipeline = make_pipeline(*data, prune=True)
+    assert pipeline.get('network').is_sparse
+    new_weights = pipeline.get('corrected')[0]
+    for key, values in new_weights.items():
+        old = np.array(weights[key])
+        assert np.all(np.array(values)[old == 0] == 0)
+
+
+def log_text(weights, biases, sums, signals) -> str:
+    """Текст лога симулятора с весами, суммами и входами сети"""
+    def number(value: float) -> str:
+        return f'{value:.10f}'.replace('.', ',')
+
+    lines = ['Циклов обучения: 5', 'Инициализация весов синапсов...']
+    for (layer, neuron), values in sorted(weights.items()):
+        lines.append(f'Нейрон[{layer}][{neuron}]')
+        # Веса синапсов нумеруются с 0, последним идет вес смещения
+        lines += [f'w[{layer}, {neuron}, {i}] = {number(w)}' for i, w in enumerate(values)]
+        lines.append(f'w[{layer}, {neuron}, {len(values)}] = {number(biases[(layer, neuron)])}')
+    lines.append('Выбираем допустимый образ')
+    for i, value in enumerate(signals, 1):
+        lines += [f'Нейрон[0][{i}]', f'Аксон = {number(value)}']
+    for (layer, neuron), value in sorted(sums.items()):
+        lines += [f'Нейрон[{layer}][{neuron}]', f'Взвешенная сумма = {number(value)}']
+    lines += ['', 'Обратная волна - подсчет локальной ошибки нейронов...']
+    return '\n'.join(lines) + '\n'
+
+
+def text_pipeline(text: str, **params):
+    pipeline = create_processing_pipeline()
+    pipeline.set_params(**params)
+    pipeline.set_value('content', text)
+    pipeline.set_params(alpha=1.0, target=0.5, learning_rate=0.3, optimizer='sgd', top_k=5)
+    return pipeline
+
+
+@pytest.mark.parametrize('prune', [False, True])
+@pytest.mark.parametrize('neurons', ['1:1-3', '1:1', '1:2,5;2'])
+def test_selected_rows_match_full_run(neurons, prune):
+    """Новые веса выбранных нейронов совпадают с теми же строками полного расчета"""
+    data = sparse_log(zero_share=0.35, n_hidden=12)
+    # Весь скрытый слой ниже порога разреженности, выбранные строки - выше
+    hidden = np.array([data[0][(1, neuron)] for neuron in range(1, 13)])
+    assert np.mean(hidden == 0) < SPARSITY_THRESHOLD
+    text = log_text(*data)
+    full = text_pipeline(text, prune=prune).get('corrected')
+    selected = text_pipeline(text, prune=prune, selection=NeuronSelection.parse(neurons)).get('corrected')
+    assert selected[0]
+    for key, values in selected[0].items():
+        assert values == pytest.approx(full[0][key], rel=1e-12, abs=1e-15)
+        assert selected[1][key] == pytest.approx(full[1][key], rel=1e-12)
+
+
+def test_errors_cover_hidden_layer_from_data():
+    """Без выбора ошибки рассчитываются для всех нейронов скрытого слоя лога"""
+    weights, _, sums, _ = sparse_log(n_hidden=12)
+    full = calculate_errors(sums, weights, 1.0, 0.5)
+    every = calculate_errors(sums, weights, 1.0, 0.5, selection=NeuronSelection.parse('1;2'))
+    assert sorted(full) == sorted(every) == [(1, n) for n in range(1, 13)] + [(2, 1)]
+    assert full == every
@@ -0,0 +1,17 @@
+import pytest
+
+from utils.planner import PROCESSES_ENV, choose_processes, env_processes
+
+
+@pytest.mark.parametrize('value, expected', [('', None), ('0', None), ('3', 3), (' 2 ', 2)])
+def test_env_processes(monkeypatch, value, expected):
+    monkeypatch.setenv(PROCESSES_ENV, value)
+    assert env_processes() == expected
+
+
+@pytest.mark.parametrize('value', ['abc', '-1', '1.5'])
+def test_env_processes_rejects_invalid(monkeypatch, value):
+    """Некорректное KPS_PROCESSES - ошибка с именем переменной, а не ValueError из int()"""
+    monkeypatch.setenv(PROCESSES_ENV, value)
+    with pytest.raises(ValueError, match=PROCESSES_ENV):
+        choose_processes(100, 1, 4)
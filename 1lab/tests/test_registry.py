@@ -0,0 +1,52 @@
+import sqlite3
+
+from utils.registry import RunRegistry
+
+WEIGHTS = {(1, 1): [0.5, -0.25], (2, 1): [1.0]}
+BIASES = {(1, 1): 1.0, (2, 1): 1.0}
+ERRORS = {(1, 1): (0.1, 0.2, 0.3), (2, 1): (0.4, 0.5, 0.6)}
+
+
+def record(registry: RunRegistry, precision: str) -> int:
+    return registry.record_run(('run.txt', 1, 100), 1.0, 0.5, 0.1, 'sgd', 5, ERRORS,
+                               WEIGHTS, BIASES, WEIGHTS, BIASES, '', precision)
+
+
+def test_precision_is_part_of_run_key(tmp_path):
+    """Запуски в float32 и float64 хранятся отдельно, повтор заменяет запись той же точности"""
+    with RunRegistry(tmp_path / 'runs.sqlite') as registry:
+        record(registry, 'float64')
+        record(registry, 'float32')
+        record(registry, 'float32')
+        runs = registry.runs()
+        assert sorted(runs['precision']) == ['float32', 'float64']
+        assert registry.query('SELECT COUNT(*) AS n FROM neurons')['n'][0] == 4
+
+
+def test_registry_without_precision_is_migrated(tmp_path):
+    """Реестр прежней версии получает столбец precision, данные запусков сохраняются"""
+    path = tmp_path / 'runs.sqlite'
+    with RunRegistry(path) as registry:
+        run_id = record(registry, 'float64')
+    connection = sqlite3.connect(str(path))
+    schema = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'runs'").fetchone()[0]
+    old_schema = (schema.replace("    precision TEXT NOT NULL DEFAULT 'float64',\n", '')
+                  .replace('selection,\n            precision)', 'selection)'))
+    with connection:
+        connection.execute('PRAGMA foreign_keys = OFF')
+        connection.execute('CREATE TABLE runs_old AS SELECT * FROM runs')
+        connection.execute('DROP TABLE runs')
+        connection.execute(old_schema)
+        connection.execute('INSERT INTO runs SELECT id, log_path, log_name, log_mtime_ns, log_size, '
+                           'processed_at, alpha, target, learning_rate, optimizer, selection, '
+                           'cycles, output_s, output_error FROM runs_old')
+        connection.execute('DROP TABLE runs_old')
+    connection.close()
+
+    with RunRegistry(path) as registry:
+        assert list(registry.runs()['precision']) == ['float64']
+        assert len(registry.weight_history(1, 1)) == 2
+        record(registry, 'float32')
+        assert sorted(registry.runs()['precision']) == ['float32', 'float64']
+        registry.delete_run(run_id)
+        assert registry.query('SELECT COUNT(*) AS n FROM weights')['n'][0] == 3
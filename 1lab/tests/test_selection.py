@@ -0,0 +1,44 @@
+import pytest
+
+from utils.selection import NeuronSelection
+
+
+@pytest.mark.parametrize('text, layers, top_k', [
+    ('1:500-520,600; 2; top=20', {1: [(500, 520), (600, 600)], 2: None}, 20),
+    ('1:1', {1: [(1, 1)]}, None),
+    (' 1 : 3 - 5 , 1 ', {1: [(1, 1), (3, 5)]}, None),
+    ('1:1-3,2-6,7;', {1: [(1, 7)]}, None),
+    ('1:5; 1:1-2', {1: [(1, 2), (5, 5)]}, None),
+    ('2:5; 2', {2: None}, None),
+    ('2; 2:5', {2: None}, None),
+    ('TOP = 3', None, 3),
+    ('3;;top=1', {3: None}, 1),
+])
+def test_accepted(text, layers, top_k):
+    selection = NeuronSelection.parse(text)
+    assert selection.layers == layers
+    assert selection.top_k == top_k
+    assert NeuronSelection.parse(str(selection)) == selection
+
+
+@pytest.mark.parametrize('text', ['', '  ', ';', ' ; ; '])
+def test_empty_is_no_selection(text):
+    assert NeuronSelection.parse(text) is None
+
+
+@pytest.mark.parametrize('text, message', [
+    ('0:1', 'номер слоя'),
+    ('-1', 'номер слоя'),
+    ('x:1', 'номер слоя'),
+    ('top=x', 'номер слоя'),
+    ('1:abc', 'номер или диапазон'),
+    ('1:1-', 'номер или диапазон'),
+    ('1:1,,2', 'номер или диапазон'),
+    ('1:1.5', 'номер или диапазон'),
+    ('1:0', 'диапазон нейронов'),
+    ('1:5-3', 'диапазон нейронов'),
+    ('top=0', 'top'),
+])
+def test_rejected(text, message):
+    with pytest.raises(ValueError, match=message):
+        NeuronSelection.parse(text)
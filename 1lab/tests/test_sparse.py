@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from utils.sparse import SparseLayer
+
+# Матрицы с пустыми строками и столбцами в конце и в середине слоя
+MATRICES = [
+    [[1, 0, 0], [0, 2, 3], [0, 0, 0]],
+    [[1, 1, 0], [0, 1, 0]],
+    [[0, 0, 0], [0, 0, 5]],
+    [[0, 0, 0], [4, 0, 0], [0, 0, 0], [0, 6, 0]],
+    [[0, 0], [0, 0]],
+]
+
+
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_products_match_dense(matrix):
+    """Произведения разреженной матрицы совпадают с плотным расчетом"""
+    dense = np.array(matrix, dtype=float)
+    layer = SparseLayer.from_dense(dense)
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=dense.shape[1])
+    g = rng.normal(size=dense.shape[0])
+    batch_x = rng.normal(size=(3, dense.shape[1]))
+    batch_g = rng.normal(size=(3, dense.shape[0]))
+
+    np.testing.assert_allclose(layer.dot(x), dense @ x)
+    np.testing.assert_allclose(layer.tdot(g), dense.T @ g)
+    np.testing.assert_allclose(layer.dot(batch_x), batch_x @ dense.T)
+    np.testing.assert_allclose(layer.tdot(batch_g), batch_g @ dense)